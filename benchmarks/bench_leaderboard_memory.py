@@ -0,0 +1,61 @@
+"""Compare what a LeaderboardView keeps alive: the full workbook vs the snapshot.
+
+Usage:
+    python benchmarks/bench_leaderboard_memory.py [-file sheep_wars_stats.xlsx]
+"""
+import argparse
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parent.parent.absolute()
+sys.path.insert(0, str(REPO_DIR))
+
+from openpyxl import load_workbook
+from leaderboard import build_leaderboard_snapshot
+
+
+def retained_bytes(build):
+    """Bytes still allocated after build() returns, while its result is alive."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        obj = build()
+        gc.collect()
+        current, _peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return obj, current
+
+
+def workbook_view_data(path):
+    # What LeaderboardView used to hold: the whole workbook
+    return load_workbook(path)
+
+
+def snapshot_view_data(path):
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        return build_leaderboard_snapshot(wb)
+    finally:
+        wb.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-view leaderboard memory footprint")
+    parser.add_argument("-file", default=str(REPO_DIR / "sheep_wars_stats.xlsx"), help="Workbook to load")
+    args = parser.parse_args()
+
+    _wb, wb_bytes = retained_bytes(lambda: workbook_view_data(args.file))
+    del _wb
+    snapshot, snap_bytes = retained_bytes(lambda: snapshot_view_data(args.file))
+
+    print(f"[BENCH] {args.file}: {len(snapshot)} players")
+    print(f"  Workbook retained : {wb_bytes / 1024:,.1f} KiB")
+    print(f"  Snapshot retained : {snap_bytes / 1024:,.1f} KiB")
+    return {"workbook_bytes": wb_bytes, "snapshot_bytes": snap_bytes, "players": len(snapshot)}
+
+
+if __name__ == "__main__":
+    main()
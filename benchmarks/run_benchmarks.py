@@ -0,0 +1,427 @@
+"""Offline benchmark suite for the fetch -> parse -> store -> render pipeline.
+
+No network is used: raw_page.html is the parse fixture and workbooks /
+registry files are generated synthetically (see synthetic.py). The stats
+source comparison fetches from a server on 127.0.0.1.
+
+Usage:
+    python benchmarks/run_benchmarks.py                      # 10, 1k and 10k players
+    python benchmarks/run_benchmarks.py -sizes 10,1000 -history 50
+    python benchmarks/run_benchmarks.py -compare benchmarks/results/old.json
+
+Results are written as JSON (one record per stage and size) so runs can be
+diffed over time; -compare prints the ratio against an earlier results file.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).parent.absolute()
+REPO_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(REPO_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+RAW_PAGE = REPO_DIR / "raw_page.html"
+RESULTS_DIR = BENCH_DIR / "results"
+
+# Script entry points measured by the import-time report
+ENTRY_MODULES = ["get", "create_session", "player_stats", "view_stats", "bot"]
+
+# Size of the served /v2/player body; the API returns every game's stats,
+# so an active player's response is tens of KiB, not just the Wool Games part
+API_BODY_KB = 40
+
+
+# -------------------
+# Timing helpers
+# -------------------
+def timed(fn, repeat: int, setup=None):
+    """Run fn() `repeat` times and return per-call durations in ms.
+
+    setup(), if given, runs before every call and its result is passed to fn;
+    its cost is not counted.
+    """
+    samples = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        fn(arg) if setup else fn()
+        samples.append((time.perf_counter() - start) * 1000.0)
+    return samples
+
+
+def record(results, stage, samples, players=None, **extra):
+    entry = {
+        "stage": stage,
+        "players": players,
+        "repeat": len(samples),
+        "min_ms": round(min(samples), 4),
+        "median_ms": round(statistics.median(samples), 4),
+        "mean_ms": round(statistics.fmean(samples), 4),
+    }
+    entry.update(extra)
+    results.append(entry)
+    size = f" [{players} players]" if players is not None else ""
+    print(f"  {stage:<22}{size:<18} median {entry['median_ms']:>10.3f} ms  (min {entry['min_ms']:.3f}, n={entry['repeat']})")
+    return entry
+
+
+# -------------------
+# Stages
+# -------------------
+def bench_parse(results, repeat):
+    from stats_parser import page_text, extract_stats
+
+    html = RAW_PAGE.read_text(encoding="utf-8")
+    text = page_text(html)
+    record(results, "bs4_parse", timed(lambda: page_text(html), max(1, repeat // 10)), bytes=len(html))
+    record(results, "extraction_regex", timed(lambda: extract_stats(text), repeat))
+
+
+def bench_workbook(results, players, history, repeat):
+    import synthetic
+    from openpyxl import load_workbook
+    from leaderboard import build_leaderboard_snapshot
+    from sheet_layout import is_player_sheet, refresh_deltas
+    from bench_leaderboard_memory import retained_bytes, snapshot_view_data, workbook_view_data
+
+    path = synthetic.workbook_fixture(players, history)
+    heavy_repeat = max(1, repeat // (10 if players >= 1000 else 1))
+    file_bytes = path.stat().st_size
+
+    record(results, "load_workbook", timed(lambda: load_workbook(path), heavy_repeat), players, bytes=file_bytes)
+
+    wb = load_workbook(path)
+    out = synthetic.FIXTURE_DIR / f"save-{players}p.xlsx"
+    record(results, "wb_save", timed(lambda: wb.save(out), heavy_repeat), players)
+    out.unlink(missing_ok=True)
+
+    sheets = [wb[name] for name in wb.sheetnames if is_player_sheet(name)]
+
+    def refresh_all():
+        for ws in sheets:
+            refresh_deltas(ws)
+    record(results, "delta_refresh", timed(refresh_all, heavy_repeat), players)
+
+    def leaderboard_build():
+        ro = load_workbook(path, read_only=True, data_only=True)
+        try:
+            return build_leaderboard_snapshot(ro)
+        finally:
+            ro.close()
+    record(results, "leaderboard_build", timed(leaderboard_build, heavy_repeat), players)
+
+    # What a LeaderboardView keeps alive (see bench_leaderboard_memory.py)
+    _wb, wb_bytes = retained_bytes(lambda: workbook_view_data(path))
+    del _wb
+    snapshot, snap_bytes = retained_bytes(lambda: snapshot_view_data(path))
+    results.append({"stage": "leaderboard_view_memory", "players": players,
+                    "workbook_bytes": wb_bytes, "snapshot_bytes": snap_bytes})
+    print(f"  {'leaderboard_view_memory':<22} [{players} players]  workbook {wb_bytes / 1024:,.0f} KiB -> snapshot {snap_bytes / 1024:,.0f} KiB")
+
+    bench_render(results, players, sheets[0], snapshot, repeat)
+    return wb
+
+
+def bench_render(results, players, sheet, snapshot, repeat):
+    from leaderboard import PERIODS, Leaderboards, read_entry
+
+    try:
+        import bot
+    except Exception as e:
+        print(f"  embed_render           skipped ({e})")
+        return
+
+    async def run():
+        # /sheepwars renders from the stored entry (what LeaderboardStore.player() returns)
+        entry = read_entry(sheet, sheet.title)
+        as_of = time.time()
+        record(results, "embed_render_stats",
+               timed(lambda: bot.StatsTabView(entry, as_of), repeat), players)
+
+        def leaderboard_all_periods():
+            view = bot.LeaderboardView("kills", Leaderboards(snapshot))
+            for period in PERIODS:
+                view.get_leaderboard_embed(period)
+        record(results, "embed_render_leaderboard", timed(leaderboard_all_periods, max(1, repeat // 10)), players)
+
+        # /rank against an already sorted ranking (what the bot serves between workbook changes)
+        index = Leaderboards(snapshot).index("lifetime", "kills")
+        names = [entry.player for entry in snapshot]
+
+        def rank_lookups():
+            for name in names:
+                index.lookup(name)
+                index.neighbours(name)
+        record(results, "rank_lookup_all", timed(rank_lookups, repeat), players)
+
+    asyncio.run(run())
+
+
+def import_time_report(module: str, repeat: int = 3):
+    """Best-of-`repeat` `python -X importtime -c "import module"`.
+
+    Returns (total_ms, [(top-level import, cumulative ms), ...] largest first).
+    """
+    best = None
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              cwd=str(REPO_DIR), capture_output=True, text=True, timeout=120)
+        top = []
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _self, cumulative, name = line[len("import time:"):].split("|")
+            # nested imports are indented under their parent
+            if not name.startswith("  "):
+                top.append((name.strip(), int(cumulative) / 1000.0))
+        total = sum(ms for _name, ms in top)
+        if best is None or total < best[0]:
+            best = (total, sorted(top, key=lambda t: t[1], reverse=True))
+    return best
+
+
+class _PageHandler(BaseHTTPRequestHandler):
+    """Serves `body` as the plancke page, plus the API routes stats_source.py uses."""
+    body = b""
+    player_body = b"{}"
+
+    def do_GET(self):
+        body, content_type = self.body, "text/html; charset=utf-8"
+        if self.path.startswith("/v2/player"):
+            body, content_type = self.player_body, "application/json"
+        elif self.path.startswith("/minecraft/profile/lookup/name/"):
+            name = self.path.rsplit("/", 1)[1]
+            body, content_type = json.dumps({"id": "0" * 32, "name": name}).encode("utf-8"), "application/json"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def first_request_ms(repeat: int = 3):
+    """Time from spawning get.py to its first HTTP request, minus the deliberate jitter sleep.
+
+    get.py runs from a scratch copy (small synthetic workbook) against a local
+    server serving raw_page.html; the timings come from its trace spans.
+    """
+    import synthetic
+
+    _PageHandler.body = RAW_PAGE.read_bytes()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    work = Path(tempfile.mkdtemp(prefix="bench-startup-"))
+    samples = []
+    try:
+        for script in REPO_DIR.glob("*.py"):
+            shutil.copy2(script, work / script.name)
+        shutil.copy2(synthetic.workbook_fixture(10, 1), work / "sheep_wars_stats.xlsx")
+        trace_file = work / "timings.jsonl"
+        env = dict(os.environ, PLANCKE_BASE_URL=f"http://127.0.0.1:{server.server_port}",
+                   MOJANG_API_BASE_URL=f"http://127.0.0.1:{server.server_port}",
+                   SHEEPWARS_TRACE="1", SHEEPWARS_TRACE_FILE=str(trace_file))
+        for _ in range(repeat):
+            trace_file.unlink(missing_ok=True)
+            spawned = time.time()
+            subprocess.run([sys.executable, "get.py", "-ign", synthetic.player_name(0), "-refresh"],
+                           cwd=str(work), env=env, capture_output=True, timeout=120)
+            spans = {}
+            for line in trace_file.read_text(encoding="utf-8").splitlines():
+                rec = json.loads(line)
+                spans.setdefault(rec["span"], rec)
+            if "fetch.http" not in spans:
+                continue
+            jitter_ms = spans.get("fetch.jitter", {}).get("ms", 0.0)
+            samples.append((spans["fetch.http"]["ts"] - spawned) * 1000.0 - jitter_ms)
+    finally:
+        server.shutdown()
+        shutil.rmtree(work, ignore_errors=True)
+    return samples
+
+
+def api_player_body(target_kb: int = API_BODY_KB) -> bytes:
+    """A /v2/player response with raw_page.html's Wool Games numbers, padded
+    with other games' stats to `target_kb`."""
+    from stats_parser import page_text, extract_stats, to_record
+
+    r = to_record(extract_stats(page_text(RAW_PAGE.read_text(encoding="utf-8"))))
+    stats = {
+        "WoolGames": {
+            "coins": r.wool,
+            "progression": {"experience": 0},
+            "sheep_wars": {"stats": {"wins": r.wins, "losses": r.losses, "kills": r.kills,
+                                     "deaths": r.deaths, "damage_dealt": r.damage_dealt}},
+            "capture_the_wool": {"stats": {"participated_wins": r.ctw_wins, "participated_losses": r.ctw_losses,
+                                           "kills": r.ctw_kills, "deaths": r.ctw_deaths}},
+        },
+    }
+    game = 0
+    while len(json.dumps(stats)) < target_kb * 1024:
+        stats[f"Game{game}"] = {f"stat_{i}_of_game_{game}": i * 7919 for i in range(100)}
+        game += 1
+    return json.dumps({"success": True, "player": {"uuid": "0" * 32, "stats": stats}}).encode("utf-8")
+
+
+def bench_sources(results, repeat):
+    """Per-refresh wall and CPU time of each stats source against a local server.
+
+    CPU is the fetching thread's own time (the server thread is excluded);
+    the scraper's deliberate first-attempt jitter is turned off.
+    """
+    import requests
+    import get
+    import identity
+    import stats_source
+    import tracing
+
+    _PageHandler.body = RAW_PAGE.read_bytes()
+    _PageHandler.player_body = api_player_body()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _PageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    saved = (get.PLANCKE_BASE_URL, get.FIRST_ATTEMPT_JITTER, stats_source.HYPIXEL_API_BASE_URL,
+             identity.MOJANG_API_BASE_URL, tracing.TRACE_ENABLED)
+    get.PLANCKE_BASE_URL = stats_source.HYPIXEL_API_BASE_URL = identity.MOJANG_API_BASE_URL = base
+    get.FIRST_ATTEMPT_JITTER = (0.0, 0.0)
+    tracing.TRACE_ENABLED = False
+
+    sources = {
+        "plancke": (get.PlanckeSource(session=requests.Session()), len(_PageHandler.body)),
+        "hypixel": (stats_source.HypixelApiSource(api_key="bench", session=requests.Session()),
+                    len(_PageHandler.player_body)),
+    }
+    medians = {}
+    try:
+        for name, (source, body_bytes) in sources.items():
+            source.fetch("Chuckegg")  # imports, UUID lookup (then cached) and connection set up outside the timing
+            wall, cpu = [], []
+            for _ in range(max(1, repeat // 2)):
+                start, start_cpu = time.perf_counter(), time.thread_time()
+                source.fetch("Chuckegg")
+                cpu.append((time.thread_time() - start_cpu) * 1000.0)
+                wall.append((time.perf_counter() - start) * 1000.0)
+            entry = record(results, f"source_{name}", wall, cpu_median_ms=round(statistics.median(cpu), 4),
+                           bytes=body_bytes)
+            medians[name] = (entry["median_ms"], entry["cpu_median_ms"])
+            source.session.close()
+    finally:
+        server.shutdown()
+        (get.PLANCKE_BASE_URL, get.FIRST_ATTEMPT_JITTER, stats_source.HYPIXEL_API_BASE_URL,
+         identity.MOJANG_API_BASE_URL, tracing.TRACE_ENABLED) = saved
+
+    (p_wall, p_cpu), (h_wall, h_cpu) = medians["plancke"], medians["hypixel"]
+    print(f"  hypixel vs plancke     wall x{h_wall / p_wall:.2f}, cpu x{h_cpu / max(p_cpu, 1e-6):.2f} per refresh")
+
+
+def bench_startup(results):
+    for module in ENTRY_MODULES:
+        total, top = import_time_report(module)
+        heaviest = ", ".join(f"{name} {ms:.0f}" for name, ms in top[:4])
+        results.append({"stage": f"import_{module}", "players": None, "import_ms": round(total, 1),
+                        "top_imports_ms": {name: round(ms, 1) for name, ms in top[:10]}})
+        print(f"  {'import ' + module:<22}{'':<18} {total:>10.1f} ms  ({heaviest})")
+
+    samples = first_request_ms()
+    if samples:
+        record(results, "get_first_request", samples)
+
+
+def bench_registry(results, players, repeat):
+    import synthetic
+    from user_registry import UserRegistry
+
+    tracked, links = synthetic.registry_fixture(players)
+    registry = UserRegistry(str(tracked), str(links))
+    probe = synthetic.player_name(players // 2).upper()
+    record(results, "registry_authorize", timed(lambda: registry.is_authorized(10 ** 17, probe), repeat * 10), players)
+
+
+# -------------------
+# Output
+# -------------------
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=str(REPO_DIR),
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(current, baseline_path):
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))
+    base = {(r["stage"], r.get("players")): r for r in baseline.get("results", []) if "median_ms" in r}
+    print(f"\n[BENCH] Compared with {baseline_path} ({baseline.get('meta', {}).get('commit')})")
+    for r in current:
+        old = base.get((r["stage"], r.get("players")))
+        if not old or "median_ms" not in r or not old["median_ms"]:
+            continue
+        ratio = r["median_ms"] / old["median_ms"]
+        flag = "  <-- slower" if ratio > 1.10 else ""
+        print(f"  {r['stage']:<26} {str(r.get('players') or ''):>6}  x{ratio:.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmarks")
+    parser.add_argument("-sizes", default="10,1000,10000", help="Comma-separated player counts")
+    parser.add_argument("-history", type=int, default=20, help="History rows per player in the historical sheet")
+    parser.add_argument("-repeat", type=int, default=50, help="Iterations for cheap stages (heavy stages run fewer)")
+    parser.add_argument("-o", "--output", help="Results file (default: benchmarks/results/bench-<timestamp>.json)")
+    parser.add_argument("-compare", help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    results = []
+
+    print("[BENCH] Startup (import time, spawn -> first HTTP request)")
+    bench_startup(results)
+    print("[BENCH] Parse stages (raw_page.html)")
+    bench_parse(results, args.repeat)
+    print("[BENCH] Stats sources (fetch + parse per refresh, local server)")
+    bench_sources(results, args.repeat)
+    for players in sizes:
+        print(f"[BENCH] Store stages ({players} players, {args.history} history rows each)")
+        bench_workbook(results, players, args.history, args.repeat)
+        bench_registry(results, players, args.repeat)
+
+    payload = {
+        "meta": {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "history": args.history,
+        },
+        "results": results,
+    }
+    if args.output:
+        out = Path(args.output)
+    else:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        out = RESULTS_DIR / f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    out.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    print(f"[DATA] Results written to {out}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
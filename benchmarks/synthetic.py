@@ -0,0 +1,135 @@
+"""Synthetic fixtures for the offline benchmarks.
+
+Workbooks use the same layout and styling as player_stats.py/get.py
+produce (five period tables plus D/E snapshots, Wool/Level/Damage and
+the Capture the Wool block), with a
+historical sheet of `history` rows per player. Fixtures are cached under
+benchmarks/.fixtures so repeated runs don't pay for generation.
+"""
+import json
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from openpyxl import Workbook
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
+BENCH_DIR = Path(__file__).parent.absolute()
+FIXTURE_DIR = BENCH_DIR / ".fixtures"
+
+HISTORY_HEADERS = ["Date/Time", "Username", "Kills", "Deaths", "K/D", "Wins", "Losses", "W/L"]
+STAT_NAMES = ["Kills", "Deaths", "K/D", "Wins", "Losses", "W/L"]
+TABLES = [("Session", 1), ("Daily", 10), ("Weekly", 19), ("Monthly", 28), ("All-time", 37)]
+
+
+def player_name(i: int) -> str:
+    return f"Player{i:05d}"
+
+
+def _totals(rng):
+    kills = rng.randint(0, 60000)
+    deaths = rng.randint(1, 9000)
+    wins = rng.randint(0, 30000)
+    losses = rng.randint(1, 6000)
+    return [kills, deaths, round(kills / deaths, 2), wins, losses, round(wins / losses, 2)]
+
+
+def _fill_player_sheet(ws, rng):
+    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    header_font = Font(color="FFFFFF", bold=True)
+    table_header_fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
+    table_header_font = Font(bold=True)
+    side = Side(style="thin")
+    border = Border(left=side, right=side, top=side, bottom=side)
+    center = Alignment(horizontal="center", vertical="center")
+
+    all_time = _totals(rng)
+    for period, title_row in TABLES:
+        ws.merge_cells(f"A{title_row}:F{title_row}")
+        title = ws[f"A{title_row}"]
+        title.value = f"{period} Stats"
+        title.font = header_font
+        title.fill = header_fill
+        title.alignment = center
+        for col, name in (("A", "Stat"), ("B", "Value")):
+            cell = ws[f"{col}{title_row + 1}"]
+            cell.value = name
+            cell.font = table_header_font
+            cell.fill = table_header_fill
+            cell.border = border
+            cell.alignment = center
+
+        if period != "All-time":
+            for col, name in (("D", "Snapshot"), ("E", "Value")):
+                cell = ws[f"{col}{title_row + 1}"]
+                cell.value = name
+                cell.font = table_header_font
+                cell.fill = table_header_fill
+
+        for i, stat in enumerate(STAT_NAMES):
+            r = title_row + 2 + i
+            ws[f"A{r}"] = stat
+            if period == "All-time":
+                ws[f"B{r}"] = all_time[i]
+            else:
+                # snapshot a little behind the all-time totals
+                snap = all_time[i] if i in (2, 5) else max(0, all_time[i] - rng.randint(0, 200))
+                ws[f"B{r}"] = 0
+                ws[f"D{r}"] = stat
+                ws[f"E{r}"] = snap
+            for col in ("A", "B"):
+                ws[f"{col}{r}"].border = border
+                ws[f"{col}{r}"].alignment = center
+
+    ws["D39"] = rng.randint(0, 200000)
+    ws["D40"] = rng.randint(0, 1500)
+    ws["D41"] = all_time[0] * rng.randint(15, 30)  # Damage Dealt
+    ws["G37"] = "Capture the Wool"
+    for i, value in enumerate(_totals(rng)):
+        ws[f"G{39 + i}"] = STAT_NAMES[i]
+        ws[f"H{39 + i}"] = value // 20 if isinstance(value, int) else value
+    ws.column_dimensions["A"].width = 15
+    ws.column_dimensions["B"].width = 15
+    return all_time
+
+
+def build_workbook(players: int, history: int, seed: int = 1234) -> Workbook:
+    rng = random.Random(seed)
+    wb = Workbook()
+    hist = wb.active
+    hist.title = "Sheep Wars historical data"
+    hist.append(HISTORY_HEADERS)
+
+    start = datetime(2025, 1, 1)
+    for i in range(players):
+        name = player_name(i)
+        totals = _fill_player_sheet(wb.create_sheet(name), rng)
+        for h in range(history):
+            ts = start + timedelta(minutes=10 * h)
+            hist.append([ts.strftime("%Y-%m-%d %H:%M:%S"), name, *totals])
+    return wb
+
+
+def workbook_fixture(players: int, history: int) -> Path:
+    """Path to a cached synthetic workbook, generating it on first use."""
+    FIXTURE_DIR.mkdir(exist_ok=True)
+    path = FIXTURE_DIR / f"workbook-{players}p-{history}h.xlsx"
+    if not path.exists():
+        print(f"[BENCH] Generating {path.name}...")
+        wb = build_workbook(players, history)
+        tmp = path.with_suffix(".tmp")
+        wb.save(tmp)
+        tmp.replace(path)
+    return path
+
+
+def registry_fixture(players: int) -> tuple:
+    """Paths to synthetic tracked_users.txt / user_links.json files."""
+    FIXTURE_DIR.mkdir(exist_ok=True)
+    tracked = FIXTURE_DIR / f"tracked-{players}.txt"
+    links = FIXTURE_DIR / f"links-{players}.json"
+    if not tracked.exists() or not links.exists():
+        names = [player_name(i) for i in range(players)]
+        tracked.write_text("".join(n + "\n" for n in names), encoding="utf-8")
+        links.write_text(json.dumps({n.casefold(): str(10 ** 17 + i) for i, n in enumerate(names)}, indent=2), encoding="utf-8")
+    return tracked, links
@@ -2,16 +2,35 @@ import discord
 from discord.ext import commands
 import subprocess
 import sys
-from openpyxl import load_workbook
+import threading
 import os
 import re
 from zoneinfo import ZoneInfo
-import json
 from pathlib import Path
+from leaderboard import LIFETIME_METRICS, PERIODS, ChangeLog, LeaderboardStore
+from user_registry import UserRegistry
+from identity import IdentityCache
+from sheet_index import find_sheet_name, remove_sheet
+from sheet_layout import ROLLING_TITLES, is_player_sheet
+from prestige import get_prestige_color, get_prestige_tag
+from tracing import span
+import refresh_state
+import rolling
+import metrics
+from metrics import timed_command
+import fetch_worker
+import export
+from workbook_lock import WorkbookLock
 
 # Get the directory where bot.py is located
 BOT_DIR = Path(__file__).parent.absolute()
 
+
+def load_workbook(*args, **kwargs):
+    """openpyxl.load_workbook, imported on first use so startup doesn't pay for openpyxl."""
+    from openpyxl import load_workbook as _load_workbook
+    return _load_workbook(*args, **kwargs)
+
 # sanitize output for Discord (remove problematic unicode/control chars)
 def sanitize_output(text: str) -> str:
     if text is None:
@@ -37,19 +56,69 @@ def sanitize_output(text: str) -> str:
 # Helper function to run scripts with proper working directory
 def run_script(script_name, args):
     """Run a Python script in the bot directory with proper working directory"""
-    return subprocess.run(
-        [sys.executable, script_name, *args],
-        cwd=str(BOT_DIR),
-        capture_output=True,
-        text=True,
-        timeout=30
-    )
+    # The script records its own stage spans; this one adds interpreter startup and wait time
+    is_refresh = script_name == "get.py"
+    if is_refresh:
+        metrics.FETCHES_IN_FLIGHT.inc()
+        if PROFILE_BUDGET["remaining"] and take_profile_slot():
+            args = [*args, "-profile"]
+    start = time.perf_counter()
+    try:
+        with span("script", script=script_name, args=" ".join(args)) as script_span:
+            # Refreshes go to a fetch worker process when any is connected (see fetch_worker.py)
+            result = WORKERS.run(args, timeout=30) if is_refresh and WORKERS is not None else None
+            if result is not None:
+                script_span.tag(returncode=result.returncode, worker=True)
+                return result
+            result = subprocess.run(
+                [sys.executable, script_name, *args],
+                cwd=str(BOT_DIR),
+                capture_output=True,
+                text=True,
+                timeout=30
+            )
+            script_span.tag(returncode=result.returncode)
+            if "-profile" in args:
+                for line in (result.stdout or "").splitlines():
+                    if line.startswith("[PROFILE]"):
+                        print(line)
+            return result
+    finally:
+        if is_refresh:
+            metrics.FETCHES_IN_FLIGHT.dec()
+            metrics.REFRESH_SECONDS.observe(time.perf_counter() - start, kind=refresh_kind(args))
+
+
+# Fetch worker pool; started in on_ready when SHEEPWARS_WORKER_ADDRESS is set
+WORKERS = None
+
+
+# /profile: number of upcoming get.py runs to start with -profile
+PROFILE_BUDGET = {"remaining": 0}
+_profile_lock = threading.Lock()
+
+
+def take_profile_slot() -> bool:
+    with _profile_lock:
+        if PROFILE_BUDGET["remaining"] <= 0:
+            return False
+        PROFILE_BUDGET["remaining"] -= 1
+        return True
+
+
+def refresh_kind(args) -> str:
+    """Label for a get.py run: the snapshot it takes, or plain refresh."""
+    for flag in ("-session", "-daily", "-weekly", "-monthly"):
+        if flag in args:
+            return flag[1:]
+    return "refresh"
 
 # additional imports for background tasks
 import asyncio
 import datetime
 import random
 import time
+import tempfile
 
 # tracked users file and creator identifier
 TRACKED_FILE = os.path.join(os.path.dirname(__file__), "tracked_users.txt")
@@ -60,206 +129,43 @@ CREATOR_NAME = "chuckegg"  # case-insensitive match fallback
 CREATOR_ID = "542467909549555734"
 CREATOR_TZ = ZoneInfo("America/New_York")
 
-# Prestige icons per 100 levels (index 0 = levels 0-99)
-PRESTIGE_ICONS = [
-    "❤", "✙", "✫", "✈", "✠", "♙", "⚡", "☢", "✏", "☯",
-    "☃️", "۞", "✤", "♫", "♚", "❉", "Σ", "￡", "✖", "❁",
-    "✚", "✯", "✆", "❥", "☾⋆⁺", "⚜", "✦", "⚝", "✉", "ツ",
-    "❣", "✮", "✿", "✲", "❂", "ƒ", "$", "⋚⋚", "Φ", "✌",
-]
-
-# Prestige colors (RGB tuples for Discord embed colors)
-# Levels: 0, 100, 200, 300, 400, 500, 600, 700, 800, 900, 1000+
-PRESTIGE_COLORS = {
-    0: (119, 119, 119),      # GRAY (§7)
-    100: (255, 255, 255),    # WHITE (§f)
-    200: (255, 85, 85),      # RED (§c)
-    300: (255, 170, 0),      # GOLD (§6)
-    400: (255, 255, 85),     # YELLOW (§e)
-    500: (85, 255, 85),      # LIGHT_GREEN (§a)
-    600: (0, 170, 170),      # DARK_AQUA (§3)
-    700: (170, 0, 170),      # DARK_PURPLE (§5)
-    800: (255, 85, 255),     # LIGHT_PURPLE (§d)
-    900: None,               # Rainbow (special handling)
-    1000: (255, 255, 255),   # WHITE (§f)
-    1100: (255, 255, 255),   # WHITE brackets and numbers
-    1200: (255, 85, 85),     # RED brackets and numbers
-    1300: (255, 170, 0),     # GOLD/ORANGE brackets and numbers
-    1400: (255, 255, 85),    # YELLOW brackets and numbers
-    1500: (85, 255, 85),     # GREEN brackets and numbers
-    1600: (85, 255, 255),    # CYAN brackets and numbers
-    1700: (255, 85, 255),    # MAGENTA brackets and numbers
-    1800: (255, 85, 255),    # PINK/MAGENTA brackets and numbers
-    1900: None,              # Rainbow (special handling)
-    2000: (170, 170, 170),   # GRAY/TAN brackets and numbers
-    2100: (255, 255, 255),   # WHITE brackets with gray numbers
-    2200: (255, 85, 85),     # RED brackets with yellow numbers
-    2300: None,              # Rainbow brackets
-    2400: (170, 0, 170),     # PURPLE brackets with green numbers
-    2500: (255, 255, 255),   # WHITE brackets with green numbers
-    2600: (255, 255, 255),   # WHITE brackets with cyan numbers
-    2700: (255, 255, 255),   # WHITE brackets with magenta numbers
-    2800: (255, 85, 85),     # RED brackets with dark red numbers
-    2900: None,              # Rainbow brackets
-    3000: (255, 255, 255),   # WHITE brackets with gray numbers
-    3100: (255, 255, 255),   # WHITE brackets and numbers
-    3200: (255, 85, 85),     # RED brackets and numbers
-    3300: None,              # Rainbow brackets (orange/red/yellow)
-    3400: None,              # Rainbow brackets (yellow/orange)
-    3500: (85, 255, 85),     # GREEN brackets and numbers
-    3600: (85, 255, 255),    # CYAN/BLUE brackets and numbers
-    3700: (255, 255, 255),   # WHITE/YELLOW brackets with magenta numbers
-    3800: None,              # Rainbow brackets (purple/red)
-    3900: None,              # Rainbow brackets (full spectrum)
-    4000: (255, 255, 255),   # WHITE brackets with black numbers
-}
-
-
-def get_prestige_icon(level: int) -> str:
-    try:
-        lvl = int(level)
-    except Exception:
-        lvl = 0
-    idx = max(0, lvl // 100)
-    if idx >= len(PRESTIGE_ICONS):
-        idx = len(PRESTIGE_ICONS) - 1
-    return PRESTIGE_ICONS[idx]
-
-def get_prestige_color(level: int) -> tuple:
-    """Get RGB color tuple for a given prestige level.
-    Supports levels 0-1000. Returns default dark gray for levels outside this range.
-    """
-    try:
-        lvl = int(level)
-    except Exception:
-        lvl = 0
-    
-    # Find the closest prestige level color
-    for prestige_level in sorted(PRESTIGE_COLORS.keys(), reverse=True):
-        if lvl >= prestige_level:
-            color = PRESTIGE_COLORS[prestige_level]
-            # Handle Rainbow (None) by returning a default color or cycling
-            if color is None:
-                # For now, return a vibrant color for rainbow
-                return (255, 100, 200)
-            return color
-    
-    # Fallback to gray if below 0
-    return (119, 119, 119)
-
-def get_ansi_color_code(level: int) -> str:
-    """Get ANSI color code for a given prestige level."""
-    color = get_prestige_color(level)
-    
-    # Map RGB to closest basic ANSI color for Discord compatibility
-    r, g, b = color
-    
-    # Determine which basic ANSI color is closest
-    if r > 200 and g > 200 and b > 200:
-        return "\u001b[0;37m"  # White
-    elif r < 100 and g < 100 and b < 100:
-        return "\u001b[0;30m"  # Gray
-    elif r > 200 and g < 100 and b < 100:
-        return "\u001b[0;31m"  # Red
-    elif r > 200 and g > 150 and b < 100:
-        return "\u001b[0;33m"  # Yellow/Gold
-    elif r < 100 and g > 200 and b < 100:
-        return "\u001b[0;32m"  # Green
-    elif r < 100 and g > 150 and b > 150:
-        return "\u001b[0;36m"  # Cyan
-    elif r > 150 and g < 100 and b > 150:
-        return "\u001b[0;35m"  # Magenta/Pink
-    elif r > 200 and g > 200 and b < 100:
-        return "\u001b[0;33m"  # Yellow
-    else:
-        return "\u001b[0;37m"  # Default White
-
-def make_bold_ansi(code: str) -> str:
-    """Convert a basic ANSI color code to bold variant.
-    Expects codes like "\u001b[0;33m" and returns "\u001b[1;33m".
-    """
-    return code.replace("[0;", "[1;")
+# Tracked users and Discord links are served from memory; see user_registry.py
+REGISTRY = UserRegistry(TRACKED_FILE, USER_LINKS_FILE)
 
 def load_tracked_users():
-    if not os.path.exists(TRACKED_FILE):
-        return []
-    with open(TRACKED_FILE, "r", encoding="utf-8") as f:
-        lines = [l.strip() for l in f.readlines() if l.strip()]
-    return lines
+    return REGISTRY.tracked_users()
 
 def add_tracked_user(ign: str) -> bool:
-    users = load_tracked_users()
-    key = ign.casefold()
-    for u in users:
-        if u.casefold() == key:
-            return False
-    # append
-    with open(TRACKED_FILE, "a", encoding="utf-8") as f:
-        f.write(ign + "\n")
-    return True
+    return REGISTRY.add_tracked(ign)
 
 def load_user_links():
-    """Load username -> Discord user ID mappings from JSON file"""
-    if not os.path.exists(USER_LINKS_FILE):
-        return {}
-    try:
-        with open(USER_LINKS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return {}
-
-def save_user_links(links: dict):
-    """Save username -> Discord user ID mappings to JSON file"""
-    with open(USER_LINKS_FILE, "w", encoding="utf-8") as f:
-        json.dump(links, f, indent=2)
+    """Return username -> Discord user ID mappings"""
+    return REGISTRY.links()
 
 def link_user_to_ign(discord_user_id: int, ign: str):
     """Link a Discord user ID to a Minecraft username (case-insensitive)"""
-    links = load_user_links()
-    # Store with original case but search case-insensitively
-    links[ign.casefold()] = str(discord_user_id)
-    save_user_links(links)
+    REGISTRY.link(discord_user_id, ign)
 
 def is_user_authorized(discord_user_id: int, ign: str) -> bool:
     """Check if a Discord user is authorized to manage a username"""
-    links = load_user_links()
-    key = ign.casefold()
-    return links.get(key) == str(discord_user_id)
+    return REGISTRY.is_authorized(discord_user_id, ign)
 
 def remove_tracked_user(ign: str) -> bool:
     """Remove a username from tracked users list"""
-    users = load_tracked_users()
-    key = ign.casefold()
-    found = False
-    new_users = []
-    for u in users:
-        if u.casefold() == key:
-            found = True
-        else:
-            new_users.append(u)
-    
-    if found:
-        with open(TRACKED_FILE, "w", encoding="utf-8") as f:
-            for u in new_users:
-                f.write(u + "\n")
-    return found
+    return REGISTRY.remove_tracked(ign)
 
 def unlink_user_from_ign(ign: str) -> bool:
     """Remove username -> Discord user ID link"""
-    links = load_user_links()
-    key = ign.casefold()
-    if key in links:
-        del links[key]
-        save_user_links(links)
-        return True
-    return False
+    return REGISTRY.unlink(ign)
 
 async def run_get_for_users(flag: str):
     users = load_tracked_users()
     if not users:
         return users
     fetched = []
+    metrics.QUEUE_DEPTH.inc(len(users))
     for u in users:
+        metrics.QUEUE_DEPTH.dec()
         try:
             # run synchronously in thread to avoid blocking loop
             def call_combined():
@@ -276,7 +182,9 @@ async def run_get_for_users_multi(flags: list[str]):
     if not users:
         return users
     fetched = []
+    metrics.QUEUE_DEPTH.inc(len(users))
     for u in users:
+        metrics.QUEUE_DEPTH.dec()
         try:
             def call_multi():
                 # Single call per user: all flags + refresh
@@ -294,7 +202,9 @@ async def run_refresh_for_users():
     if not users:
         return users
     fetched = []
+    metrics.QUEUE_DEPTH.inc(len(users))
     for u in users:
+        metrics.QUEUE_DEPTH.dec()
         try:
             def call_refresh():
                 return run_script("get.py", ["-refresh", "-ign", u])
@@ -307,8 +217,12 @@ async def run_refresh_for_users():
 
 async def _delayed_refresh_user(username: str, delay: float):
     """Sleep for `delay` seconds then run get.py -refresh for the given username."""
+    metrics.QUEUE_DEPTH.inc()
     try:
-        await asyncio.sleep(delay)
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            metrics.QUEUE_DEPTH.dec()
         await asyncio.to_thread(run_script, "get.py", ["-refresh", "-ign", username])
     except asyncio.CancelledError:
         return
@@ -351,6 +265,48 @@ async def staggered_stats_refresher(interval_minutes: int = 10):
             print(f"[REFRESH] Staggered refresher error: {e}")
             await asyncio.sleep(interval)
 
+# -------------------
+# Name changes
+# -------------------
+# IGN -> UUID cache shared with get.py (identities.json, loaded on first use)
+IDENTITIES = IdentityCache()
+IDENTITY_REFRESH_MINUTES = 30
+IDENTITY_REFRESH_BATCH = 10  # stale names re-checked per pass
+
+
+def sync_identities(limit: int = IDENTITY_REFRESH_BATCH) -> list:
+    """Resolve new tracked users, re-check the stalest names and move renamed
+    players' tracking and links to their new name. Blocking; run in a thread.
+
+    Returns [(old, new), ...] for the players moved.
+    """
+    users = load_tracked_users()
+    IDENTITIES.resolve_many(users)
+    for uuid in IDENTITIES.stale(users, limit):
+        try:
+            IDENTITIES.refresh_name(uuid)
+        except Exception as e:
+            print(f"[IDENTITY] Could not re-check {uuid}: {e}")
+    # Also picks up renames get.py noticed (Hypixel API displayname)
+    renames = []
+    for ign in users:
+        new = IDENTITIES.current_name(ign)
+        if new.casefold() != ign.casefold() and REGISTRY.rename(ign, new):
+            renames.append((ign, new))
+    IDENTITIES.save()
+    return renames
+
+
+async def identity_refresher(interval_minutes: int = IDENTITY_REFRESH_MINUTES):
+    """Background task keeping tracked names current; sheets follow on the player's next get.py run."""
+    while True:
+        try:
+            for old, new in await asyncio.to_thread(sync_identities):
+                print(f"[IDENTITY] {old} is now {new}; tracking and Discord link moved")
+        except Exception as e:
+            print(f"[IDENTITY] Name refresher error: {e}")
+        await asyncio.sleep(interval_minutes * 60)
+
 async def send_fetch_message(message: str):
     # DM the creator (prefer explicit ID if set)
     user = None
@@ -406,7 +362,11 @@ async def scheduler_loop():
         # run daily at 9:30
         if now.hour == 9 and now.minute == 30:
             today = now.date()
+            # seconds past 9:30:00 when each job actually starts
+            def lag():
+                return (datetime.datetime.now(tz=CREATOR_TZ) - now.replace(second=0, microsecond=0)).total_seconds()
             if last_daily != today:
+                metrics.SCHEDULER_LAG.set(round(lag(), 3), job="daily")
                 fetched = await run_get_for_users("-daily")
                 if fetched:
                     await send_fetch_message(f"Fetched -daily for usernames {', '.join(fetched)}.")
@@ -415,6 +375,7 @@ async def scheduler_loop():
             if now.weekday() == 0:
                 iso_week = now.isocalendar()[1]
                 if last_weekly != iso_week:
+                    metrics.SCHEDULER_LAG.set(round(lag(), 3), job="weekly")
                     fetched = await run_get_for_users("-weekly")
                     if fetched:
                         await send_fetch_message(f"Fetched -weekly for usernames {', '.join(fetched)}.")
@@ -423,6 +384,7 @@ async def scheduler_loop():
             if now.day == 1:
                 month = (now.year, now.month)
                 if last_monthly != month:
+                    metrics.SCHEDULER_LAG.set(round(lag(), 3), job="monthly")
                     fetched = await run_get_for_users("-monthly")
                     if fetched:
                         await send_fetch_message(f"Fetched -monthly for usernames {', '.join(fetched)}.")
@@ -430,24 +392,35 @@ async def scheduler_loop():
 
         await asyncio.sleep(20)
 
+def period_title(period: str) -> str:
+    """"Daily", "Last 24h", ... for a tab / leaderboard period name."""
+    return ROLLING_TITLES.get(period, period.title())
+
 # Helper class for stats tab view
+def stat_text(value, ratio: bool = False) -> str:
+    """Stored stat for an embed field: counts as integers, missing values as 0."""
+    if value is None:
+        return "0"
+    return str(value) if ratio else str(int(value))
+
+
 class StatsTabView(discord.ui.View):
-    def __init__(self, sheet, ign, level_value: int, prestige_icon: str):
+    def __init__(self, entry, as_of=None, status: str = None, current_tab: str = "all-time"):
+        """`entry` is the player's leaderboard.LeaderboardEntry; `as_of` (epoch seconds)
+        and `status` ("Refreshing...", ...) go in the footer of every tab."""
         super().__init__()
-        self.sheet = sheet
-        self.ign = ign
-        self.level_value = level_value
-        self.prestige_icon = prestige_icon
-        self.current_tab = "all-time"
+        self.entry = entry
+        self.ign = entry.player
+        self.level_value = entry.level
+        self.as_of = as_of
+        self.status = status
+        self.current_tab = current_tab
         
-        # Row mappings: (kills_row, deaths_row, kd_row, wins_row, losses_row, wl_row)
-        self.tabs = {
-            "all-time": (39, 40, 41, 42, 43, 44),
-            "session": (3, 4, 5, 6, 7, 8),
-            "daily": (12, 13, 14, 15, 16, 17),
-            "weekly": (21, 22, 23, 24, 25, 26),
-            "monthly": (30, 31, 32, 33, 34, 35),
-        }
+        # Tab name -> (kills, deaths, kd, wins, losses, wl); all-time plus every snapshot
+        # period and rolling window (see rolling.py)
+        self.tabs = dict(zip(PERIODS.values(), entry.values))
+        # Render every tab once up front; button clicks become a dict lookup
+        self.embeds = self.render_all_embeds()
         self.update_buttons()
     
     def update_buttons(self):
@@ -459,209 +432,234 @@ class StatsTabView(discord.ui.View):
                 else:
                     child.style = discord.ButtonStyle.secondary
     
-    def get_stats_embed(self, tab_name):
-        rows = self.tabs[tab_name]
-        kills = self.sheet[f"B{rows[0]}"].value or 0
-        deaths = self.sheet[f"B{rows[1]}"].value or 0
-        kd_ratio = self.sheet[f"B{rows[2]}"].value or 0
-        wins = self.sheet[f"B{rows[3]}"].value or 0
-        losses = self.sheet[f"B{rows[4]}"].value or 0
-        wl_ratio = self.sheet[f"B{rows[5]}"].value or 0
-        
-        # Get prestige color based on level
+    def render_all_embeds(self):
+        """Build the embed for every tab from the stored stats."""
+        # Prestige styling only depends on the level, so compute it once per view
         prestige_color = get_prestige_color(self.level_value)
-        ansi_code = get_ansi_color_code(self.level_value)
-        bold_code = make_bold_ansi(ansi_code)
-        reset_code = "\u001b[0;0m"
-        
-        embed = discord.Embed(
-            title="",
-            color=discord.Color.from_rgb(*prestige_color)
-        )
-        
-        # Add colored level display with full title as a full-width field
-        # Both level and icon inside brackets are bold and colored
-        colored_title = f"[{bold_code}{self.level_value}{self.prestige_icon}{reset_code}] {self.ign} - {tab_name.title()} Stats"
-        embed.add_field(name="", value=f"```ansi\n{colored_title}```", inline=False)
-        
-        # Add 6 inline fields: label as field name, data in compact code block
-        embed.add_field(name="Wins", value=f"```{str(wins)}```", inline=True)
-        embed.add_field(name="Losses", value=f"```{str(losses)}```", inline=True)
-        embed.add_field(name="W/L Ratio", value=f"```{str(wl_ratio)}```", inline=True)
-
-        embed.add_field(name="Kills", value=f"```{str(kills)}```", inline=True)
-        embed.add_field(name="Deaths", value=f"```{str(deaths)}```", inline=True)
-        embed.add_field(name="K/D Ratio", value=f"```{str(kd_ratio)}```", inline=True)
-        
-        return embed
+        prestige_tag = get_prestige_tag(self.level_value)
+        damage, *ctw = self.entry.extras or (None,) * 7
+        ctw = dict(zip(("Kills", "Deaths", "K/D", "Wins", "Losses", "W/L"), ctw))
+        if self.as_of is not None:
+            as_of = datetime.datetime.fromtimestamp(self.as_of, tz=datetime.timezone.utc)
+            footer = f"{self.status} - stats as of" if self.status else "Stats as of"
+        else:
+            as_of = None
+            footer = self.status or "Stats not refreshed yet"
+
+        embeds = {}
+        for tab_name, values in self.tabs.items():
+            kills, deaths, wins, losses = (stat_text(values[i]) for i in (0, 1, 3, 4))
+            kd_ratio, wl_ratio = (stat_text(values[i], ratio=True) for i in (2, 5))
+
+            embed = discord.Embed(
+                title="",
+                color=discord.Color.from_rgb(*prestige_color)
+            )
+            
+            # Add colored level display with full title as a full-width field
+            # "[level icon]" in the prestige colour(s), see prestige.py
+            colored_title = f"{prestige_tag} {self.ign} - {period_title(tab_name)} Stats"
+            embed.add_field(name="", value=f"```ansi\n{colored_title}```", inline=False)
+            
+            # Add 6 inline fields: label as field name, data in compact code block
+            embed.add_field(name="Wins", value=f"```{str(wins)}```", inline=True)
+            embed.add_field(name="Losses", value=f"```{str(losses)}```", inline=True)
+            embed.add_field(name="W/L Ratio", value=f"```{str(wl_ratio)}```", inline=True)
+
+            embed.add_field(name="Kills", value=f"```{str(kills)}```", inline=True)
+            embed.add_field(name="Deaths", value=f"```{str(deaths)}```", inline=True)
+            embed.add_field(name="K/D Ratio", value=f"```{str(kd_ratio)}```", inline=True)
+
+            # Lifetime Damage Dealt and Capture the Wool (stored by get.py from the same page)
+            if tab_name == "all-time" and any(v is not None for v in (damage, *ctw.values())):
+                embed.add_field(name="Damage Dealt", value=f"```{stat_text(damage)}```", inline=True)
+                embed.add_field(name="CTW Wins / Losses", value=f"```{stat_text(ctw['Wins'])} / {stat_text(ctw['Losses'])} ({stat_text(ctw['W/L'], ratio=True)})```", inline=True)
+                embed.add_field(name="CTW Kills / Deaths", value=f"```{stat_text(ctw['Kills'])} / {stat_text(ctw['Deaths'])} ({stat_text(ctw['K/D'], ratio=True)})```", inline=True)
+
+            # Discord shows the timestamp in each viewer's own time zone
+            embed.set_footer(text=footer)
+            embed.timestamp = as_of
+            embeds[tab_name] = embed
+        return embeds
+    
+    def get_stats_embed(self, tab_name):
+        metrics.cache_lookup("stats_tab", tab_name in self.embeds)
+        return self.embeds[tab_name]
+    
+    async def show_tab(self, interaction: discord.Interaction, tab_name: str):
+        self.current_tab = tab_name
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.get_stats_embed(tab_name), view=self)
     
     @discord.ui.button(label="All-time", custom_id="all-time", style=discord.ButtonStyle.primary)
     async def all_time_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.current_tab = "all-time"
-        self.update_buttons()
-        embed = self.get_stats_embed(self.current_tab)
-        await interaction.response.edit_message(embed=embed, view=self)
+        await self.show_tab(interaction, "all-time")
     
     @discord.ui.button(label="Session", custom_id="session", style=discord.ButtonStyle.secondary)
     async def session_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.current_tab = "session"
-        self.update_buttons()
-        embed = self.get_stats_embed(self.current_tab)
-        await interaction.response.edit_message(embed=embed, view=self)
+        await self.show_tab(interaction, "session")
     
     @discord.ui.button(label="Daily", custom_id="daily", style=discord.ButtonStyle.secondary)
     async def daily_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.current_tab = "daily"
-        self.update_buttons()
-        embed = self.get_stats_embed(self.current_tab)
-        await interaction.response.edit_message(embed=embed, view=self)
+        await self.show_tab(interaction, "daily")
     
     @discord.ui.button(label="Weekly", custom_id="weekly", style=discord.ButtonStyle.secondary)
     async def weekly_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.current_tab = "weekly"
-        self.update_buttons()
-        embed = self.get_stats_embed(self.current_tab)
-        await interaction.response.edit_message(embed=embed, view=self)
+        await self.show_tab(interaction, "weekly")
     
     @discord.ui.button(label="Monthly", custom_id="monthly", style=discord.ButtonStyle.secondary)
     async def monthly_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.current_tab = "monthly"
-        self.update_buttons()
-        embed = self.get_stats_embed(self.current_tab)
-        await interaction.response.edit_message(embed=embed, view=self)
+        await self.show_tab(interaction, "monthly")
+    
+    @discord.ui.button(label="Last 24h", custom_id="24h", style=discord.ButtonStyle.secondary, row=1)
+    async def last_24h_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_tab(interaction, "24h")
+    
+    @discord.ui.button(label="Last 7d", custom_id="7d", style=discord.ButtonStyle.secondary, row=1)
+    async def last_7d_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_tab(interaction, "7d")
+    
+    @discord.ui.button(label="Last 30d", custom_id="30d", style=discord.ButtonStyle.secondary, row=1)
+    async def last_30d_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_tab(interaction, "30d")
+
+
+METRIC_LABELS = {
+    "kills": "Kills",
+    "deaths": "Deaths",
+    "kdr": "K/D Ratio",
+    "wins": "Wins",
+    "losses": "Losses",
+    "wlr": "W/L Ratio",
+    "damage": "Damage Dealt",
+    "ctw_kills": "CTW Kills",
+    "ctw_deaths": "CTW Deaths",
+    "ctw_kdr": "CTW K/D Ratio",
+    "ctw_wins": "CTW Wins",
+    "ctw_losses": "CTW Losses",
+    "ctw_wlr": "CTW W/L Ratio",
+}
+LEADERBOARD_PAGE_SIZE = 10
 
+# Snapshot + sorted rankings, shared by /leaderboard and /rank (see leaderboard.py)
+LEADERBOARDS = LeaderboardStore(BOT_DIR / "sheep_wars_stats.xlsx")
 
-# Leaderboard view for switching between periods
+# Leaderboard view for switching between periods and pages
 class LeaderboardView(discord.ui.View):
-    def __init__(self, metric: str, wb):
+    def __init__(self, metric: str, boards):
         super().__init__()
-        self.metric = metric  # "kills", "deaths", "kdr", "wins", "losses", "wlr"
-        self.wb = wb
+        self.metric = metric  # a leaderboard.METRICS or LIFETIME_METRICS key
+        # leaderboard.Leaderboards: compact snapshot + rankings; the workbook is not retained
+        self.boards = boards
         self.current_period = "lifetime"
-        
-        # Row mappings for column B: (kills, deaths, kdr, wins, losses, wlr)
-        self.periods = {
-            "lifetime": (39, 40, 41, 42, 43, 44),
-            "session": (3, 4, 5, 6, 7, 8),
-            "daily": (12, 13, 14, 15, 16, 17),
-            "weekly": (21, 22, 23, 24, 25, 26),
-            "monthly": (30, 31, 32, 33, 34, 35),
-        }
-        # Map metric names to index in rows tuple
-        self.metric_indices = {
-            "kills": 0,
-            "deaths": 1,
-            "kdr": 2,
-            "wins": 3,
-            "losses": 4,
-            "wlr": 5,
-        }
-        self.metric_labels = {
-            "kills": "Kills",
-            "deaths": "Deaths",
-            "kdr": "K/D Ratio",
-            "wins": "Wins",
-            "losses": "Losses",
-            "wlr": "W/L Ratio",
-        }
+        self.page = 0
+        self.metric_labels = METRIC_LABELS
+        # Embeds are memoized per (period, page); the snapshot does not change for the life of the view
+        self.embed_cache = {}
         self.update_buttons()
     
+    def pages(self) -> int:
+        return self.boards.index(self.current_period, self.metric).pages(LEADERBOARD_PAGE_SIZE)
+    
     def update_buttons(self):
+        lifetime_only = self.metric in LIFETIME_METRICS
         for child in self.children:
             if isinstance(child, discord.ui.Button):
-                if child.custom_id == self.current_period:
-                    child.style = discord.ButtonStyle.primary
+                if child.custom_id == "prev":
+                    child.disabled = self.page == 0
+                elif child.custom_id == "next":
+                    child.disabled = self.page >= self.pages() - 1
                 else:
-                    child.style = discord.ButtonStyle.secondary
+                    if child.custom_id == self.current_period:
+                        child.style = discord.ButtonStyle.primary
+                    else:
+                        child.style = discord.ButtonStyle.secondary
+                    # Damage Dealt / Capture the Wool have no period snapshots
+                    child.disabled = lifetime_only and child.custom_id != "lifetime"
     
-    def get_leaderboard_embed(self, period: str):
-        rows = self.periods[period]
-        metric_idx = self.metric_indices[self.metric]
-        target_row = rows[metric_idx]
+    def get_leaderboard_embed(self, period: str, page: int = 0):
+        embed = self.embed_cache.get((period, page))
+        metrics.cache_lookup("leaderboard", embed is not None)
+        if embed is None:
+            embed = self.render_leaderboard_embed(period, page)
+            self.embed_cache[(period, page)] = embed
+        return embed
+    
+    def render_leaderboard_embed(self, period: str, page: int = 0):
         metric_label = self.metric_labels[self.metric]
         
-        # Collect all player stats with level info
-        leaderboard = []
-        for sheet_name in self.wb.sheetnames:
-            if sheet_name.casefold() == "sheep wars historical data":
-                continue
-            try:
-                sheet = self.wb[sheet_name]
-                value = sheet[f"B{target_row}"].value
-                if value is not None and isinstance(value, (int, float)):
-                    # Get level for prestige display
-                    try:
-                        level_value = int(sheet["D40"].value or 0)
-                    except Exception:
-                        level_value = 0
-                    prestige_icon = get_prestige_icon(level_value)
-                    leaderboard.append((sheet_name, float(value), level_value, prestige_icon))
-            except Exception:
-                continue
-        
-        # Sort by value descending
-        leaderboard.sort(key=lambda x: x[1], reverse=True)
+        # Players with a numeric value for this metric, sorted by value descending
+        index = self.boards.index(period, self.metric)
         
         # Build embed
         embed = discord.Embed(
-            title=f"{period.title()} {metric_label} Leaderboard",
+            title=f"{period_title(period)} {metric_label} Leaderboard",
             color=discord.Color.from_rgb(54, 57, 63)
         )
         
-        if not leaderboard:
+        if not len(index):
             embed.description = "No data available"
         else:
-            # Top 10 with colored prestige prefix
+            # One page with colored prestige prefix; tied players share a rank
             description_lines = []
-            ansi_code = get_ansi_color_code
-            reset_code = "\u001b[0;0m"
-            
-            for i, (player, value, level, icon) in enumerate(leaderboard[:10], 1):
-                medal = {1: "1.", 2: "2.", 3: "3."}.get(i, f"{i}.")
-                color_code = ansi_code(level)
-                bold_code = make_bold_ansi(color_code)
-                # Both level and icon inside brackets are bold and colored
-                prestige_display = f"{bold_code}[{level}{icon}]{reset_code}"
-                description_lines.append(f"{medal} {prestige_display} {player}: `{value}`")
+            for rank, player, value, level in index.page(page, LEADERBOARD_PAGE_SIZE):
+                description_lines.append(f"{rank}. {get_prestige_tag(level)} {player}: `{value}`")
             
             embed.description = f"```ansi\n" + "\n".join(description_lines) + "\n```"
+            embed.set_footer(text=f"Page {page + 1}/{index.pages(LEADERBOARD_PAGE_SIZE)} - {len(index)} players")
         
         return embed
     
+    async def show_period(self, interaction: discord.Interaction, period: str):
+        self.current_period = period
+        self.page = 0
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.get_leaderboard_embed(period), view=self)
+    
+    async def show_page(self, interaction: discord.Interaction, page: int):
+        self.page = max(0, min(page, self.pages() - 1))
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.get_leaderboard_embed(self.current_period, self.page), view=self)
+    
     @discord.ui.button(label="Lifetime", custom_id="lifetime", style=discord.ButtonStyle.primary)
     async def lifetime_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.current_period = "lifetime"
-        self.update_buttons()
-        embed = self.get_leaderboard_embed(self.current_period)
-        await interaction.response.edit_message(embed=embed, view=self)
+        await self.show_period(interaction, "lifetime")
     
     @discord.ui.button(label="Session", custom_id="session", style=discord.ButtonStyle.secondary)
     async def session_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.current_period = "session"
-        self.update_buttons()
-        embed = self.get_leaderboard_embed(self.current_period)
-        await interaction.response.edit_message(embed=embed, view=self)
+        await self.show_period(interaction, "session")
     
     @discord.ui.button(label="Daily", custom_id="daily", style=discord.ButtonStyle.secondary)
     async def daily_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.current_period = "daily"
-        self.update_buttons()
-        embed = self.get_leaderboard_embed(self.current_period)
-        await interaction.response.edit_message(embed=embed, view=self)
+        await self.show_period(interaction, "daily")
     
     @discord.ui.button(label="Weekly", custom_id="weekly", style=discord.ButtonStyle.secondary)
     async def weekly_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.current_period = "weekly"
-        self.update_buttons()
-        embed = self.get_leaderboard_embed(self.current_period)
-        await interaction.response.edit_message(embed=embed, view=self)
+        await self.show_period(interaction, "weekly")
     
     @discord.ui.button(label="Monthly", custom_id="monthly", style=discord.ButtonStyle.secondary)
     async def monthly_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.current_period = "monthly"
-        self.update_buttons()
-        embed = self.get_leaderboard_embed(self.current_period)
-        await interaction.response.edit_message(embed=embed, view=self)
+        await self.show_period(interaction, "monthly")
+    
+    @discord.ui.button(label="Last 24h", custom_id="24h", style=discord.ButtonStyle.secondary, row=1)
+    async def last_24h_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_period(interaction, "24h")
+    
+    @discord.ui.button(label="Last 7d", custom_id="7d", style=discord.ButtonStyle.secondary, row=1)
+    async def last_7d_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_period(interaction, "7d")
+    
+    @discord.ui.button(label="Last 30d", custom_id="30d", style=discord.ButtonStyle.secondary, row=1)
+    async def last_30d_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_period(interaction, "30d")
+    
+    @discord.ui.button(label="Previous", custom_id="prev", style=discord.ButtonStyle.secondary, row=2)
+    async def prev_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, self.page - 1)
+    
+    @discord.ui.button(label="Next", custom_id="next", style=discord.ButtonStyle.secondary, row=2)
+    async def next_button(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, self.page + 1)
 
 
 # Create bot with command tree for slash commands
@@ -691,16 +689,20 @@ class ApprovalView(discord.ui.View):
         await interaction.response.edit_message(content=f"You denied verification for {self.ign}.", view=None)
 
 # Bot token
-# Read from BOT_TOKEN.txt in the same directory
+# Read from BOT_TOKEN.txt in the same directory when the bot is started, so the
+# module can be imported (benchmarks, tooling) without a token present
 TOKEN_FILE = os.path.join(os.path.dirname(__file__), "BOT_TOKEN.txt")
-try:
-    with open(TOKEN_FILE, "r", encoding="utf-8") as f:
-        DISCORD_TOKEN = f.read().strip()
-except Exception as e:
-    DISCORD_TOKEN = None
-    print(f"[ERROR] Failed to read BOT_TOKEN.txt: {e}")
-if not DISCORD_TOKEN:
-    raise ValueError("BOT_TOKEN.txt is missing or empty")
+
+def load_token() -> str:
+    try:
+        with open(TOKEN_FILE, "r", encoding="utf-8") as f:
+            token = f.read().strip()
+    except Exception as e:
+        token = None
+        print(f"[ERROR] Failed to read BOT_TOKEN.txt: {e}")
+    if not token:
+        raise ValueError("BOT_TOKEN.txt is missing or empty")
+    return token
 
 @bot.event
 async def on_ready():
@@ -718,9 +720,29 @@ async def on_ready():
     if not getattr(bot, "stats_refresher_started", False):
         bot.loop.create_task(staggered_stats_refresher())
         bot.stats_refresher_started = True
+    # optional out-of-process fetch workers
+    global WORKERS
+    if WORKERS is None and fetch_worker.WORKER_ADDRESS:
+        try:
+            WORKERS = fetch_worker.start_pool()
+        except Exception as e:
+            print(f"[ERROR] Failed to start fetch worker pool: {e}")
+    # keep tracked names in step with Minecraft name changes
+    if not getattr(bot, "identity_refresher_started", False):
+        bot.loop.create_task(identity_refresher())
+        bot.identity_refresher_started = True
+    # local Prometheus endpoint and event loop lag probe
+    if not getattr(bot, "metrics_started", False):
+        bot.metrics_started = True
+        bot.loop.create_task(metrics.monitor_event_loop_lag())
+        try:
+            bot.metrics_runner = await metrics.start_metrics_server()
+        except Exception as e:
+            print(f"[ERROR] Failed to start metrics server: {e}")
 
 @bot.tree.command(name="verify", description="Create a player stats sheet")
 @discord.app_commands.describe(ign="Minecraft IGN")
+@timed_command("verify")
 async def verify(interaction: discord.Interaction, ign: str):
     if not interaction.response.is_done():
         try:
@@ -759,54 +781,25 @@ async def verify(interaction: discord.Interaction, ign: str):
         
         # Process based on approval
         if view.approved:
-            result = run_script("player_stats.py", ["-ign", ign])
+            # Sheet, all-time stats and all four snapshots from one fetch and one workbook save
+            try:
+                result = await asyncio.to_thread(run_script, "get.py", ["-onboard", "-ign", ign])
+                failure = None if result.returncode == 0 else (result.stderr or result.stdout)
+            except subprocess.TimeoutExpired:
+                failure = "timed out (30s limit)"
+            if failure is None:
+                print(f"[OK] Onboarded {ign}: sheet created and all snapshots initialized")
+            else:
+                # Fetch failed (plancke down, slow, ...): fall back to an empty sheet the scheduled
+                # snapshots fill in. -keep: a timed-out fetch worker may still have saved the full sheet
+                print(f"[WARNING] Onboarding fetch failed for {ign}, creating an empty sheet: {failure}")
+                result = await asyncio.to_thread(run_script, "player_stats.py", ["-ign", ign, "-keep"])
 
             if result.returncode == 0:
-                print(f"[OK] player_stats.py succeeded for {ign}")
-                
-                # Verify the sheet was actually created
-                from pathlib import Path
-                excel_file = BOT_DIR / "sheep_wars_stats.xlsx"
-                if not excel_file.exists():
-                    await interaction.followup.send(f"[ERROR] Excel file was not created after verification of {ign}.")
-                    return
-                
-                # Load and check if the sheet exists
-                try:
-                    from openpyxl import load_workbook
-                    wb = load_workbook(str(excel_file))
-                    try:
-                        sheet_exists = False
-                        for sheet_name in wb.sheetnames:
-                            if sheet_name.casefold() == ign.casefold():
-                                sheet_exists = True
-                                break
-                        
-                        if not sheet_exists:
-                            await interaction.followup.send(f"[ERROR] Sheet for {ign} was not created. Player stats file may be corrupted.")
-                            return
-                    finally:
-                        wb.close()
-                except Exception as e:
-                    await interaction.followup.send(f"[ERROR] Could not verify sheet creation: {str(e)}")
-                    return
-                
                 # add to tracked users list and link Discord account
                 added = add_tracked_user(ign)
                 link_user_to_ign(interaction.user.id, ign)
                 
-                # Fetch fresh all-time data (without lifetime flag to update all-time)
-                fetch_result = run_script("get.py", ["-ign", ign])
-                if fetch_result.returncode != 0:
-                    print(f"[WARNING] Failed to fetch fresh data for {ign}: {fetch_result.stderr}")
-                
-                # Initialize all snapshots (session, daily, weekly, monthly) and deltas in one call
-                try:
-                    run_script("get.py", ["-session", "-daily", "-weekly", "-monthly", "-refresh", "-ign", ign])
-                    print(f"[OK] Initialized all snapshots for {ign}")
-                except Exception as e:
-                    print(f"[WARNING] Failed to initialize snapshots for {ign}: {e}")
-                
                 if added:
                     await interaction.followup.send(f"Chuckegg has accepted the verification of {ign}. {ign} is now verified, linked to your Discord account, and will be automatically tracked daily.")
                 else:
@@ -827,6 +820,7 @@ async def verify(interaction: discord.Interaction, ign: str):
 
 @bot.tree.command(name="create", description="Create a session snapshot")
 @discord.app_commands.describe(ign="Minecraft IGN")
+@timed_command("create")
 async def create_session(interaction: discord.Interaction, ign: str):
     if not interaction.response.is_done():
         try:
@@ -854,6 +848,7 @@ async def create_session(interaction: discord.Interaction, ign: str):
 
 @bot.tree.command(name="delete", description="Delete your tracked username and all associated data")
 @discord.app_commands.describe(ign="Minecraft IGN to delete")
+@timed_command("delete")
 async def delete_user(interaction: discord.Interaction, ign: str):
     if not interaction.response.is_done():
         try:
@@ -869,31 +864,33 @@ async def delete_user(interaction: discord.Interaction, ign: str):
     try:
         EXCEL_FILE = "sheep_wars_stats.xlsx"
         
-        # Remove from tracked users
-        removed_tracked = remove_tracked_user(ign)
-        
-        # Remove from user links
-        removed_link = unlink_user_from_ign(ign)
+        # Remove from tracked users and user links (one write per file)
+        with REGISTRY.batch():
+            removed_tracked = remove_tracked_user(ign)
+            removed_link = unlink_user_from_ign(ign)
         
-        # Delete sheet from Excel file
-        sheet_deleted = False
-        if os.path.exists(EXCEL_FILE):
-            wb = load_workbook(EXCEL_FILE)
-            try:
-                # Find sheet case-insensitively
-                key = ign.casefold()
-                found_sheet = None
-                for sheet_name in wb.sheetnames:
-                    if sheet_name.casefold() == key:
-                        found_sheet = sheet_name
-                        break
-                
-                if found_sheet:
-                    del wb[found_sheet]
-                    wb.save(EXCEL_FILE)
-                    sheet_deleted = True
-            finally:
-                wb.close()
+        # Delete sheet from Excel file (off the event loop: a refresh may hold the workbook lock)
+        def delete_sheet() -> bool:
+            if not os.path.exists(EXCEL_FILE):
+                return False
+            with WorkbookLock(BOT_DIR / EXCEL_FILE):
+                changes = ChangeLog(BOT_DIR / EXCEL_FILE)
+                wb = load_workbook(EXCEL_FILE)
+                try:
+                    # Find sheet case-insensitively
+                    title = find_sheet_name(wb, ign)
+                    if title is not None and remove_sheet(wb, title):
+                        changes.remove(title)
+                        wb.save(EXCEL_FILE)
+                        changes.publish()
+                        return True
+                finally:
+                    wb.close()
+            return False
+        sheet_deleted = await asyncio.to_thread(delete_sheet)
+        # A re-verified player must get a fresh sheet on their next refresh
+        refresh_state.forget(ign)
+        rolling.forget(ign)
         
         if removed_tracked or removed_link or sheet_deleted:
             await interaction.followup.send(f"Successfully deleted all data for {ign}. You are no longer tracked.")
@@ -904,7 +901,23 @@ async def delete_user(interaction: discord.Interaction, ign: str):
         await interaction.followup.send(f"[ERROR] Failed to delete data: {str(e)}")
 
 
+def is_owner(user) -> bool:
+    """True for the bot owner (CREATOR_ID, falling back to CREATOR_NAME)."""
+    if CREATOR_ID is not None:
+        try:
+            if int(CREATOR_ID) == user.id:
+                return True
+        except Exception:
+            pass
+    # fallback to name/display name match
+    try:
+        return user.name.casefold() == CREATOR_NAME.casefold() or user.display_name.casefold() == CREATOR_NAME.casefold()
+    except Exception:
+        return False
+
+
 @bot.tree.command(name="dmme", description="Send yourself a test DM from the bot")
+@timed_command("dmme")
 async def dmme(interaction: discord.Interaction):
     if not interaction.response.is_done():
         try:
@@ -912,21 +925,7 @@ async def dmme(interaction: discord.Interaction):
         except (discord.errors.NotFound, discord.errors.HTTPException):
             return
     # Owner-only guard: allow only CREATOR_ID or CREATOR_NAME to run this command
-    owner_allowed = False
-    if CREATOR_ID is not None:
-        try:
-            if int(CREATOR_ID) == interaction.user.id:
-                owner_allowed = True
-        except Exception:
-            pass
-    if not owner_allowed:
-        # fallback to name/display name match
-        try:
-            if interaction.user.name.casefold() == CREATOR_NAME.casefold() or interaction.user.display_name.casefold() == CREATOR_NAME.casefold():
-                owner_allowed = True
-        except Exception:
-            pass
-    if not owner_allowed:
+    if not is_owner(interaction.user):
         await interaction.followup.send("Only the bot owner may run this command.", ephemeral=True)
         return
     try:
@@ -936,6 +935,27 @@ async def dmme(interaction: discord.Interaction):
         await interaction.followup.send("Couldn't DM you. Check your privacy settings (Allow DMs from server members).", ephemeral=True)
 
 
+@bot.tree.command(name="profile", description="Profile the next N stats refreshes (owner only)")
+@discord.app_commands.describe(refreshes="How many upcoming get.py runs to profile (0 cancels)")
+@timed_command("profile")
+async def profile(interaction: discord.Interaction, refreshes: int = 1):
+    if not interaction.response.is_done():
+        try:
+            await interaction.response.defer(ephemeral=True)
+        except (discord.errors.NotFound, discord.errors.HTTPException):
+            return
+    if not is_owner(interaction.user):
+        await interaction.followup.send("Only the bot owner may run this command.", ephemeral=True)
+        return
+    refreshes = max(0, min(refreshes, 50))
+    with _profile_lock:
+        PROFILE_BUDGET["remaining"] = refreshes
+    if refreshes:
+        await interaction.followup.send(f"Profiling the next {refreshes} refresh(es). Reports are written to the profiles/ folder next to the bot.", ephemeral=True)
+    else:
+        await interaction.followup.send("Profiling cancelled.", ephemeral=True)
+
+
 @bot.tree.command(name="refresh", description="Manually run daily/weekly/monthly fetch for all tracked users")
 @discord.app_commands.describe(mode="One of: daily, weekly, monthly, stats, or all")
 @discord.app_commands.choices(mode=[
@@ -945,6 +965,7 @@ async def dmme(interaction: discord.Interaction):
     discord.app_commands.Choice(name="stats (refresh only)", value="-refresh"),
     discord.app_commands.Choice(name="all (daily + weekly + monthly)", value="-all"),
 ])
+@timed_command("refresh")
 async def refresh(interaction: discord.Interaction, mode: discord.app_commands.Choice[str]):
     if not interaction.response.is_done():
         try:
@@ -984,8 +1005,68 @@ async def refresh(interaction: discord.Interaction, mode: discord.app_commands.C
     except Exception as e:
         await interaction.followup.send(f"[ERROR] {str(e)}", ephemeral=True)
 
+# /sheepwars answers from the stored stats straight away and refreshes in the
+# background when they are older than this many seconds
+STATS_MAX_AGE = float(os.environ.get("SHEEPWARS_STATS_MAX_AGE", 120))
+
+# Casefolded IGN -> running background get.py -refresh, so lookups of one player share it
+_REVALIDATIONS = {}
+# Pending message edits (asyncio only keeps weak references to tasks)
+_STATS_EDITS = set()
+
+
+def load_stored_stats(ign):
+    """(LeaderboardEntry, as_of) for `ign` without fetching; (None, None) if they have no sheet."""
+    try:
+        entry = LEADERBOARDS.player([ign, *IDENTITIES.names(ign)])
+    except FileNotFoundError:
+        return None, None
+    if entry is None:
+        return None, None
+    # refresh_state.json knows when get.py last wrote or confirmed this player's stats
+    as_of = refresh_state.RefreshState().as_of(refresh_state.player_key(entry.player, IDENTITIES))
+    return entry, as_of
+
+
+def revalidate(ign) -> asyncio.Task:
+    """Start a background get.py -refresh for `ign`, or join the one already running."""
+    key = ign.casefold()
+    task = _REVALIDATIONS.get(key)
+    if task is None:
+        # Someone is waiting on this one: back up a slow proxy with a second request (hedging.py)
+        task = asyncio.create_task(asyncio.to_thread(run_script, "get.py", ["-refresh", "-hedge", "-ign", ign]))
+        _REVALIDATIONS[key] = task
+        task.add_done_callback(lambda _task: _REVALIDATIONS.pop(key, None))
+    return task
+
+
+async def update_stats_message(message, view: StatsTabView):
+    """Wait for the background refresh of `view`'s player, then edit `message` in place."""
+    status = None
+    try:
+        result = await revalidate(view.ign)
+        if result.returncode != 0:
+            # get.py refuses to fetch while plancke.io's circuit breaker is open
+            status = "plancke.io is unavailable" if "CircuitOpenError" in (result.stderr or "") else "Refresh failed"
+    except subprocess.TimeoutExpired:
+        status = "Refresh timed out"
+    except Exception as e:
+        print(f"[WARNING] Background refresh of {view.ign} failed: {e}")
+        status = "Refresh failed"
+    try:
+        entry, as_of = await asyncio.to_thread(load_stored_stats, view.ign)
+        if entry is None:
+            entry, as_of = view.entry, view.as_of
+        fresh = StatsTabView(entry, as_of, status=status, current_tab=view.current_tab)
+        view.stop()
+        await message.edit(embed=fresh.get_stats_embed(fresh.current_tab), view=fresh)
+    except Exception as e:
+        print(f"[WARNING] Could not update /sheepwars message for {view.ign}: {e}")
+
+
 @bot.tree.command(name="sheepwars", description="Get player stats with deltas")
 @discord.app_commands.describe(ign="Minecraft IGN")
+@timed_command("sheepwars")
 async def sheepwars(interaction: discord.Interaction, ign: str):
     # Defer FIRST, before any long operations
     if not interaction.response.is_done():
@@ -996,63 +1077,67 @@ async def sheepwars(interaction: discord.Interaction, ign: str):
             return
     
     try:
-        result = run_script("get.py", ["-refresh", "-ign", ign])
-        
-        if result.returncode != 0:
-            error_msg = result.stderr or result.stdout or "Unknown error"
-            await interaction.followup.send(f"[ERROR] Failed to fetch stats:\n```{error_msg[:500]}```")
-            return
-        
-        # Read Excel file and get stats
-        EXCEL_FILE = BOT_DIR / "sheep_wars_stats.xlsx"
-        if not EXCEL_FILE.exists():
-            await interaction.followup.send("[ERROR] Excel file not found")
-            return
-        
-        wb = load_workbook(EXCEL_FILE)
-        try:
-            # Find sheet case-insensitively
-            key = ign.casefold()
-            found_sheet = None
-            for sheet_name in wb.sheetnames:
-                if sheet_name.casefold() == key:
-                    found_sheet = wb[sheet_name]
-                    break
-            
-            if found_sheet is None:
+        # Answer from what is stored; only a player with no sheet yet waits for a fetch
+        entry, as_of = await asyncio.to_thread(load_stored_stats, ign)
+        if entry is None:
+            result = await revalidate(ign)
+            if result.returncode != 0:
+                error_msg = result.stderr or result.stdout or "Unknown error"
+                await interaction.followup.send(f"[ERROR] Failed to fetch stats:\n```{error_msg[:500]}```")
+                return
+            entry, as_of = await asyncio.to_thread(load_stored_stats, ign)
+            if entry is None:
                 await interaction.followup.send(f"[ERROR] Player sheet '{ign}' not found")
                 return
-            
-            # Pull level and prestige icon for title decoration
-            try:
-                level_value = int(found_sheet["D40"].value or 0)
-            except Exception:
-                level_value = 0
-            prestige_icon = get_prestige_icon(level_value)
-
-            # Create view with tabs
-            view = StatsTabView(found_sheet, ign, level_value, prestige_icon)
-            embed = view.get_stats_embed("all-time")
-            
-            await interaction.followup.send(embed=embed, view=view)
-        finally:
-            wb.close()
+        stale = as_of is None or time.time() - as_of > STATS_MAX_AGE
+        metrics.cache_lookup("sheepwars_stored", not stale)
+        
+        # Create view with tabs
+        view = StatsTabView(entry, as_of, status="Refreshing..." if stale else None)
+        embed = view.get_stats_embed("all-time")
+        message = await interaction.followup.send(embed=embed, view=view, wait=True)
+        
+        if stale:
+            # Fresher numbers replace these in the same message once get.py is done
+            task = asyncio.create_task(update_stats_message(message, view))
+            _STATS_EDITS.add(task)
+            task.add_done_callback(_STATS_EDITS.discard)
         
     except subprocess.TimeoutExpired:
         await interaction.followup.send("[ERROR] Command timed out (30s limit)")
     except Exception as e:
         await interaction.followup.send(f"[ERROR] {str(e)}")
 
-@bot.tree.command(name="leaderboard", description="View player leaderboards")
-@discord.app_commands.describe(metric="Choose a stat to rank players by")
-@discord.app_commands.choices(metric=[
+METRIC_CHOICES = [
     discord.app_commands.Choice(name="Kills", value="kills"),
     discord.app_commands.Choice(name="Deaths", value="deaths"),
     discord.app_commands.Choice(name="K/D Ratio", value="kdr"),
     discord.app_commands.Choice(name="Wins", value="wins"),
     discord.app_commands.Choice(name="Losses", value="losses"),
     discord.app_commands.Choice(name="W/L Ratio", value="wlr"),
-])
+    discord.app_commands.Choice(name="Damage Dealt (lifetime)", value="damage"),
+    discord.app_commands.Choice(name="CTW Kills (lifetime)", value="ctw_kills"),
+    discord.app_commands.Choice(name="CTW Deaths (lifetime)", value="ctw_deaths"),
+    discord.app_commands.Choice(name="CTW K/D Ratio (lifetime)", value="ctw_kdr"),
+    discord.app_commands.Choice(name="CTW Wins (lifetime)", value="ctw_wins"),
+    discord.app_commands.Choice(name="CTW Losses (lifetime)", value="ctw_losses"),
+    discord.app_commands.Choice(name="CTW W/L Ratio (lifetime)", value="ctw_wlr"),
+]
+PERIOD_CHOICES = [
+    discord.app_commands.Choice(name="Lifetime", value="lifetime"),
+    discord.app_commands.Choice(name="Session", value="session"),
+    discord.app_commands.Choice(name="Daily", value="daily"),
+    discord.app_commands.Choice(name="Weekly", value="weekly"),
+    discord.app_commands.Choice(name="Monthly", value="monthly"),
+    discord.app_commands.Choice(name="Last 24h", value="24h"),
+    discord.app_commands.Choice(name="Last 7d", value="7d"),
+    discord.app_commands.Choice(name="Last 30d", value="30d"),
+]
+
+@bot.tree.command(name="leaderboard", description="View player leaderboards")
+@discord.app_commands.describe(metric="Choose a stat to rank players by")
+@discord.app_commands.choices(metric=METRIC_CHOICES)
+@timed_command("leaderboard")
 async def leaderboard(interaction: discord.Interaction, metric: discord.app_commands.Choice[str]):
     # Defer FIRST, before any long operations
     if not interaction.response.is_done():
@@ -1062,28 +1147,117 @@ async def leaderboard(interaction: discord.Interaction, metric: discord.app_comm
             # Interaction expired or already acknowledged - nothing we can do
             return
     
-    wb = None
     try:
-        EXCEL_FILE = "sheep_wars_stats.xlsx"
-        if not os.path.exists(EXCEL_FILE):
+        # Sheets are only re-read when the workbook changed since the last leaderboard
+        try:
+            boards = await asyncio.to_thread(LEADERBOARDS.get)
+        except FileNotFoundError:
             await interaction.followup.send("[ERROR] Excel file not found")
             return
         
-        wb = load_workbook(EXCEL_FILE)
-        
-        # Create view with period buttons
-        view = LeaderboardView(metric.value, wb)
+        # Create view with period and page buttons
+        view = LeaderboardView(metric.value, boards)
         embed = view.get_leaderboard_embed("lifetime")
         
         await interaction.followup.send(embed=embed, view=view)
-        # Note: wb is kept open for the view to use; consider closing after timeout
         
     except Exception as e:
         await interaction.followup.send(f"[ERROR] {str(e)}")
+
+@bot.tree.command(name="rank", description="Show where a player ranks for a stat")
+@discord.app_commands.describe(ign="Minecraft IGN", metric="Stat to rank by", period="Period (default: lifetime)")
+@discord.app_commands.choices(metric=METRIC_CHOICES, period=PERIOD_CHOICES)
+@timed_command("rank")
+async def rank_player(interaction: discord.Interaction, ign: str, metric: discord.app_commands.Choice[str],
+               period: discord.app_commands.Choice[str] = None):
+    if not interaction.response.is_done():
+        try:
+            await interaction.response.defer()
+        except (discord.errors.NotFound, discord.errors.HTTPException):
+            return
+    
+    period_value = period.value if period else "lifetime"
+    try:
+        if metric.value in LIFETIME_METRICS and period_value != "lifetime":
+            await interaction.followup.send(f"[ERROR] {metric.name} is only tracked for lifetime")
+            return
+        try:
+            boards = await asyncio.to_thread(LEADERBOARDS.get)
+        except FileNotFoundError:
+            await interaction.followup.send("[ERROR] Excel file not found")
+            return
+        index = boards.index(period_value, metric.value)
+        
+        # Sheets keep the name a player had when they were added; try their other names too
+        player = next((name for name in IDENTITIES.names(ign) if index.position(name) is not None), None)
+        if player is None:
+            await interaction.followup.send(f"[ERROR] {ign} has no {period_title(period_value)} {METRIC_LABELS[metric.value]} on record")
+            return
+        player, value, level = index.rows[index.position(player)]
+        position, _value, percentile = index.lookup(player)
+        
+        lines = []
+        for r, name, v, lvl in index.neighbours(player):
+            marker = ">" if name == player else " "
+            lines.append(f"{marker}{r}. {get_prestige_tag(lvl)} {name}: {v}")
+        embed = discord.Embed(
+            title=f"{player} - {period_title(period_value)} {METRIC_LABELS[metric.value]}",
+            description=f"Rank **#{position}** of {len(index)} with `{value}` (ahead of {percentile:.1f}% of players)",
+            color=discord.Color.from_rgb(*get_prestige_color(level)),
+        )
+        embed.add_field(name="Nearby", value="```ansi\n" + "\n".join(lines) + "\n```", inline=False)
+        await interaction.followup.send(embed=embed)
+    
+    except Exception as e:
+        await interaction.followup.send(f"[ERROR] {str(e)}")
+
+@bot.tree.command(name="export", description="Download the stats as an Excel workbook or CSV files")
+@discord.app_commands.describe(format="File type (default: Excel)", ign="Only this player, which you verified (everyone: owner only)")
+@discord.app_commands.choices(format=[
+    discord.app_commands.Choice(name="Excel (.xlsx)", value="xlsx"),
+    discord.app_commands.Choice(name="CSV files (.zip)", value="csv"),
+])
+@timed_command("export")
+async def export_stats(interaction: discord.Interaction, format: discord.app_commands.Choice[str] = None, ign: str = None):
+    if not interaction.response.is_done():
+        try:
+            await interaction.response.defer(ephemeral=True)
+        except (discord.errors.NotFound, discord.errors.HTTPException):
+            return
+    if ign is None and not is_owner(interaction.user):
+        await interaction.followup.send("Only the bot owner may export every player. Pass an IGN to export one.", ephemeral=True)
+        return
+    if ign is not None and not is_owner(interaction.user) and not is_user_authorized(interaction.user.id, ign):
+        await interaction.followup.send(f"[ERROR] You are not authorized to export {ign}. Only the user who verified this username can export it.", ephemeral=True)
+        return
+    
+    fmt = format.value if format else "xlsx"
+    # Written to disk, not memory; see export.py
+    fd, path = tempfile.mkstemp(suffix=".xlsx" if fmt == "xlsx" else ".zip")
+    os.close(fd)
+    try:
+        players = [ign, *IDENTITIES.names(ign)] if ign else None
+        try:
+            counts = await asyncio.to_thread(export.export, path, fmt, players)
+        except FileNotFoundError:
+            await interaction.followup.send("[ERROR] Excel file not found", ephemeral=True)
+            return
+        if ign and not any(is_player_sheet(title) for title in counts):
+            await interaction.followup.send(f"[ERROR] Player sheet '{ign}' not found", ephemeral=True)
+            return
+        
+        limit = interaction.guild.filesize_limit if interaction.guild else 10 * 1024 * 1024
+        size = os.path.getsize(path)
+        if size > limit:
+            await interaction.followup.send(f"[ERROR] The export is {size / 1024 / 1024:.1f} MB, over Discord's {limit // 1024 // 1024} MB upload limit. Run export.py on the bot host instead.", ephemeral=True)
+            return
+        name = f"sheep_wars_{ign or 'stats'}.{'xlsx' if fmt == 'xlsx' else 'zip'}"
+        await interaction.followup.send(file=discord.File(path, filename=name), ephemeral=True)
+    except Exception as e:
+        await interaction.followup.send(f"[ERROR] {str(e)}", ephemeral=True)
     finally:
-        if wb is not None:
-            wb.close()
+        os.remove(path)
 
 # Run bot
 if __name__ == "__main__":
-    bot.run(DISCORD_TOKEN)
+    bot.run(load_token())
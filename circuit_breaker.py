@@ -0,0 +1,138 @@
+"""Circuit breaker around plancke.io, shared by every get.py process.
+
+When plancke.io is down or blocking us, each refresh would otherwise run
+fetch_with_retry's whole ladder (backoff sleeps, proxy removal, direct
+fallback) before failing. The breaker counts fetches that failed because
+of the upstream and, after FAILURE_THRESHOLD of them in a row, opens:
+
+    closed     fetches go through; a success resets the failure count
+    open       fetches fail at once (CircuitOpenError) for RESET_SECONDS
+    half-open  one fetch is let through as a probe; success closes the
+               circuit, failure opens it for another RESET_SECONDS, and
+               everyone else keeps failing fast meanwhile (a probe that
+               never reports back is replaced after PROBE_SECONDS)
+
+Refreshes run in separate processes (bot subprocesses, fetch workers,
+batch threads), so the state lives in circuit_state.json next to the
+workbook and every transition happens under an OS file lock. A player the
+bot already has stored stats for is still shown from them (bot.py
+/sheepwars); only the refresh is skipped.
+"""
+import json
+import os
+import time
+from pathlib import Path
+
+from user_registry import _atomic_write
+from workbook_lock import WorkbookLock
+
+SCRIPT_DIR = Path(__file__).parent.absolute()
+CIRCUIT_FILE = os.environ.get("SHEEPWARS_CIRCUIT_FILE") or str(SCRIPT_DIR / "circuit_state.json")
+FAILURE_THRESHOLD = int(os.environ.get("SHEEPWARS_BREAKER_FAILURES", 3))
+RESET_SECONDS = float(os.environ.get("SHEEPWARS_BREAKER_RESET_SECONDS", 120))
+PROBE_SECONDS = 90  # longer than one full fetch_with_retry ladder
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, path=CIRCUIT_FILE, failure_threshold=FAILURE_THRESHOLD,
+                 reset_seconds=RESET_SECONDS, probe_seconds=PROBE_SECONDS):
+        self.name = name
+        self.path = path
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.probe_seconds = probe_seconds
+        self._lock = WorkbookLock(path)
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get(self.name) or {}
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, entry: dict):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                circuits = json.load(f)
+        except (OSError, ValueError):
+            circuits = {}
+        circuits[self.name] = entry
+        _atomic_write(self.path, json.dumps(circuits, indent=1))
+
+    def state(self) -> dict:
+        """{"state", "failures", "opened", "probe"} as last written (closed if never written)."""
+        entry = self._read()
+        return {"state": entry.get("state", CLOSED), "failures": entry.get("failures", 0),
+                "opened": entry.get("opened"), "probe": entry.get("probe")}
+
+    def retry_in(self) -> float:
+        """Seconds until an open circuit lets a probe through (0 when not open)."""
+        entry = self.state()
+        if entry["state"] != OPEN:
+            return 0.0
+        return max(0.0, entry["opened"] + self.reset_seconds - time.time())
+
+    def blocked(self) -> bool:
+        """True while fetches would be refused; unlike allow() this never starts a probe."""
+        entry = self.state()
+        now = time.time()
+        if entry["state"] == OPEN:
+            return now - entry["opened"] < self.reset_seconds
+        if entry["state"] == HALF_OPEN:
+            return now - (entry["probe"] or 0) < self.probe_seconds
+        return False
+
+    def open_error(self) -> CircuitOpenError:
+        wait = self.retry_in()
+        when = f"retrying in {wait:.0f}s" if wait else "a probe is in flight"
+        return CircuitOpenError(f"{self.name} looks down (circuit open, {when}); not fetching")
+
+    def allow(self) -> bool:
+        """True if a fetch may go out now; in half-open state only the caller that gets True probes."""
+        with self._lock:
+            entry = self.state()
+            now = time.time()
+            if entry["state"] == CLOSED:
+                return True
+            if entry["state"] == OPEN and now - entry["opened"] < self.reset_seconds:
+                return False
+            if entry["state"] == HALF_OPEN and now - (entry["probe"] or 0) < self.probe_seconds:
+                return False
+            entry.update(state=HALF_OPEN, probe=now)
+            self._write(entry)
+            print(f"[BREAKER] {self.name}: half-open, probing")
+            return True
+
+    def check(self):
+        """allow(), raising CircuitOpenError instead of returning False."""
+        if not self.allow():
+            raise self.open_error()
+
+    def record_success(self):
+        with self._lock:
+            entry = self.state()
+            if entry["state"] == CLOSED and not entry["failures"]:
+                return  # the common case costs one read
+            if entry["state"] != CLOSED:
+                print(f"[BREAKER] {self.name}: closed, upstream is back")
+            self._write({"state": CLOSED, "failures": 0})
+
+    def record_failure(self):
+        with self._lock:
+            entry = self.state()
+            if entry["state"] == OPEN:
+                return  # a fetch that started before the circuit opened
+            now = time.time()
+            failures = entry["failures"] + 1
+            if entry["state"] == HALF_OPEN or failures >= self.failure_threshold:
+                print(f"[BREAKER] {self.name}: open after {failures} failed fetch(es); "
+                      f"failing fast for {self.reset_seconds:.0f}s")
+                self._write({"state": OPEN, "failures": failures, "opened": now})
+            else:
+                self._write({**entry, "failures": failures})
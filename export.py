@@ -0,0 +1,202 @@
+"""Export the stats as a fresh .xlsx workbook or a .zip of CSV files.
+
+    python export.py                          -> sheep_wars_export.xlsx
+    python export.py -format csv -o out.zip   -> one CSV per sheet
+    python export.py -ign Chuckegg            -> one player's sheet and history rows
+
+Every row is streamed: the source is read with openpyxl read_only mode and
+the output is written with write_only mode (or csv.writer straight into the
+zip), so memory stays flat however long the history sheet gets. Player
+sheets keep the player_stats.py layout (period tables, Capture the Wool,
+rolling windows) with the same title/header styling; values are copied as
+stored.
+
+The workbook is copied under the WorkbookLock first (a file copy, no
+parsing), so a long export never holds up refreshes and never reads a file
+another process is halfway through saving. /export in bot.py calls
+export() and attaches the result.
+"""
+import argparse
+import csv
+import io
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+from sheet_layout import (
+    PERIOD_START_ROWS, CTW_TITLE_ROW, LAST_ROW, LAST_COL, is_player_sheet,
+)
+from workbook_lock import WorkbookLock
+
+SCRIPT_DIR = Path(__file__).parent.absolute()
+EXCEL_FILE = str(SCRIPT_DIR / "sheep_wars_stats.xlsx")
+
+FORMATS = ("xlsx", "csv")
+DEFAULT_OUTPUT = {"xlsx": "sheep_wars_export.xlsx", "csv": "sheep_wars_export.zip"}
+
+# Player sheet rows styled like player_stats.py: table titles and column headers
+TITLE_ROWS = {start - 2 for start in PERIOD_START_ROWS.values()} | {CTW_TITLE_ROW}
+HEADER_ROWS = {start - 1 for start in PERIOD_START_ROWS.values()} | {CTW_TITLE_ROW + 1}
+
+
+def copy_workbook(source: str) -> str:
+    """Copy `source` to a temporary file while no one is writing it; the caller deletes the copy."""
+    fd, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        with WorkbookLock(source):
+            shutil.copyfile(source, path)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def iter_sheets(wb, players=None):
+    """Yield (title, rows) for the history sheet and each player sheet, rows as value tuples.
+
+    With `players` (casefolded names) only their sheets and history rows are kept.
+    """
+    for title in wb.sheetnames:
+        ws = wb[title]
+        if not is_player_sheet(title):
+            yield title, _history_rows(ws, players)
+        elif players is None or title.casefold() in players:
+            yield title, ws.iter_rows(min_row=1, max_row=LAST_ROW, max_col=LAST_COL, values_only=True)
+
+
+def _history_rows(ws, players):
+    rows = ws.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return
+    yield header
+    for row in rows:
+        # Username is column B
+        if players is None or (len(row) > 1 and str(row[1] or "").casefold() in players):
+            yield row
+
+
+# -------------------
+# Writers
+# -------------------
+def write_xlsx(sheets, out):
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
+    center = Alignment(horizontal="center", vertical="center")
+    side = Side(style="thin")
+    border = Border(left=side, right=side, top=side, bottom=side)
+    title_font = Font(color="FFFFFF", bold=True)
+    title_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    header_font = Font(bold=True)
+    header_fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
+
+    wb = Workbook(write_only=True)
+    counts = {}
+    for title, rows in sheets:
+        ws = wb.create_sheet(title)
+        player = is_player_sheet(title)
+        if player:
+            ws.column_dimensions["A"].width = 15
+            ws.column_dimensions["B"].width = 15
+            ws.column_dimensions["G"].width = 15
+        n = 0
+        for row_idx, row in enumerate(rows, 1):
+            n += 1
+            if not player:
+                ws.append(row)
+                continue
+            cells = []
+            for col_idx, value in enumerate(row, 1):
+                if value is None:
+                    cells.append(None)
+                    continue
+                cell = WriteOnlyCell(ws, value=value)
+                cell.alignment = center
+                if row_idx in TITLE_ROWS:
+                    cell.font, cell.fill = title_font, title_fill
+                    # Titles span their table: A:F, or G:H for Capture the Wool
+                    ws.merged_cells.add(f"G{row_idx}:H{row_idx}" if col_idx == 7 else f"A{row_idx}:F{row_idx}")
+                else:
+                    cell.border = border
+                    if row_idx in HEADER_ROWS:
+                        cell.font, cell.fill = header_font, header_fill
+                cells.append(cell)
+            ws.append(cells)
+        counts[title] = n
+    wb.save(out)
+    return counts
+
+
+def write_csv_zip(sheets, out):
+    counts = {}
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for title, rows in sheets:
+            with zf.open(f"{title}.csv", "w") as raw:
+                text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+                writer = csv.writer(text)
+                n = 0
+                for row in rows:
+                    writer.writerow(["" if v is None else v for v in row])
+                    n += 1
+                text.flush()
+                text.detach()
+            counts[title] = n
+    return counts
+
+
+WRITERS = {"xlsx": write_xlsx, "csv": write_csv_zip}
+
+
+def export(out, fmt: str = "xlsx", players=None, source: str = EXCEL_FILE) -> dict:
+    """Write the export to `out` (a path or binary file); returns {sheet title: rows written}.
+
+    Raises FileNotFoundError if there is no workbook yet.
+    """
+    from openpyxl import load_workbook
+
+    if not os.path.exists(source):
+        raise FileNotFoundError(source)
+    wanted = {p.casefold() for p in players} if players else None
+    copy = copy_workbook(source)
+    try:
+        wb = load_workbook(copy, read_only=True)
+        try:
+            return WRITERS[fmt](iter_sheets(wb, wanted), out)
+        finally:
+            wb.close()
+    finally:
+        os.remove(copy)
+
+
+# -------------------
+# CLI
+# -------------------
+def build_parser():
+    parser = argparse.ArgumentParser(description="Export the Sheep Wars stats to .xlsx or CSV")
+    parser.add_argument("-format", choices=FORMATS, default="xlsx", help="xlsx workbook or a zip of CSV files")
+    parser.add_argument("-o", "--output", help="Output path (default: sheep_wars_export.xlsx / .zip)")
+    parser.add_argument("-ign", "--username", action="append", help="Only this player (repeatable)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    out = args.output or DEFAULT_OUTPUT[args.format]
+    try:
+        counts = export(out, args.format, args.username)
+    except FileNotFoundError:
+        print(f"[ERROR] {EXCEL_FILE} not found", file=sys.stderr)
+        sys.exit(1)
+    players = sum(1 for title in counts if is_player_sheet(title))
+    history = sum(max(0, n - 1) for title, n in counts.items() if not is_player_sheet(title))
+    print(f"[OK] Exported {players} player sheet(s) and {history} history row(s) to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""Fetch workers: run get.py refreshes in long-lived processes next to the bot.
+
+Off by default. With SHEEPWARS_WORKER_ADDRESS set (a unix socket path, or
+host:port), bot.py listens there and sends each get.py run to a connected
+worker instead of starting a subprocess, so the gateway process only does
+Discord I/O and cached reads. Workers connect to the bot (not the other way
+round), so capacity scales by starting more of them:
+
+    SHEEPWARS_WORKER_ADDRESS=/tmp/sheepwars-workers.sock python bot.py
+    SHEEPWARS_WORKER_ADDRESS=/tmp/sheepwars-workers.sock python fetch_worker.py -n 4
+
+A worker calls get.main() in-process, so interpreter start-up and the
+requests/bs4/openpyxl imports are paid once per worker instead of once per
+refresh. Each worker runs one job at a time. Jobs and results travel over
+multiprocessing.connection, authenticated with SHEEPWARS_WORKER_KEY or the
+key in worker_key.txt (created on first use). When no worker is connected
+the bot falls back to a subprocess.
+"""
+import argparse
+import os
+import queue
+import secrets
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent.absolute()
+KEY_FILE = SCRIPT_DIR / "worker_key.txt"
+WORKER_ADDRESS = os.environ.get("SHEEPWARS_WORKER_ADDRESS", "").strip()
+RECONNECT_SECONDS = 2.0
+
+
+def parse_address(text: str):
+    """"host:port" -> (host, port); anything else is a unix socket path."""
+    host, sep, port = text.rpartition(":")
+    if sep and port.isdigit() and "/" not in text:
+        return host or "127.0.0.1", int(port)
+    return text
+
+
+def load_authkey() -> bytes:
+    key = os.environ.get("SHEEPWARS_WORKER_KEY")
+    if not key:
+        try:
+            key = KEY_FILE.read_text(encoding="utf-8").strip()
+        except OSError:
+            key = None
+    if not key:
+        key = secrets.token_hex(16)
+        KEY_FILE.write_text(key, encoding="utf-8")
+        os.chmod(KEY_FILE, 0o600)
+    return key.encode()
+
+
+# -------------------
+# Bot side
+# -------------------
+class WorkerPool:
+    """Accepts worker connections and hands each job to an idle one."""
+
+    def __init__(self, address, authkey: bytes):
+        self.address = address
+        if isinstance(address, str) and os.path.exists(address):
+            os.unlink(address)  # stale socket from an earlier run
+        self.listener = Listener(address, authkey=authkey)
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+        self.connected = 0
+        self.closed = False
+        threading.Thread(target=self._accept_loop, name="worker-accept", daemon=True).start()
+
+    def _set_connected(self, delta: int):
+        import metrics
+
+        with self.lock:
+            self.connected += delta
+            metrics.FETCH_WORKERS.set(self.connected)
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+                hello = conn.recv()
+            except Exception as e:
+                if self.closed:
+                    return
+                # AuthenticationError (wrong key), EOFError (client went away), ...
+                print(f"[WORKER] Rejected a worker connection: {e}")
+                continue
+            print(f"[WORKER] Fetch worker {hello.get('pid')} connected")
+            self._set_connected(1)
+            self.idle.put(conn)
+
+    def _drop(self, conn):
+        try:
+            conn.close()
+        except OSError:
+            pass
+        self._set_connected(-1)
+
+    def run(self, args, timeout: float):
+        """Run get.py `args` on a worker; a CompletedProcess, or None if no worker could take it.
+
+        Raises subprocess.TimeoutExpired like subprocess.run() would.
+        """
+        if not self.connected:
+            return None
+        deadline = time.monotonic() + timeout
+        try:
+            # Every worker busy: wait for one rather than piling subprocesses on the host
+            conn = self.idle.get(timeout=timeout)
+        except queue.Empty:
+            raise subprocess.TimeoutExpired(["get.py", *args], timeout)
+        try:
+            conn.send({"args": list(args)})
+            if not conn.poll(max(0.0, deadline - time.monotonic())):
+                # The worker finishes the job on its own; it reconnects once it sees we hung up
+                self._drop(conn)
+                raise subprocess.TimeoutExpired(["get.py", *args], timeout)
+            result = conn.recv()
+        except (EOFError, OSError) as e:
+            print(f"[WORKER] Lost a fetch worker: {e}")
+            self._drop(conn)
+            return None
+        self.idle.put(conn)
+        return subprocess.CompletedProcess(["get.py", *args], result["returncode"], result["stdout"], result["stderr"])
+
+    def close(self):
+        self.closed = True
+        self.listener.close()
+
+
+def start_pool():
+    """The bot's WorkerPool, or None when SHEEPWARS_WORKER_ADDRESS isn't set."""
+    if not WORKER_ADDRESS:
+        return None
+    pool = WorkerPool(parse_address(WORKER_ADDRESS), load_authkey())
+    print(f"[WORKER] Waiting for fetch workers on {WORKER_ADDRESS}")
+    return pool
+
+
+# -------------------
+# Worker side
+# -------------------
+def run_job(job) -> dict:
+    """Run one get.py invocation in this process, capturing what it prints."""
+    import io
+    import traceback
+    from contextlib import redirect_stderr, redirect_stdout
+
+    import get
+
+    out, err = io.StringIO(), io.StringIO()
+    returncode = 0
+    sys.argv = ["get.py", *job["args"]]  # what argparse names in its messages
+    with redirect_stdout(out), redirect_stderr(err):
+        try:
+            get.main(job["args"])
+        except SystemExit as e:
+            returncode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception:
+            traceback.print_exc()
+            returncode = 1
+    return {"returncode": returncode, "stdout": out.getvalue(), "stderr": err.getvalue()}
+
+
+def worker_loop(address, authkey: bytes):
+    """Connect to the bot and run jobs until killed; reconnects whenever the bot goes away."""
+    os.chdir(SCRIPT_DIR)
+    # Pay for the heavy imports before the first job
+    import get  # noqa: F401
+    import requests  # noqa: F401
+    import openpyxl  # noqa: F401
+
+    waiting = False
+    while True:
+        try:
+            conn = Client(address, authkey=authkey)
+        except OSError:
+            if not waiting:
+                print(f"[WORKER] {os.getpid()}: waiting for the bot on {address}")
+                waiting = True
+            time.sleep(RECONNECT_SECONDS)
+            continue
+        waiting = False
+        print(f"[WORKER] {os.getpid()}: connected to {address}")
+        try:
+            conn.send({"pid": os.getpid()})
+            while True:
+                job = conn.recv()
+                conn.send(run_job(job))
+        except (EOFError, OSError):
+            print(f"[WORKER] {os.getpid()}: bot connection closed")
+        finally:
+            conn.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run get.py refreshes for bot.py in worker processes")
+    parser.add_argument("-address", default=WORKER_ADDRESS, help="Unix socket path or host:port (default: SHEEPWARS_WORKER_ADDRESS)")
+    parser.add_argument("-n", "--workers", type=int, default=1, help="Worker processes to start")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.address:
+        print("[ERROR] Set SHEEPWARS_WORKER_ADDRESS or pass -address", file=sys.stderr)
+        sys.exit(1)
+    address, authkey = parse_address(args.address), load_authkey()
+    if args.workers <= 1:
+        worker_loop(address, authkey)
+        return
+
+    import multiprocessing
+
+    procs = [multiprocessing.Process(target=worker_loop, args=(address, authkey), name=f"fetch-worker-{i}")
+             for i in range(args.workers)]
+    for proc in procs:
+        proc.start()
+    print(f"[OK] Started {len(procs)} fetch workers")
+    try:
+        for proc in procs:
+            proc.join()
+    except KeyboardInterrupt:
+        for proc in procs:
+            proc.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,27 @@
-import requests
-from bs4 import BeautifulSoup
 from datetime import datetime
-import re
 import os
 import argparse
 import time
 import random
 import json
-import gzip
-from io import BytesIO
+import threading
 from pathlib import Path
 from urllib.parse import quote
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+import tracing
+from tracing import span
+from stats_source import StatsSource, SOURCES, DEFAULT_SOURCE
+from page_archive import archive_page
+from circuit_breaker import CircuitBreaker
+from workbook_lock import WorkbookLock
+
+# Nothing runs at import time; requests, bs4 and openpyxl are imported on
+# first use so a run reaches the network before paying for the rest.
 
 # Get script directory for file operations
 SCRIPT_DIR = Path(__file__).parent.absolute()
 
-# -------------------
-# CLI arguments
-# -------------------
-parser = argparse.ArgumentParser(description="Fetch Sheep Wars stats")
-parser.add_argument("-ign", "--username", required=True, help="Minecraft IGN")
-parser.add_argument("-nolifetime", action="store_true", help="Don't update all-time stats in player sheet")
-parser.add_argument("-session", action="store_true", help="Log snapshot into Session Start section")
-parser.add_argument("-daily", action="store_true", help="Log snapshot into Daily Stats section")
-parser.add_argument("-weekly", action="store_true", help="Log snapshot into Weekly Stats section")
-parser.add_argument("-monthly", action="store_true", help="Log snapshot into Monthly Stats section")
-parser.add_argument("-refresh", action="store_true", help="Refresh all stats with deltas from snapshots")
-parser.add_argument("-proxy", action="store_true", help="Use proxy rotation from ProxyScrape")
-parser.add_argument("-noproxy", action="store_true", help="Disable proxies (direct connection only)")
-args = parser.parse_args()
-
-USERNAME = args.username
-URL = f"https://plancke.io/hypixel/player/stats/{quote(USERNAME)}"
+# PLANCKE_BASE_URL points the fetch at a stand-in server (see loadtest/fake_plancke.py)
+PLANCKE_BASE_URL = os.environ.get("PLANCKE_BASE_URL", "https://plancke.io").rstrip("/")
 
 # Rotating user agents to appear more like different browsers
 USER_AGENTS = [
@@ -44,30 +32,78 @@ USER_AGENTS = [
     "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
 ]
 
-HEADERS = {
-    "User-Agent": random.choice(USER_AGENTS),
-    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-    "Accept-Language": "en-US,en;q=0.9",
-    "Accept-Encoding": "gzip, deflate",
-    "DNT": "1",
-    "Connection": "keep-alive",
-    "Upgrade-Insecure-Requests": "1",
-    "Sec-Fetch-Dest": "document",
-    "Sec-Fetch-Mode": "navigate",
-    "Sec-Fetch-Site": "none",
-    "Cache-Control": "max-age=0",
-}
-
 EXCEL_FILE = str(SCRIPT_DIR / "sheep_wars_stats.xlsx")
 SHEET_NAME = "Sheep Wars historical data"
 PROXY_CACHE_FILE = str(SCRIPT_DIR / "proxy_cache.json")
 PROXYSCRAPE_API_KEY = os.environ.get("PROXYSCRAPE_API_KEY") or os.environ.get("PROXYSCRAPE_KEY") or "f3g7edlwjly872gzdaai"
 
+STAT_NAMES = ["Kills", "Deaths", "K/D", "Wins", "Losses", "W/L"]
+
+# -------------------
+# CLI arguments
+# -------------------
+def build_parser():
+    parser = argparse.ArgumentParser(description="Fetch Sheep Wars stats")
+    parser.add_argument("-ign", "--username", dest="usernames", action="append", default=[],
+                        help="Minecraft IGN (repeat for a batch)")
+    parser.add_argument("--from-file", help="Batch: read IGNs from a file, one per line (e.g. tracked_users.txt)")
+    parser.add_argument("-concurrency", type=int, default=4, help="Batch: pages fetched at once (default 4)")
+    parser.add_argument("-summary", help="Batch: also write the JSON summary to this file")
+    parser.add_argument("-nolifetime", action="store_true", help="Don't update all-time stats in player sheet")
+    parser.add_argument("-session", action="store_true", help="Log snapshot into Session Start section")
+    parser.add_argument("-daily", action="store_true", help="Log snapshot into Daily Stats section")
+    parser.add_argument("-weekly", action="store_true", help="Log snapshot into Weekly Stats section")
+    parser.add_argument("-monthly", action="store_true", help="Log snapshot into Monthly Stats section")
+    parser.add_argument("-refresh", action="store_true", help="Refresh all stats with deltas from snapshots")
+    parser.add_argument("-proxy", action="store_true", help="Use proxy rotation from ProxyScrape")
+    parser.add_argument("-noproxy", action="store_true", help="Disable proxies (direct connection only)")
+    parser.add_argument("-profile", action="store_true", help="Write cProfile + tracemalloc reports to profiles/")
+    parser.add_argument("-onboard", action="store_true",
+                        help="New player: create their sheet and take every snapshot from one fetch and one save")
+    parser.add_argument("-force", action="store_true", help="Write even if the stats haven't changed since the last write")
+    parser.add_argument("-hedge", action="store_true", default=os.environ.get("SHEEPWARS_HEDGE") == "1",
+                        help="Back up slow fetches through a second route (see hedging.py; default: SHEEPWARS_HEDGE=1)")
+    parser.add_argument("-source", choices=SOURCES, default=DEFAULT_SOURCE if DEFAULT_SOURCE in SOURCES else "plancke",
+                        help="Where stats come from (default: SHEEPWARS_STATS_SOURCE or plancke)")
+    return parser
+
+
+def build_headers():
+    return {
+        "User-Agent": random.choice(USER_AGENTS),
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.9",
+        "Accept-Encoding": "gzip, deflate",
+        "DNT": "1",
+        "Connection": "keep-alive",
+        "Upgrade-Insecure-Requests": "1",
+        "Sec-Fetch-Dest": "document",
+        "Sec-Fetch-Mode": "navigate",
+        "Sec-Fetch-Site": "none",
+        "Cache-Control": "max-age=0",
+    }
+
+
+def preload(*modules):
+    """Import modules on a background thread while the main thread waits on the network."""
+    def run():
+        import importlib
+        for name in modules:
+            try:
+                importlib.import_module(name)
+            except Exception:
+                pass
+    thread = threading.Thread(target=run, name="preload", daemon=True)
+    thread.start()
+    return thread
+
 # -------------------
 # Proxy Management
 # -------------------
 def fetch_proxies_from_proxyscrape():
     """Fetch proxies, preferring ProxyScrape with API key; fallback to free sources"""
+    import requests
+
     try:
         print("[PROXY] Fetching proxies...")
 
@@ -151,6 +187,8 @@ def save_proxy_cache(proxies):
 
 def test_proxy(proxy, test_url="https://httpbin.org/ip", timeout=10):
     """Test if a proxy supports HTTPS CONNECT by performing an HTTPS request."""
+    import requests
+
     try:
         proxy_dict = {
             'http': f'http://{proxy}',
@@ -197,29 +235,47 @@ def get_working_proxies(max_test=30):
         save_proxy_cache(working)
     return working
 
-# Initialize proxy pool if enabled
-PROXY_POOL = []
-if args.proxy and not args.noproxy:
-    PROXY_POOL = get_working_proxies()
-    if PROXY_POOL:
-        print(f"[PROXY] Ready with {len(PROXY_POOL)} working proxies")
+def build_proxy_pool():
+    """Discover and test proxies (only called with -proxy)."""
+    with span("proxy.pool") as pool_span:
+        pool = get_working_proxies()
+        pool_span.tag(pool_size=len(pool))
+    if pool:
+        print(f"[PROXY] Ready with {len(pool)} working proxies")
     else:
         print("[PROXY] No working proxies found, will use direct connection")
+    return pool
 
 # -------------------
 # Fetch page with retry logic
 # -------------------
-def fetch_with_retry(url, headers, max_retries=3, initial_delay=2, use_proxies=True, request_timeout=20):
-    """Fetch URL with exponential backoff retry logic and optional proxy rotation"""
+# Random pause before the first attempt so requests don't look scripted
+FIRST_ATTEMPT_JITTER = (0.5, 2.0)
+
+def fetch_with_retry(url, headers, max_retries=3, initial_delay=2, use_proxies=True, request_timeout=20, proxy_pool=(),
+                     session=None, hedge=None):
+    """Fetch URL with exponential backoff retry logic and optional proxy rotation.
+
+    Pass `session` to reuse one connection pool across calls (batch mode);
+    it is left open. Without it a session is made and closed here. Pass a
+    hedging.HedgePolicy as `hedge` to back up slow attempts through another
+    route (see hedging.py).
+    """
+    import requests
+
     # Create a session for better request handling
-    session = requests.Session()
-    proxies_to_try = PROXY_POOL.copy() if (use_proxies and PROXY_POOL) else [None]
-    
+    own_session = session is None
+    if own_session:
+        session = requests.Session()
+    proxies_to_try = list(proxy_pool) if (use_proxies and proxy_pool) else [None]
+    # Span of the caller; attempts, proxy and bytes are reported on it
+    outer_span = tracing.current()
+
     for attempt in range(max_retries):
         # Rotate through proxies
         proxy = None
         proxy_dict = None
-        
+
         if proxies_to_try and proxies_to_try[0] is not None:
             proxy = random.choice(proxies_to_try)
             proxy_dict = {
@@ -227,234 +283,364 @@ def fetch_with_retry(url, headers, max_retries=3, initial_delay=2, use_proxies=T
                 'https': f'http://{proxy}'
             }
             print(f"  Using proxy: {proxy}")
-        
-        try:
-            # Random delay between requests
-            if attempt > 0:
-                delay = initial_delay * (2 ** attempt) + random.uniform(0, 1)
-                print(f"  Retry {attempt}/{max_retries} - waiting {delay:.1f}s...")
-                time.sleep(delay)
-            else:
-                # Small random delay even on first attempt to appear more human
-                time.sleep(random.uniform(0.5, 2.0))
-            
-            # Rotate User-Agent on each attempt and add Referer
-            request_headers = headers.copy()
-            request_headers["User-Agent"] = random.choice(USER_AGENTS)
-            request_headers["Referer"] = "https://www.google.com/"
-            
-            response = session.get(url, headers=request_headers, proxies=proxy_dict, timeout=request_timeout)
-            response.raise_for_status()
-            return response
-            
-        except requests.exceptions.RequestException as e:
-            print(f"  Request failed: {e}")
-            
-            # If proxy failed, remove it from the list and try another
-            if proxy and proxy in proxies_to_try:
-                proxies_to_try.remove(proxy)
-                print(f"  Removing failed proxy: {proxy}")
-            
-            # If no more proxies or on last attempt, try direct connection
-            if not proxies_to_try or attempt == max_retries - 1:
-                if proxy_dict:  # We were using proxies, try direct now
-                    print("  Trying direct connection...")
-                    proxies_to_try = [None]
-                    continue
+
+        with span("fetch.attempt", attempt=attempt + 1, proxy=proxy or "direct") as attempt_span:
+            try:
+                # Random delay between requests
+                if attempt > 0:
+                    delay = initial_delay * (2 ** attempt) + random.uniform(0, 1)
+                    print(f"  Retry {attempt}/{max_retries} - waiting {delay:.1f}s...")
+                    with span("fetch.backoff", seconds=round(delay, 2)):
+                        time.sleep(delay)
                 else:
-                    raise
-        finally:
-            session.close()
-    
+                    # Small random delay even on first attempt to appear more human
+                    with span("fetch.jitter"):
+                        time.sleep(random.uniform(*FIRST_ATTEMPT_JITTER))
+
+                # Rotate User-Agent on each attempt and add Referer
+                request_headers = headers.copy()
+                request_headers["User-Agent"] = random.choice(USER_AGENTS)
+                request_headers["Referer"] = "https://www.google.com/"
+
+                with span("fetch.http") as http_span:
+                    if hedge is not None:
+                        from hedging import hedged_get
+
+                        # Backup routes: the other proxies, then direct (a second direct
+                        # request on a fresh connection when this attempt is direct)
+                        others = [p for p in proxies_to_try if p is not None and p != proxy]
+                        random.shuffle(others)
+                        response, route, hedged = hedged_get(hedge, session, url, request_headers, proxy,
+                                                             others + [None], request_timeout)
+                        if hedged:
+                            http_span.tag(hedged=True)
+                            proxy = route
+                    else:
+                        response = session.get(url, headers=request_headers, proxies=proxy_dict, timeout=request_timeout)
+                    http_span.tag(http_status=response.status_code, bytes=len(response.content))
+                response.raise_for_status()
+                outer_span.tag(attempts=attempt + 1, proxy=proxy or "direct", bytes=len(response.content))
+                return response
+
+            except requests.exceptions.RequestException as e:
+                print(f"  Request failed: {e}")
+                attempt_span.fail(e)
+                outer_span.tag(attempts=attempt + 1)
+
+                # If proxy failed, remove it from the list and try another
+                if proxy and proxy in proxies_to_try:
+                    proxies_to_try.remove(proxy)
+                    print(f"  Removing failed proxy: {proxy}")
+
+                # If no more proxies or on last attempt, try direct connection
+                if not proxies_to_try or attempt == max_retries - 1:
+                    if proxy_dict:  # We were using proxies, try direct now
+                        print("  Trying direct connection...")
+                        proxies_to_try = [None]
+                        continue
+                    else:
+                        raise
+            finally:
+                if own_session:
+                    session.close()
+
     return None
 
-response = fetch_with_retry(URL, HEADERS)
-if response is None:
-    raise RuntimeError("Network fetch failed after retries (proxies + direct). Try again later or use -noproxy.")
-# requests handles gzip automatically with response.text
-soup = BeautifulSoup(response.text, "html.parser")
+# Fails plancke fetches fast while plancke.io is down (see circuit_breaker.py)
+PLANCKE_BREAKER = CircuitBreaker("plancke.io")
+
 
-text = soup.get_text("\n")
+def upstream_failed(error) -> bool:
+    """True if a fetch error means plancke.io itself is failing, not e.g. a missing page."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return True  # connection error or timeout
+    return response.status_code >= 500 or response.status_code in (403, 429)
 
 # -------------------
 # Extract stats
 # -------------------
-pattern = re.compile(
-    r"Sheep Wars.*?"
-    r"Wins:\s*([\d,]+).*?"
-    r"Losses:\s*([\d,]+).*?"
-    r"W/L:\s*([\d.]+).*?"
-    r"Kills:\s*([\d,]+).*?"
-    r"Deaths:\s*([\d,]+).*?"
-    r"K/D:\s*([\d.]+)",
-    re.S
-)
-
-match = pattern.search(text)
-
-if not match:
-    print(f"[ERROR] Sheep Wars stats NOT found for {USERNAME}")
-    print(f"[DEBUG] Page length: {len(text)} characters")
-    print(f"[DEBUG] First 500 chars of page:")
-    print(text[:500])
-    idx = text.find("Sheep Wars")
-    if idx != -1:
-        print(f"\n[DEBUG] Found 'Sheep Wars' at position {idx}")
-        print(text[idx:idx + 800])
-    else:
-        print(f"\n[DEBUG] 'Sheep Wars' text not found in page")
-    raise RuntimeError("Extraction failed")
+def parse_stats(html, username, archived=None):
+    """Page HTML -> dict of raw stat strings (see stats_parser.extract_stats).
 
-wins, losses, wl, kills, deaths, kd = match.groups()
+    `archived` is the page's sha256 in the page archive, named when extraction fails.
+    """
+    from stats_parser import page_text, extract_stats
 
-# Extract Wool and Level (separate from Sheep Wars stats)
-wool_pattern = re.compile(r"Wool:\s*([\d,]+)", re.S)
-# Prefer the Level that appears immediately after the Wool stat (the Sheep Wars level),
-# fall back to the first Level match if not found.
-level_pattern = re.compile(r"Level:\s*([\d,]+)", re.S)
+    with span("parse.soup", bytes=len(html)):
+        text = page_text(html)
 
-wool_match = wool_pattern.search(text)
-level_match = None
+    with span("parse.extract"):
+        stats = extract_stats(text)
 
-if wool_match:
-    # Look for a Level entry after the Wool line (within a reasonable window)
-    level_after_wool = level_pattern.search(text, wool_match.end())
-    if level_after_wool:
-        level_match = level_after_wool
+    if stats is None:
+        print(f"[ERROR] Sheep Wars stats NOT found for {username}")
+        print(f"[DEBUG] Page length: {len(text)} characters")
+        print(f"[DEBUG] First 500 chars of page:")
+        print(text[:500])
+        idx = text.find("Sheep Wars")
+        if idx != -1:
+            print(f"\n[DEBUG] Found 'Sheep Wars' at position {idx}")
+            print(text[idx:idx + 800])
+        else:
+            print(f"\n[DEBUG] 'Sheep Wars' text not found in page")
+        if archived:
+            print(f"[DEBUG] Full page archived as {archived} (python page_archive.py -show {archived})")
+        raise RuntimeError("Extraction failed")
+    return stats
 
-# Fallback to the first Level match anywhere in the page
-if level_match is None:
-    level_match = level_pattern.search(text)
 
-wool = wool_match.group(1) if wool_match else "0"
-level = level_match.group(1) if level_match else "0"
+def resolve_identity(identities, username, session=None):
+    """UUID for username (cached, else one Mojang lookup), or None if it can't be looked up right now.
 
-# -------------------
-# Terminal output
-# -------------------
-if not args.nolifetime:
-    print(f"[OK] Sheep Wars stats extracted for {USERNAME}:")
-    print(f"  Wins   : {wins}")
-    print(f"  Losses : {losses}")
-    print(f"  W/L    : {wl}")
-    print(f"  Kills  : {kills}")
-    print(f"  Deaths : {deaths}")
-    print(f"  K/D    : {kd}")
-    print(f"  Wool   : {wool}")
-    print(f"  Level  : {level}")
+    Raises if Mojang says no account has this name, so a renamed or
+    mistyped player fails fast instead of retrying the fetch.
+    """
+    try:
+        uuid = identities.resolve(username, session)
+    except Exception as e:
+        print(f"[IDENTITY] Could not resolve {username}, fetching by name: {e}")
+        return None
+    if uuid is None:
+        raise RuntimeError(f"No Minecraft account is named {username} (renamed?)")
+    return uuid
 
-# -------------------
-# Prepare Excel row
-# -------------------
-headers = ["Date/Time", "Username", "Kills", "Deaths", "K/D", "Wins", "Losses", "W/L"]
-
-row = [
-    datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-    USERNAME,
-    int(kills.replace(",", "")),
-    int(deaths.replace(",", "")),
-    float(kd),
-    int(wins.replace(",", "")),
-    int(losses.replace(",", "")),
-    float(wl),
-]
 
-# -------------------
-# Create or load workbook
-# -------------------
-if os.path.exists(EXCEL_FILE):
-    wb = load_workbook(EXCEL_FILE)
-else:
-    wb = Workbook()
+def require_current_name(identities, username):
+    """Make sure `username` is someone's current name before onboarding it.
 
-# -------------------
-# Create or select sheet
-# -------------------
-if SHEET_NAME in wb.sheetnames:
-    ws = wb[SHEET_NAME]
-else:
-    ws = wb.active
-    ws.title = SHEET_NAME
-    ws.append(headers)  # write headers once
+    A former name is never followed here: its old owner already has a
+    sheet, and onboarding would replace it. Resolving the name also maps
+    it to whoever holds it now, so the fetch goes to them.
+    """
+    try:
+        uuid = identities.resolve(username, follow_aliases=False)
+    except Exception as e:
+        # The fetch then goes by name too, which plancke answers for whoever has it now
+        print(f"[IDENTITY] Could not resolve {username}, fetching by name: {e}")
+        return
+    if uuid is None:
+        raise RuntimeError(f"No Minecraft account is named {username}")
 
-# -------------------
-# Append row
-# -------------------
-ws.append(row)
 
-def find_sheet_case_insensitive(workbook, name):
-    key = name.casefold()
-    for s in workbook.sheetnames:
-        if s.casefold() == key:
-            return s
-    return None
+class PlanckeSource(StatsSource):
+    """The plancke.io scraper: fetch_with_retry (proxies, backoff) + parse_stats.
+
+    Players with a known UUID are fetched by UUID, which plancke accepts
+    too, so the page is found whatever the player is called now.
+    """
+    name = "plancke"
+
+    def __init__(self, session=None, proxy_pool=(), identities=None, hedge=False):
+        from identity import IdentityCache
+
+        self.session = session
+        self.proxy_pool = proxy_pool
+        self.identities = identities if identities is not None else IdentityCache(path=None)
+        if hedge:
+            from hedging import HedgePolicy
+            self.hedge = HedgePolicy()
+        else:
+            self.hedge = None
+
+    def prepare(self, usernames):
+        try:
+            self.identities.resolve_many(usernames, self.session)
+        except Exception as e:
+            print(f"[IDENTITY] Bulk lookup failed: {e}")
+
+    def fetch(self, username):
+        uuid = resolve_identity(self.identities, username, self.session)
+        url = f"{PLANCKE_BASE_URL}/hypixel/player/stats/{uuid or quote(username)}"
+        PLANCKE_BREAKER.check()
+        with span("fetch"):
+            try:
+                response = fetch_with_retry(url, build_headers(), proxy_pool=self.proxy_pool, session=self.session,
+                                            hedge=self.hedge)
+            except Exception as e:
+                if upstream_failed(e):
+                    PLANCKE_BREAKER.record_failure()
+                else:
+                    PLANCKE_BREAKER.record_success()  # plancke answered, just not with a page
+                raise
+        if response is None:
+            PLANCKE_BREAKER.record_failure()
+            raise RuntimeError("Network fetch failed after retries (proxies + direct). Try again later or use -noproxy.")
+        PLANCKE_BREAKER.record_success()
+        # Kept for offline re-extraction and debugging, see page_archive.py
+        with span("archive"):
+            archived = archive_page(username, response.content, self.identities)
+        # requests handles gzip automatically with response.text
+        return parse_stats(response.text, username, archived)
+
+    def close(self):
+        if self.hedge is not None:
+            self.hedge.save()
+
+
+class ArchiveSource(StatsSource):
+    """Each player's latest page from the page archive: re-extraction with no network."""
+    name = "archive"
+
+    def __init__(self, identities=None):
+        from identity import IdentityCache
+        from page_archive import PageArchive
 
+        self.archive = PageArchive()
+        self.identities = identities if identities is not None else IdentityCache(path=None)
+
+    def fetch(self, username):
+        from refresh_state import player_key
+
+        page = self.archive.latest(player_key(username, self.identities))
+        if page is None:
+            raise RuntimeError(f"No archived page for {username}")
+        hours = (time.time() - page["t"]) / 3600
+        print(f"[INFO] {username}: using the page archived {hours:.1f}h ago ({page['sha'][:12]})")
+        with span("archive.load"):
+            html = self.archive.load(page["sha"])
+        return parse_stats(html, username, page["sha"])
+
+
+def make_source(args, session=None, proxy_pool=(), identities=None):
+    if args.source == "hypixel":
+        from stats_source import HypixelApiSource
+        return HypixelApiSource(session=session, identities=identities)
+    if args.source == "archive":
+        return ArchiveSource(identities=identities)
+    return PlanckeSource(session=session, proxy_pool=proxy_pool, identities=identities, hedge=args.hedge)
+
+
+def wants_proxies(args):
+    # The API is keyed and rate limited per key, so proxies only help the scraper
+    return args.source == "plancke" and args.proxy and not args.noproxy
+
+
+def print_stats(username, stats):
+    print(f"[OK] Sheep Wars stats extracted for {username}:")
+    print(f"  Wins   : {stats['wins']}")
+    print(f"  Losses : {stats['losses']}")
+    print(f"  W/L    : {stats['wl']}")
+    print(f"  Kills  : {stats['kills']}")
+    print(f"  Deaths : {stats['deaths']}")
+    print(f"  K/D    : {stats['kd']}")
+    print(f"  Wool   : {stats['wool']}")
+    print(f"  Level  : {stats['level']}")
+    print(f"  Damage : {stats['damage']}")
+    print(f"  CTW    : {stats['ctw_wins']} W / {stats['ctw_losses']} L, {stats['ctw_kills']} K / {stats['ctw_deaths']} D")
+
+
+def stat_values(stats):
+    """[kills, deaths, kd, wins, losses, wl] as numbers, in STAT_NAMES order."""
+    return [
+        int(stats["kills"].replace(",", "")),
+        int(stats["deaths"].replace(",", "")),
+        float(stats["kd"]),
+        int(stats["wins"].replace(",", "")),
+        int(stats["losses"].replace(",", "")),
+        float(stats["wl"]),
+    ]
 
 # -------------------
-# Update player's personal sheet (All-time stats)
+# Workbook updates
 # -------------------
-# Prepare a snapshot cache so refresh can prefer pre-write snapshots
-snapshot_cache = {}
-found = find_sheet_case_insensitive(wb, USERNAME)
-if found:
-    player_ws = wb[found]
-    
-    # --- Cache existing snapshots before we write any new ones ---
-    def _read_snapshot_local(start_row):
-        stat_names_local = ["Kills", "Deaths", "K/D", "Wins", "Losses", "W/L"]
-        out_local = {}
-        for i_local, name_local in enumerate(stat_names_local):
-            val_local = player_ws[f"E{start_row + i_local}"].value
-            if val_local is None:
-                return None
-            out_local[name_local] = val_local
-        return out_local
+def append_history(wb, username, stats):
+    """Append one row to the historical sheet, creating it if needed."""
+    headers = ["Date/Time", "Username", "Kills", "Deaths", "K/D", "Wins", "Losses", "W/L"]
+    row = [datetime.now().strftime("%Y-%m-%d %H:%M:%S"), username, *stat_values(stats)]
+
+    if SHEET_NAME in wb.sheetnames:
+        ws = wb[SHEET_NAME]
+    else:
+        from sheet_index import rename_sheet
+
+        ws = wb.active
+        rename_sheet(wb, ws, SHEET_NAME)
+        ws.append(headers)  # write headers once
+    ws.append(row)
+
+
+def _read_snapshot_local(player_ws, start_row):
+    out_local = {}
+    for i_local, name_local in enumerate(STAT_NAMES):
+        val_local = player_ws[f"E{start_row + i_local}"].value
+        if val_local is None:
+            return None
+        out_local[name_local] = val_local
+    return out_local
+
+
+def write_section_snapshot(player_ws, header_row, data_start_row, vals):
+    """Write snapshot values into D/E of one section (title cells are left alone)."""
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
+    # ensure headers exist (Snapshot / Value) and are styled
+    header_fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
+    header_font_local = Font(bold=True)
+    # write column headers (do not touch merged title cells)
+    player_ws[f"D{header_row}"].value = "Snapshot"
+    player_ws[f"E{header_row}"].value = "Value"
+    player_ws[f"D{header_row}"].font = header_font_local
+    player_ws[f"E{header_row}"].font = header_font_local
+    player_ws[f"D{header_row}"].fill = header_fill
+    player_ws[f"E{header_row}"].fill = header_fill
+    player_ws[f"D{header_row}"].alignment = Alignment(horizontal="center", vertical="center")
+    player_ws[f"E{header_row}"].alignment = Alignment(horizontal="center", vertical="center")
+    player_ws[f"D{header_row}"].border = Border(left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"), bottom=Side(style="thin"))
+    player_ws[f"E{header_row}"].border = Border(left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"), bottom=Side(style="thin"))
+
+    for idx, stat_name in enumerate(STAT_NAMES):
+        r = data_start_row + idx
+        player_ws[f"D{r}"] = stat_name
+        player_ws[f"E{r}"] = vals[idx]
+
+        # apply simple formatting
+        cell_d = player_ws[f"D{r}"]
+        cell_e = player_ws[f"E{r}"]
+        cell_d.alignment = Alignment(horizontal="center", vertical="center")
+        cell_e.alignment = Alignment(horizontal="center", vertical="center")
+        cell_d.border = Border(left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"), bottom=Side(style="thin"))
+        cell_e.border = Border(left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"), bottom=Side(style="thin"))
+
+
+def update_player_sheet(player_ws, username, stats, args):
+    """All-time values, session deltas and requested snapshots for one player.
+
+    Returns the snapshots as they were before this run wrote any (for -refresh).
+    """
+    from sheet_layout import write_wool_games_extras
+    from stats_parser import to_record
 
+    vals = stat_values(stats)
+    current_kills, current_deaths, _kd, current_wins, current_losses, _wl = vals
+
+    # --- Cache existing snapshots before we write any new ones ---
     snapshot_cache = {
-        "Session": _read_snapshot_local(3),
-        "Daily": _read_snapshot_local(12),
-        "Weekly": _read_snapshot_local(21),
-        "Monthly": _read_snapshot_local(30),
+        "Session": _read_snapshot_local(player_ws, 3),
+        "Daily": _read_snapshot_local(player_ws, 12),
+        "Weekly": _read_snapshot_local(player_ws, 21),
+        "Monthly": _read_snapshot_local(player_ws, 30),
     }
-    
+
     # Update All-time stats if not disabled
     if not args.nolifetime:
-        # Find the "All-time Stats" table and update its values
-        # Tables start at row 1 with structure: Title, Headers, then 6 stat rows
-        # Session (rows 1-9), Daily (rows 11-19), Weekly (rows 21-29), Monthly (rows 31-39), All-time (rows 37-45)
-        
-        all_time_start_row = 37  # All-time Stats section starts at row 37
-        all_time_data_start_row = all_time_start_row + 2  # Data rows start after title and headers
-        
-        # Map stat names to row offsets and values
-        stat_mapping = {
-            "Kills": (all_time_data_start_row, int(kills.replace(",", ""))),
-            "Deaths": (all_time_data_start_row + 1, int(deaths.replace(",", ""))),
-            "K/D": (all_time_data_start_row + 2, float(kd)),
-            "Wins": (all_time_data_start_row + 3, int(wins.replace(",", ""))),
-            "Losses": (all_time_data_start_row + 4, int(losses.replace(",", ""))),
-            "W/L": (all_time_data_start_row + 5, float(wl)),
-        }
-        
-        # Update the values in column B
-        for stat_name, (row_num, value) in stat_mapping.items():
-            player_ws[f"B{row_num}"] = value
-        
+        # All-time Stats: title row 37, headers 38, data rows 39-44 (column B)
+        all_time_data_start_row = 39
+        for i, value in enumerate(vals):
+            player_ws[f"B{all_time_data_start_row + i}"] = value
+
         # Update Wool and Level in D39 and D40
-        player_ws["D39"] = int(wool.replace(",", ""))
-        player_ws["D40"] = int(level.replace(",", ""))
-        
-        if not args.nolifetime:
-            print(f"[OK] All-time stats updated in sheet '{USERNAME}'")
-            print(f"[OK] Wool: {wool}, Level: {level} saved to D39:D40")
-    else:
-        if not args.nolifetime:
-            print(f"[SKIP] Skipped all-time stats update (-nolifetime flag)")
-    
+        player_ws["D39"] = int(stats["wool"].replace(",", ""))
+        player_ws["D40"] = int(stats["level"].replace(",", ""))
+
+        # Damage Dealt and Capture the Wool come from the same page
+        write_wool_games_extras(player_ws, to_record(stats))
+
+        print(f"[OK] All-time stats updated in sheet '{username}'")
+        print(f"[OK] Wool: {stats['wool']}, Level: {stats['level']} saved to D39:D40")
+        print(f"[OK] Damage Dealt and Capture the Wool stats saved to D41, H39:H44")
+
     # Update Session stats (calculate difference from snapshot)
-    session_data_start_row = 3  # Session stats data rows start at row 3
-    
-    # Check if snapshot exists
     if player_ws["E3"].value is not None:
         snapshot_values = {
             "Kills": player_ws["E3"].value,
@@ -464,13 +650,8 @@ if found:
             "Losses": player_ws["E7"].value,
             "W/L": player_ws["E8"].value,
         }
-        
-        # Calculate session stats as deltas (current - snapshot)
-        current_kills = int(kills.replace(",", ""))
-        current_deaths = int(deaths.replace(",", ""))
-        current_wins = int(wins.replace(",", ""))
-        current_losses = int(losses.replace(",", ""))
 
+        # Calculate session stats as deltas (current - snapshot)
         session_kills = (current_kills - (snapshot_values["Kills"] or 0)) or 0
         session_deaths = (current_deaths - (snapshot_values["Deaths"] or 0)) or 0
         session_wins = (current_wins - (snapshot_values["Wins"] or 0)) or 0
@@ -486,7 +667,7 @@ if found:
             session_wl = round(session_wins / session_losses, 2)
         else:
             session_wl = float(session_wins) if session_wins else 0.0
-        
+
         # Update session stats in column B (rows 3-8)
         player_ws["B3"] = session_kills
         player_ws["B4"] = session_deaths
@@ -494,205 +675,426 @@ if found:
         player_ws["B6"] = session_wins
         player_ws["B7"] = session_losses
         player_ws["B8"] = session_wl
-        
+
         if not args.nolifetime:
-            print(f"[OK] Session stats updated for '{USERNAME}'")
+            print(f"[OK] Session stats updated for '{username}'")
     else:
         # No snapshot found - create it automatically using current all-time stats
         if not args.nolifetime:
             print(f"[INFO] No session snapshot found. Creating one now...")
             # Write snapshot to D3:E8 (row 1 is title, row 2 is headers)
-            snapshot_vals = [
-                int(kills.replace(",", "")),
-                int(deaths.replace(",", "")),
-                float(kd),
-                int(wins.replace(",", "")),
-                int(losses.replace(",", "")),
-                float(wl),
-            ]
-            stat_names = ["Kills", "Deaths", "K/D", "Wins", "Losses", "W/L"]
-            for idx, stat_name in enumerate(stat_names):
+            for idx, stat_name in enumerate(STAT_NAMES):
                 r = 3 + idx  # Data starts at row 3
                 player_ws[f"D{r}"] = stat_name
-                player_ws[f"E{r}"] = snapshot_vals[idx]
-            print(f"[OK] Session snapshot created for '{USERNAME}'")
-
-    # -------------------
-    # Helper: ensure snapshot table exists and write values into D/E for a given section
-    # -------------------
-    def write_section_snapshot(title_row, header_row, data_start_row, title_text):
-        # Only write snapshot data rows into D/E to avoid touching merged title/header cells.
-        # ensure headers exist (Snapshot / Value) and are styled
-        header_fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
-        header_font_local = Font(bold=True)
-        # write column headers (do not touch merged title cells)
-        player_ws[f"D{header_row}"].value = "Snapshot"
-        player_ws[f"E{header_row}"].value = "Value"
-        player_ws[f"D{header_row}"].font = header_font_local
-        player_ws[f"E{header_row}"].font = header_font_local
-        player_ws[f"D{header_row}"].fill = header_fill
-        player_ws[f"E{header_row}"].fill = header_fill
-        player_ws[f"D{header_row}"].alignment = Alignment(horizontal="center", vertical="center")
-        player_ws[f"E{header_row}"].alignment = Alignment(horizontal="center", vertical="center")
-        player_ws[f"D{header_row}"].border = Border(left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"), bottom=Side(style="thin"))
-        player_ws[f"E{header_row}"].border = Border(left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"), bottom=Side(style="thin"))
-
-        vals = [
-            int(kills.replace(",", "")),
-            int(deaths.replace(",", "")),
-            float(kd),
-            int(wins.replace(",", "")),
-            int(losses.replace(",", "")),
-            float(wl),
-        ]
-
-        stat_names = ["Kills", "Deaths", "K/D", "Wins", "Losses", "W/L"]
-        for idx, stat_name in enumerate(stat_names):
-            r = data_start_row + idx
-            player_ws[f"D{r}"] = stat_name
-            player_ws[f"E{r}"] = vals[idx]
-
-            # apply simple formatting
-            cell_d = player_ws[f"D{r}"]
-            cell_e = player_ws[f"E{r}"]
-            cell_d.alignment = Alignment(horizontal="center", vertical="center")
-            cell_e.alignment = Alignment(horizontal="center", vertical="center")
-            cell_d.border = Border(left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"), bottom=Side(style="thin"))
-            cell_e.border = Border(left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"), bottom=Side(style="thin"))
+                player_ws[f"E{r}"] = vals[idx]
+            print(f"[OK] Session snapshot created for '{username}'")
 
     # Write snapshots to requested sections
     if args.session:
         # Session Start at row 1, headers 2, data 3-8
-        write_section_snapshot(1, 2, 3, "Session Start")
+        write_section_snapshot(player_ws, 2, 3, vals)
     if args.daily:
         # Daily title at row 10, headers 11, data 12-17
-        write_section_snapshot(10, 11, 12, "Daily Start")
+        write_section_snapshot(player_ws, 11, 12, vals)
     if args.weekly:
         # Weekly title at row 19, headers 20, data 21-26
-        write_section_snapshot(19, 20, 21, "Weekly Start")
+        write_section_snapshot(player_ws, 20, 21, vals)
     if args.monthly:
         # Monthly title at row 28, headers 29, data 30-35
-        write_section_snapshot(28, 29, 30, "Monthly Start")
+        write_section_snapshot(player_ws, 29, 30, vals)
 
-else:
-    if not args.nolifetime:
-        print(f"[WARNING] Sheet '{USERNAME}' not found. Create it first with player_stats.py")
+    return snapshot_cache
 
-# -------------------
-# Refresh: Compute deltas and write into column B (if -refresh flag set)
-# -------------------
-if args.refresh and USERNAME in wb.sheetnames:
-    player_ws = wb[USERNAME]
-    
-    # helper to get snapshot values: prefer cached snapshots captured earlier
-    def read_snapshot(start_row, period_name=None):
-        if period_name is not None:
-            try:
-                cached = snapshot_cache.get(period_name)
-                if cached is not None:
-                    return cached
-            except NameError:
-                # snapshot_cache not defined; fall back to reading sheet
-                pass
 
-        stat_names = ["Kills", "Deaths", "K/D", "Wins", "Losses", "W/L"]
-        out = {}
-        for i, name in enumerate(stat_names):
-            val = player_ws[f"E{start_row + i}"].value
-            if val is None:
-                return None
-            out[name] = val
-        return out
-    
-    # read current all-time values from B (rows 39-44)
-    stat_names = ["Kills", "Deaths", "K/D", "Wins", "Losses", "W/L"]
-    all_time_start_row = 39
-    all_time = {}
-    for i, name in enumerate(stat_names):
-        all_time[name] = player_ws[f"B{all_time_start_row + i}"].value or 0
-    
-    # periods: (snapshot_start_row, target_start_row)
-    periods = {
-        "Session": (3, 3),
-        "Daily": (12, 12),
-        "Weekly": (21, 21),
-        "Monthly": (30, 30),
-    }
+def open_workbook(profile=None):
+    from openpyxl import Workbook, load_workbook
 
-    # --- Extra: ensure Daily deltas B12:B17 are updated by reading E12:E17 directly ---
-    try:
-        # Read snapshot values from E12:E17 (tolerate missing/None by treating as 0)
-        raw_snap = {}
-        for i, name in enumerate(stat_names):
-            raw_snap[name] = player_ws[f"E{12 + i}"].value or 0
-
-        # compute deltas
-        kills_delta = (all_time.get("Kills", 0) or 0) - (raw_snap.get("Kills", 0) or 0)
-        deaths_delta = (all_time.get("Deaths", 0) or 0) - (raw_snap.get("Deaths", 0) or 0)
-        wins_delta = (all_time.get("Wins", 0) or 0) - (raw_snap.get("Wins", 0) or 0)
-        losses_delta = (all_time.get("Losses", 0) or 0) - (raw_snap.get("Losses", 0) or 0)
-
-        # write counts and ratios into B12:B17
-        player_ws[f"B{12 + 0}"] = kills_delta
-        player_ws[f"B{12 + 1}"] = deaths_delta
-        if deaths_delta and deaths_delta != 0:
-            kd_ratio = kills_delta / deaths_delta
-        else:
-            kd_ratio = float(kills_delta) if kills_delta else 0.0
-        player_ws[f"B{12 + 2}"] = round(kd_ratio, 2)
-        player_ws[f"B{12 + 3}"] = wins_delta
-        player_ws[f"B{12 + 4}"] = losses_delta
-        if losses_delta and losses_delta != 0:
-            wl_ratio = wins_delta / losses_delta
+    with span("workbook.load"):
+        if os.path.exists(EXCEL_FILE):
+            wb = load_workbook(EXCEL_FILE)
         else:
-            wl_ratio = float(wins_delta) if wins_delta else 0.0
-        player_ws[f"B{12 + 5}"] = round(wl_ratio, 2)
-    except Exception:
-        # if anything goes wrong, fall back to normal refresh loop below
-        pass
-    
-    for period, (snap_row, target_row) in periods.items():
-        snap = read_snapshot(snap_row, period)
-        if snap is None:
+            wb = Workbook()
+    if profile:
+        profile.checkpoint("workbook loaded")
+    return wb
+
+
+def save_workbook(wb, args, profile=None):
+    if profile:
+        profile.checkpoint("before save")
+    with span("workbook.save"):
+        wb.save(EXCEL_FILE)
+
+    if not args.nolifetime:
+        print(f"[DATA] Data written to {EXCEL_FILE}")
+
+
+def renamed_to(identities, username):
+    """The player's new name if they changed it since `username` was tracked, else None."""
+    if identities is None:
+        return None
+    current = identities.current_name(username)
+    return current if current.casefold() != username.casefold() else None
+
+
+def adopt_sheet(wb, player_ws, username, identities):
+    """Rename a sheet made under a former name to the player's current name."""
+    from sheet_index import find_sheet, rename_sheet
+
+    current = identities.current_name(username)
+    if player_ws.title.casefold() == current.casefold() or find_sheet(wb, current) is not None:
+        return
+    print(f"[IDENTITY] Sheet '{player_ws.title}' renamed to '{current}' (name change)")
+    rename_sheet(wb, player_ws, current)
+
+
+def history_samples(wb, names, since):
+    """[(t, [kills, deaths, kd, wins, losses, wl]), ...] from the history sheet, oldest first.
+
+    Keeps the rows after `since` plus the newest one before it (a window baseline).
+    """
+    if SHEET_NAME not in wb.sheetnames:
+        return []
+    wanted = {name.casefold() for name in names}
+    older, samples = [], []
+    for row in wb[SHEET_NAME].iter_rows(min_row=2, max_col=8, values_only=True):
+        if not row[1] or str(row[1]).casefold() not in wanted:
             continue
-        
-        # compute deltas
         try:
-            kills_delta = (all_time.get("Kills", 0) or 0) - (snap.get("Kills", 0) or 0)
-            deaths_delta = (all_time.get("Deaths", 0) or 0) - (snap.get("Deaths", 0) or 0)
-            wins_delta = (all_time.get("Wins", 0) or 0) - (snap.get("Wins", 0) or 0)
-            losses_delta = (all_time.get("Losses", 0) or 0) - (snap.get("Losses", 0) or 0)
-        except Exception:
-            kills_delta = deaths_delta = wins_delta = losses_delta = 0
-        
-        # write counts and ratios
-        player_ws[f"B{target_row + 0}"] = kills_delta
-        player_ws[f"B{target_row + 1}"] = deaths_delta
-        
-        # K/D ratio
-        if deaths_delta and deaths_delta != 0:
-            kd_ratio = kills_delta / deaths_delta
-        else:
-            kd_ratio = float(kills_delta) if kills_delta else 0.0
-        player_ws[f"B{target_row + 2}"] = round(kd_ratio, 2)
-        
-        # W/L ratio
-        player_ws[f"B{target_row + 3}"] = wins_delta
-        player_ws[f"B{target_row + 4}"] = losses_delta
-        if losses_delta and losses_delta != 0:
-            wl_ratio = wins_delta / losses_delta
+            t = datetime.strptime(str(row[0]), "%Y-%m-%d %H:%M:%S").timestamp()
+            values = [int(row[2]), int(row[3]), float(row[4]), int(row[5]), int(row[6]), float(row[7])]
+        except (TypeError, ValueError):
+            continue
+        if t <= since:
+            older = [(t, values)]
         else:
-            wl_ratio = float(wins_delta) if wins_delta else 0.0
-        player_ws[f"B{target_row + 5}"] = round(wl_ratio, 2)
-    
-    # Write all-time current values
-    for i, name in enumerate(stat_names):
-        player_ws[f"B{all_time_start_row + i}"] = all_time.get(name, 0)
+            samples.append((t, values))
+    return older + samples
+
+
+def update_rolling(wb, player_ws, username, stats, rolling, identities=None):
+    """Rolling 24h / 7d / 30d tables for one player (see rolling.py)."""
+    from refresh_state import player_key
+    from rolling import WINDOWS, LONGEST
+    from sheet_layout import write_rolling_windows
+
+    key, vals = player_key(username, identities), stat_values(stats)
+    seed = ()
+    if not rolling.known(key):
+        # First time: start from what the history sheet already has for them
+        names = identities.names(username) if identities is not None else [username]
+        seed = history_samples(wb, names, time.time() - WINDOWS[LONGEST])
+    baselines = rolling.update(key, vals, seed=seed)
+    write_rolling_windows(player_ws, dict(zip(STAT_NAMES, vals)), baselines)
+
+
+def apply_stats(wb, username, stats, args, identities=None, rolling=None, changes=None):
+    """History row, player sheet and -refresh deltas for one player. True if the player has a sheet.
+
+    A changed sheet is recorded on `changes` (a leaderboard.ChangeLog).
+    """
+    from sheet_index import find_player_sheet
+    from sheet_layout import refresh_deltas
+
+    onboard = getattr(args, "onboard", False)
+    if not onboard:
+        # Onboarding takes the name as given (see refresh_player)
+        username = renamed_to(identities, username) or username
+    if onboard:
+        # The empty template goes into this same transaction (see player_stats.py)
+        from player_stats import create_template
+
+        player_ws = create_template(wb, username)
+    else:
+        player_ws = find_player_sheet(wb, username, identities)
+    if rolling is not None and player_ws is not None and is_full_write(args):
+        # Before this run's history row exists, so a first-time seed doesn't include it
+        with span("workbook.rolling"):
+            update_rolling(wb, player_ws, username, stats, rolling, identities)
+    append_history(wb, username, stats)
+
+    # Prepare a snapshot cache so refresh can prefer pre-write snapshots
+    snapshot_cache = {}
+    former_title = player_ws.title if player_ws is not None else None
+    if player_ws is not None and identities is not None:
+        adopt_sheet(wb, player_ws, username, identities)
+    if player_ws is not None:
+        snapshot_cache = update_player_sheet(player_ws, username, stats, args)
+    else:
+        if not args.nolifetime:
+            print(f"[WARNING] Sheet '{username}' not found. Create it first with player_stats.py")
+
+    # Refresh: compute deltas and write into column B (if -refresh flag set)
+    if args.refresh and player_ws is not None:
+        # prefer snapshots cached before this run wrote new ones
+        with span("workbook.refresh"):
+            refresh_deltas(player_ws, snapshot_cache)
+    if changes is not None and player_ws is not None:
+        changes.changed(player_ws, former_title)
+    return player_ws is not None
+
+
+def store_stats(username, stats, args, profile=None, identities=None, rolling=None):
+    """Load the workbook, apply this run's stats and save it (holding the workbook lock)."""
+    from leaderboard import ChangeLog
+
+    with WorkbookLock(EXCEL_FILE):
+        changes = ChangeLog(EXCEL_FILE)
+        wb = open_workbook(profile)
+        apply_stats(wb, username, stats, args, identities, rolling, changes)
+        save_workbook(wb, args, profile)
+        changes.publish()
+
+# -------------------
+# Skip unchanged writes (see refresh_state.py)
+# -------------------
+def may_skip(args):
+    """Snapshot runs always write; so does -force."""
+    return not (args.session or args.daily or args.weekly or args.monthly or args.force)
+
+
+def is_full_write(args):
+    """Runs after which the sheet is fully up to date for the fetched record."""
+    return args.refresh and not args.nolifetime
+
+
+def skip_if_unchanged(state, key, username, record, args, rolling=None) -> bool:
+    """True (and `checked` bumped) if this run would rewrite exactly what is already stored.
+
+    With `rolling`, a window whose baseline has aged out also counts as a change.
+    """
+    if not may_skip(args) or not state.unchanged(key, username, record):
+        return False
+    values = [record.kills, record.deaths, record.kd, record.wins, record.losses, record.wl]
+    if rolling is not None and rolling.pending(key, values):
+        return False
+    state.checked(key)
+    stored = state.last_stored(key)
+    since = datetime.fromtimestamp(stored).strftime("%Y-%m-%d %H:%M:%S") if stored else "the last write"
+    print(f"[INFO] No changes for {username} since {since}; workbook not touched")
+    tracing.current().tag(unchanged=True)
+    return True
 
 # -------------------
-# Save workbook
+# Batch mode
 # -------------------
-wb.save(EXCEL_FILE)
+def read_ign_file(path):
+    """IGNs from a file, one per line; blank lines and # comments are skipped."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.split("#", 1)[0].strip() for line in f if line.split("#", 1)[0].strip()]
+
+
+def unique_igns(names):
+    """Drop case-insensitive duplicates, keeping the first spelling and the order."""
+    seen = set()
+    out = []
+    for name in names:
+        if name.casefold() not in seen:
+            seen.add(name.casefold())
+            out.append(name)
+    return out
+
+
+def fetch_player(username, source):
+    """Fetch one player's stats (runs on a batch worker thread)."""
+    with span("refresh.fetch", ign=username, source=source.name):
+        return source.fetch(username)
+
+
+def run_batch(usernames, args, proxy_pool, profile=None, identities=None):
+    """Fetch every player with bounded concurrency, then apply all updates in one load and one save.
+
+    Returns the summary dict that main() prints as JSON.
+    """
+    import requests
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    workers = max(1, min(args.concurrency, len(usernames)))
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    from leaderboard import ChangeLog
+    from refresh_state import RefreshState, player_key
+    from rolling import RollingWindows
+    from stats_parser import to_record
+
+    started = time.perf_counter()
+    results = {name: {"ign": name, "status": "error"} for name in usernames}
+    if args.source in ("plancke", "archive"):
+        preload("bs4", "openpyxl")
+    source = make_source(args, session, proxy_pool, identities)
+    state = RefreshState()
+    rolling = RollingWindows()
+    written = []  # (key, name, record) to mark as stored once the save succeeds
+    wb = None
+    lock = WorkbookLock(EXCEL_FILE)
+    try:
+        source.prepare(usernames)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as pool:
+            futures = {pool.submit(fetch_player, name, source): name for name in usernames}
+            with span("batch.apply"):
+                for future in as_completed(futures):
+                    name = futures[future]
+                    result = results[name]
+                    try:
+                        stats = future.result()
+                    except Exception as e:
+                        result["error"] = str(e)[:300]
+                        print(f"[ERROR] {name}: {e}")
+                        continue
+                    if not args.nolifetime:
+                        print_stats(name, stats)
+                    current = renamed_to(identities, name) or name
+                    key, record = player_key(current, identities), to_record(stats)
+                    if skip_if_unchanged(state, key, current, record, args, rolling):
+                        result.update(status="ok", unchanged=True)
+                        continue
+                    try:
+                        if wb is None:
+                            # Loaded (and locked) only once some player actually changed;
+                            # after a failed load the lock is still held, so don't take it again
+                            if not lock.held:
+                                lock.acquire()
+                            changes = ChangeLog(EXCEL_FILE)
+                            wb = open_workbook(profile)
+                        result["sheet"] = apply_stats(wb, name, stats, args, identities, rolling, changes)
+                    except Exception as e:
+                        result["error"] = f"Workbook update failed: {e}"[:300]
+                        print(f"[ERROR] {name}: could not update workbook: {e}")
+                        continue
+                    result["status"] = "ok"
+                    written.append((key, current, record))
+                    if renamed_to(identities, name):
+                        result["name"] = renamed_to(identities, name)
+                    result["stats"] = {key: value for key, value in zip(STAT_NAMES, stat_values(stats))}
+        saved = bool(written)
+        if saved:
+            save_workbook(wb, args, profile)
+            changes.publish()
+            if is_full_write(args):
+                for key, name, record in written:
+                    state.stored(key, name, record)
+            rolling.save()
+    finally:
+        lock.release()
+        source.close()
+        session.close()
+    state.save()
+
+    ok = sum(1 for r in results.values() if r["status"] == "ok")
+    summary = {
+        "source": source.name,
+        "players": len(usernames),
+        "ok": ok,
+        "failed": len(usernames) - ok,
+        "saved": saved,
+        "unchanged": sum(1 for r in results.values() if r.get("unchanged")),
+        "seconds": round(time.perf_counter() - started, 3),
+        "results": [results[name] for name in usernames],
+    }
+    if hasattr(source, "limiter"):
+        summary["rate_limit"] = source.limiter.stats()
+    return summary
+
+# -------------------
+# Entry point
+# -------------------
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    usernames = list(args.usernames)
+    if args.from_file:
+        usernames += read_ign_file(args.from_file)
+    usernames = unique_igns(usernames)
+    if not usernames:
+        parser.error("give at least one -ign or --from-file")
+    if args.onboard:
+        if len(usernames) > 1 or args.from_file:
+            parser.error("-onboard takes a single -ign")
+        # Same sheet as player_stats.py + get.py + get.py -session -daily -weekly -monthly -refresh
+        args.session = args.daily = args.weekly = args.monthly = args.refresh = True
+        args.nolifetime = False
+
+    # Profile the rest of this run (see profiling.py); nothing is loaded when off
+    profile = None
+    if args.profile:
+        import profiling
+        profile = profiling.start(f"get-{usernames[0]}" if len(usernames) == 1 else f"get-batch-{len(usernames)}")
+
+    # IGN -> UUID cache (identities.json); saved even when the fetch fails
+    from identity import IdentityCache
+    identities = IdentityCache()
+    try:
+        if len(usernames) > 1 or args.from_file:
+            return main_batch(usernames, args, profile, identities)
+        refresh_player(usernames[0], args, profile, identities)
+    finally:
+        identities.save()
+
+
+def refresh_player(username, args, profile=None, identities=None):
+    """Single-player run: fetch, print and store one player's stats."""
+
+    # Root timing span for this run; every stage below records a child span (see tracing.py)
+    flags = [f for f in ("session", "daily", "weekly", "monthly", "refresh", "nolifetime", "proxy") if getattr(args, f)]
+    with span("refresh", ign=username, flags=flags, source=args.source):
+        # Don't build a proxy pool for a fetch the circuit breaker will refuse
+        if args.source == "plancke" and PLANCKE_BREAKER.blocked():
+            raise PLANCKE_BREAKER.open_error()
+        proxy_pool = build_proxy_pool() if wants_proxies(args) else []
+
+        # Parser and workbook modules load on a side thread while the request is in flight;
+        # requests goes first so the two imports don't compete for the GIL
+        import requests  # noqa: F401
+        preload(*(("bs4", "openpyxl") if args.source in ("plancke", "archive") else ("openpyxl",)))
+        if args.onboard:
+            require_current_name(identities, username)
+        with make_source(args, proxy_pool=proxy_pool, identities=identities) as source:
+            stats = source.fetch(username)
+        if profile:
+            profile.checkpoint("page parsed")
+
+        new_name = None if args.onboard else renamed_to(identities, username)
+        if new_name:
+            print(f"[IDENTITY] {username} is now called {new_name}")
+            username = new_name
+        if not args.nolifetime:
+            print_stats(username, stats)
+
+        from refresh_state import RefreshState, player_key
+        from rolling import RollingWindows
+        from stats_parser import to_record
+
+        state, rolling = RefreshState(), RollingWindows()
+        key, record = player_key(username, identities), to_record(stats)
+        if not skip_if_unchanged(state, key, username, record, args, rolling):
+            store_stats(username, stats, args, profile, identities, rolling)
+            if is_full_write(args):
+                state.stored(key, username, record)
+            rolling.save()
+        state.save()
+
+
+def main_batch(usernames, args, profile=None, identities=None):
+    """Batch entry point: one proxy pool, one session, one workbook load/save.
+
+    Prints a `[SUMMARY] {...}` JSON line; exits 1 if any player failed.
+    """
+    flags = [f for f in ("session", "daily", "weekly", "monthly", "refresh", "nolifetime", "proxy") if getattr(args, f)]
+    with span("batch", players=len(usernames), flags=flags, source=args.source) as batch_span:
+        proxy_pool = build_proxy_pool() if wants_proxies(args) and not PLANCKE_BREAKER.blocked() else []
+        summary = run_batch(usernames, args, proxy_pool, profile, identities)
+        batch_span.tag(ok=summary["ok"], failed=summary["failed"])
+
+    print(f"[SUMMARY] {json.dumps(summary)}")
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    if summary["failed"]:
+        raise SystemExit(1)
+
 
-if not args.nolifetime:
-    print(f"[DATA] Data written to {EXCEL_FILE}")
+if __name__ == "__main__":
+    main()
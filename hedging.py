@@ -0,0 +1,193 @@
+"""Hedged plancke.io requests: a backup request when the first one is slow.
+
+A proxied fetch has a long tail: one slow proxy can hold a refresh until
+request_timeout (20s) runs out before the next attempt even starts. With
+hedging on (get.py -hedge, which /sheepwars uses), if an attempt hasn't
+answered after the observed p90 fetch latency, the same request also goes
+out through a different route: another proxy, or direct. A direct attempt
+(the /sheepwars refresh doesn't use proxies) is hedged by a second direct
+request on a fresh connection, which still gets past a stalled connection
+or a slow upstream worker. The first good response wins; the other is
+abandoned on a daemon thread and its response closed whenever it arrives
+(requests can't interrupt a request in flight).
+
+Two limits keep this from doubling upstream traffic:
+
+    delay   p90 of the last SAMPLES fetch latencies, clamped to
+            [MIN_DELAY, request_timeout / 2]; DEFAULT_DELAY until
+            MIN_SAMPLES are known
+    budget  at most SHEEPWARS_HEDGE_BUDGET (default 0.1) hedges per
+            request, counted across runs
+
+Each get.py run is a short-lived process, so samples and counters live in
+fetch_latency.json next to the workbook and are merged into it on save
+(concurrent runs can each lose a few samples; it's a running estimate).
+"""
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+
+import requests
+
+from user_registry import _atomic_write
+
+SCRIPT_DIR = Path(__file__).parent.absolute()
+LATENCY_FILE = os.environ.get("SHEEPWARS_LATENCY_FILE") or str(SCRIPT_DIR / "fetch_latency.json")
+BUDGET = float(os.environ.get("SHEEPWARS_HEDGE_BUDGET", 0.1))
+QUANTILE = 0.9
+SAMPLES = 200
+MIN_SAMPLES = 20
+DEFAULT_DELAY = 3.0
+MIN_DELAY = 0.5
+# Counters are halved past this many requests so the budget follows recent traffic
+DECAY_AFTER = 1000
+
+
+class HedgePolicy:
+    def __init__(self, path=LATENCY_FILE, budget=BUDGET):
+        self.path = path
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._data = None
+        # What this process added since the last save
+        self._new_samples = []
+        self._new_requests = 0
+        self._new_hedges = 0
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        return {"samples": data.get("samples", []), "requests": data.get("requests", 0), "hedges": data.get("hedges", 0)}
+
+    def _current(self) -> dict:
+        if self._data is None:
+            self._data = self._read()
+        return self._data
+
+    def delay(self, timeout: float) -> float:
+        """Seconds to wait for an attempt before hedging it."""
+        with self._lock:
+            samples = self._current()["samples"]
+            if len(samples) < MIN_SAMPLES:
+                delay = DEFAULT_DELAY
+            else:
+                delay = sorted(samples)[int(QUANTILE * (len(samples) - 1))]
+        return min(max(delay, MIN_DELAY), timeout / 2)
+
+    def count_request(self):
+        with self._lock:
+            self._current()["requests"] += 1
+            self._new_requests += 1
+
+    def take_hedge(self) -> bool:
+        """True (and counted) if the budget allows one more hedge."""
+        with self._lock:
+            data = self._current()
+            if data["hedges"] + 1 > self.budget * data["requests"] + 1:
+                return False
+            data["hedges"] += 1
+            self._new_hedges += 1
+            return True
+
+    def record(self, seconds: float):
+        """Latency of a request that got a good response."""
+        with self._lock:
+            data = self._current()
+            data["samples"] = (data["samples"] + [round(seconds, 3)])[-SAMPLES:]
+            self._new_samples.append(round(seconds, 3))
+
+    def save(self):
+        """Merge this process's samples and counts into the file."""
+        with self._lock:
+            if not (self._new_samples or self._new_requests):
+                return
+            data = self._read()
+            data["samples"] = (data["samples"] + self._new_samples)[-SAMPLES:]
+            data["requests"] += self._new_requests
+            data["hedges"] += self._new_hedges
+            if data["requests"] > DECAY_AFTER:
+                data["requests"] //= 2
+                data["hedges"] //= 2
+            try:
+                _atomic_write(self.path, json.dumps(data))
+            except OSError as e:
+                print(f"[WARNING] Could not save {self.path}: {e}")
+                return
+            self._data = data
+            self._new_samples, self._new_requests, self._new_hedges = [], 0, 0
+
+
+def _proxies(route):
+    return {"http": f"http://{route}", "https": f"http://{route}"} if route else None
+
+
+def hedged_get(policy, session, url, headers, route, alternatives, timeout):
+    """session.get() through `route` (a proxy, or None for direct), hedged through alternatives[0].
+
+    Returns (response, route that answered, whether the hedge answered). A
+    response is good when its status is below 400; if neither request gets
+    one, the primary's response is returned or its exception raised, as a
+    plain get would. The hedge goes out on its own session so it never
+    waits on a connection the primary is stuck on.
+    """
+    results = queue.Queue()
+    finished = threading.Event()
+
+    def run(r, hedge):
+        start = time.perf_counter()
+        try:
+            if hedge:
+                with requests.Session() as fresh:
+                    response = fresh.get(url, headers=headers, proxies=_proxies(r), timeout=timeout)
+            else:
+                response = session.get(url, headers=headers, proxies=_proxies(r), timeout=timeout)
+        except Exception as e:
+            results.put((r, hedge, None, e, time.perf_counter() - start))
+            return
+        if finished.is_set():
+            response.close()  # the other request already won
+            return
+        results.put((r, hedge, response, None, time.perf_counter() - start))
+
+    def start(r, hedge=False):
+        threading.Thread(target=run, args=(r, hedge), name="fetch-hedge", daemon=True).start()
+
+    policy.count_request()
+    start(route)
+    pending, primary = 1, None
+    try:
+        item = results.get(timeout=policy.delay(timeout))
+    except queue.Empty:
+        item = None
+        if alternatives and policy.take_hedge():
+            print(f"  No answer after {policy.delay(timeout):.1f}s, hedging via {alternatives[0] or 'direct'}")
+            start(alternatives[0], hedge=True)
+            pending += 1
+    while True:
+        if item is None:
+            # Each request has its own timeout, so one of them reports back
+            item = results.get()
+        pending -= 1
+        r, hedge, response, error, seconds = item
+        if response is not None and response.status_code < 400:
+            finished.set()
+            policy.record(seconds)
+            return response, r, hedge
+        if not hedge:
+            primary = item
+        if not pending:
+            break
+        if response is not None:
+            response.close()
+        item = None
+    finished.set()
+    _r, _hedge, response, error, _seconds = primary or item
+    if error is not None:
+        raise error
+    return response, route, False
@@ -0,0 +1,275 @@
+"""IGN -> UUID identity cache shared by get.py and the bot.
+
+Minecraft names change; UUIDs don't. identities.json is keyed by UUID and
+remembers each player's current name, the names they had before and when
+the name was last confirmed:
+
+    {"players": {"<uuid>": {"name": "Chuckegg", "aliases": ["OldName"], "checked": 1760000000.0}},
+     "missing": {"typoname": 1760000000.0}}
+
+A name is resolved through Mojang once and then reused, so a refresh skips
+that hop, and a renamed player is still found by the UUID under their old
+name. Names older than NAME_TTL are re-checked lazily (the bot does a few
+per pass in the background, see bot.identity_refresher). Names Mojang
+doesn't know are remembered for MISSING_TTL so they fail fast instead of
+burning fetch retries.
+
+A former name can be claimed by another player, so an alias is never
+trusted on its own: resolve() asks Mojang who has the name now before
+following it to its old owner, and the cached lookups (uuid(), names(),
+...) only follow it while Mojang's "no one has this name" answer is less
+than MISSING_TTL old.
+
+Like user_registry.py the file is read on first use, re-read only when its
+mtime changes, and written through a temp file + rename. Several get.py
+processes can save at once, so save() merges with what is on disk.
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from urllib.parse import quote
+
+from tracing import span
+from user_registry import _atomic_write, _mtime
+
+SCRIPT_DIR = Path(__file__).parent.absolute()
+IDENTITY_FILE = os.environ.get("SHEEPWARS_IDENTITY_FILE") or str(SCRIPT_DIR / "identities.json")
+NAME_TTL = float(os.environ.get("SHEEPWARS_NAME_TTL_HOURS", 24 * 7)) * 3600
+MISSING_TTL = 3600
+
+MOJANG_API_BASE_URL = os.environ.get("MOJANG_API_BASE_URL", "https://api.minecraftservices.com").rstrip("/")
+# Mojang's bulk name -> UUID lookup takes at most 10 names per call
+BULK_LOOKUP_SIZE = 10
+LOOKUP_TIMEOUT = 5
+
+
+class IdentityCache:
+    def __init__(self, path=IDENTITY_FILE, ttl: float = NAME_TTL, check_interval: float = 5.0):
+        """path=None keeps the cache in memory only."""
+        self.path = path
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._players = {}  # uuid -> {"name", "aliases", "checked"}
+        self._by_name = {}  # casefolded current name -> uuid
+        self._by_alias = {}  # casefolded former name -> uuid (followed only while confirmed free)
+        self._missing = {}  # casefolded name -> when Mojang last said it doesn't exist
+        self._mtime = None
+        self._loaded = False
+        self._last_check = 0.0
+        self._dirty = False
+
+    # -------------------
+    # Loading / saving
+    # -------------------
+    def _read(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}, {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data.get("players", {}), data.get("missing", {})
+        except Exception as e:
+            print(f"[WARNING] Could not read {self.path}: {e}")
+            return {}, {}
+
+    def _index(self):
+        by_name, by_alias = {}, {}
+        for uuid, entry in self._players.items():
+            for alias in entry.get("aliases", []):
+                by_alias[alias.casefold()] = uuid
+            by_name[entry["name"].casefold()] = uuid
+        self._by_name, self._by_alias = by_name, by_alias
+
+    def _load(self):
+        self._players, self._missing = self._read()
+        self._mtime = _mtime(self.path) if self.path else None
+        self._index()
+        self._loaded = True
+
+    def _refresh(self):
+        if not self._loaded:
+            self._load()
+            return
+        now = time.monotonic()
+        if not self.path or now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        if not self._dirty and _mtime(self.path) != self._mtime:
+            self._load()
+
+    def save(self):
+        """Merge our entries with the file (newest check wins) and write it back."""
+        with self._lock:
+            if not self._dirty or not self.path:
+                return
+            players, missing = self._read()
+            for uuid, entry in self._players.items():
+                if entry.get("checked", 0) >= players.get(uuid, {}).get("checked", 0):
+                    players[uuid] = entry
+            for name, checked in self._missing.items():
+                missing[name] = max(checked, missing.get(name, 0))
+            now = time.time()
+            missing = {n: t for n, t in missing.items() if now - t < MISSING_TTL}
+            _atomic_write(self.path, json.dumps({"players": players, "missing": missing}, indent=2))
+            self._players, self._missing = players, missing
+            self._mtime = _mtime(self.path)
+            self._index()
+            self._dirty = False
+
+    # -------------------
+    # Cached lookups (no network)
+    # -------------------
+    def uuid(self, name: str):
+        """UUID for a current name, or a former one Mojang recently said no one has; else None."""
+        with self._lock:
+            self._refresh()
+            key = name.casefold()
+            uuid = self._by_name.get(key)
+            if uuid is None and self.is_missing(name):
+                uuid = self._by_alias.get(key)
+            return uuid
+
+    def is_alias(self, name: str) -> bool:
+        """True if `name` is only known as someone's former name."""
+        with self._lock:
+            self._refresh()
+            key = name.casefold()
+            return key not in self._by_name and key in self._by_alias
+
+    def name(self, uuid: str):
+        with self._lock:
+            self._refresh()
+            entry = self._players.get(uuid)
+            return entry["name"] if entry else None
+
+    def current_name(self, name: str) -> str:
+        """The player's current name if `name` is one we know (old or new), else `name`."""
+        with self._lock:
+            uuid = self.uuid(name)
+            return self._players[uuid]["name"] if uuid else name
+
+    def names(self, name: str) -> list:
+        """Current name first, then former names; [name] if unknown."""
+        with self._lock:
+            uuid = self.uuid(name)
+            if uuid is None:
+                return [name]
+            entry = self._players[uuid]
+            return [entry["name"], *reversed(entry.get("aliases", []))]
+
+    def is_missing(self, name: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return time.time() - self._missing.get(name.casefold(), 0) < MISSING_TTL
+
+    def stale(self, names, limit: int = None) -> list:
+        """UUIDs of the given players whose name is older than the TTL, oldest first."""
+        with self._lock:
+            self._refresh()
+            now = time.time()
+            uuids = {self.uuid(n) for n in names} - {None}
+            out = sorted((u for u in uuids if now - self._players[u].get("checked", 0) >= self.ttl),
+                         key=lambda u: self._players[u].get("checked", 0))
+            return out[:limit] if limit else out
+
+    def remember(self, uuid: str, name: str):
+        """Record that `uuid` is currently called `name`. Returns the old name if it changed."""
+        uuid = uuid.replace("-", "")
+        with self._lock:
+            self._refresh()
+            entry = self._players.get(uuid)
+            renamed_from = None
+            if entry is None:
+                entry = self._players[uuid] = {"name": name, "aliases": []}
+            elif entry["name"] != name:
+                if entry["name"].casefold() != name.casefold():
+                    renamed_from = entry["name"]
+                    entry["aliases"] = [a for a in entry.get("aliases", []) if a.casefold() != name.casefold()]
+                    entry["aliases"].append(renamed_from)
+                entry["name"] = name
+            entry["checked"] = time.time()
+            # Someone else who had this name has renamed since; re-check them first
+            other = self._by_name.get(name.casefold())
+            if other and other != uuid and self._players[other]["name"].casefold() == name.casefold():
+                self._players[other]["checked"] = 0
+            self._missing.pop(name.casefold(), None)
+            self._index()
+            self._dirty = True
+            return renamed_from
+
+    # -------------------
+    # Mojang lookups
+    # -------------------
+    def resolve(self, name: str, session=None, follow_aliases: bool = True):
+        """UUID for `name`: from the cache, else one Mojang lookup.
+
+        A former name is always looked up: whoever has it now wins, and only
+        if no one does is it followed to the player who had it
+        (follow_aliases=False: None). Returns None if Mojang has no such
+        account (remembered for MISSING_TTL). Network errors are raised.
+        """
+        alias = self.is_alias(name)
+        if not alias:
+            cached = self.uuid(name)
+            if cached or self.is_missing(name):
+                return cached
+        import requests
+
+        http = session or requests
+        with span("identity.lookup", ign=name):
+            response = http.get(f"{MOJANG_API_BASE_URL}/minecraft/profile/lookup/name/{quote(name)}",
+                                timeout=LOOKUP_TIMEOUT)
+        if response.status_code in (204, 404):
+            with self._lock:
+                self._missing[name.casefold()] = time.time()
+                self._dirty = True
+            return self.uuid(name) if alias and follow_aliases else None
+        response.raise_for_status()
+        profile = response.json()
+        self.remember(profile["id"], profile["name"])
+        return profile["id"]
+
+    def resolve_many(self, names, session=None) -> dict:
+        """Resolve every uncached name, ten per Mojang call. Returns {name: uuid or None}."""
+        import requests
+
+        http = session or requests
+        # Former names are looked up too (see resolve())
+        missing = [n for n in names if self.is_alias(n) or (self.uuid(n) is None and not self.is_missing(n))]
+        for i in range(0, len(missing), BULK_LOOKUP_SIZE):
+            chunk = missing[i:i + BULK_LOOKUP_SIZE]
+            with span("identity.lookup_bulk", names=len(chunk)) as s:
+                try:
+                    response = http.post(f"{MOJANG_API_BASE_URL}/minecraft/profile/lookup/bulk/byname",
+                                         json=chunk, timeout=LOOKUP_TIMEOUT)
+                    response.raise_for_status()
+                    profiles = response.json()
+                except Exception as e:
+                    # callers fall back to resolve() per name
+                    s.fail(e)
+                    print(f"[IDENTITY] Bulk UUID lookup failed: {e}")
+                    continue
+            found = set()
+            for profile in profiles:
+                self.remember(profile["id"], profile["name"])
+                found.add(profile["name"].casefold())
+            with self._lock:
+                for n in chunk:
+                    if n.casefold() not in found:
+                        self._missing[n.casefold()] = time.time()
+                        self._dirty = True
+        return {n: self.uuid(n) for n in names}
+
+    def refresh_name(self, uuid: str, session=None):
+        """Ask Mojang for the current name of `uuid`. Returns (old, new) if it changed, else None."""
+        import requests
+
+        http = session or requests
+        with span("identity.refresh", uuid=uuid):
+            response = http.get(f"{MOJANG_API_BASE_URL}/minecraft/profile/lookup/{uuid}", timeout=LOOKUP_TIMEOUT)
+        response.raise_for_status()
+        old = self.remember(uuid, response.json()["name"])
+        return (old, self.name(uuid)) if old else None
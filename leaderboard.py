@@ -0,0 +1,487 @@
+"""Compact, immutable leaderboard data built from the stats workbook.
+
+A LeaderboardView only needs, for every player, the level, the six
+column-B values of each period and the lifetime Wool Games extras. Building that in one pass over the sheets
+lets the view drop the openpyxl Workbook (every sheet, history row and
+style object) as soon as the snapshot exists.
+
+Rankings are sorted once per (period, metric) and then answered with
+bisect: a player's rank, percentile and neighbours and any page of the
+board cost O(log n) however many players there are. LeaderboardStore
+keeps the current snapshot and its rankings across commands.
+
+Refreshes rewrite the workbook all the time, so the store doesn't re-read
+it on every change. Each writer appends the entries of the players it
+changed to "<workbook>.changes.jsonl" (ChangeLog), chained by the
+workbook's mtime before and after its save. The store replays those lines
+onto its rankings, a bisect removal and insertion per player and ranking,
+and reads every sheet again only when the chain has a gap (a writer that
+doesn't log, a lost line, the first load).
+"""
+import copy
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import NamedTuple
+
+from user_registry import _atomic_write, _mtime
+from sheet_index import find_sheet
+from sheet_layout import PERIOD_ROWS, LAST_ROW, LAST_COL, CTW_START_ROW, is_player_sheet
+
+# Leaderboard period name -> sheet period name
+PERIODS = {
+    "lifetime": "all-time",
+    "session": "session",
+    "daily": "daily",
+    "weekly": "weekly",
+    "monthly": "monthly",
+    # Rolling windows (see rolling.py)
+    "24h": "24h",
+    "7d": "7d",
+    "30d": "30d",
+}
+
+# Metric name -> index into a period's six values
+METRICS = {
+    "kills": 0,
+    "deaths": 1,
+    "kdr": 2,
+    "wins": 3,
+    "losses": 4,
+    "wlr": 5,
+}
+
+# Lifetime-only metrics (no period snapshots) -> index into LeaderboardEntry.extras
+LIFETIME_METRICS = {
+    "damage": 0,
+    "ctw_kills": 1,
+    "ctw_deaths": 2,
+    "ctw_kdr": 3,
+    "ctw_wins": 4,
+    "ctw_losses": 5,
+    "ctw_wlr": 6,
+}
+
+
+# Keys are (-value, casefolded name); this sorts after every name of a value
+_AFTER_NAMES = "\U0010ffff"
+
+# The change log is started over (as a new file) once it grows past this
+CHANGES_MAX_BYTES = 4 * 1024 * 1024
+
+_PERIOD_INDEX = {period: i for i, period in enumerate(PERIODS)}
+
+
+class LeaderboardEntry(NamedTuple):
+    player: str
+    level: int
+    # One 6-tuple (kills, deaths, kdr, wins, losses, wlr) per period, in PERIODS order.
+    # Values that are missing or not numeric are stored as None.
+    values: tuple
+    # (damage, ctw kills, deaths, kdr, wins, losses, wlr), lifetime only
+    extras: tuple = ()
+
+
+def _numeric(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+def read_entry(ws, sheet_name: str):
+    """LeaderboardEntry for one player sheet (one bounded iter_rows() call), or None if unreadable."""
+    try:
+        rows = list(ws.iter_rows(min_row=1, max_row=LAST_ROW, max_col=LAST_COL, values_only=True))
+    except Exception:
+        return None
+    # Pad short sheets so row/column lookups below never raise
+    rows += [()] * (LAST_ROW - len(rows))
+
+    def cell(row, col):
+        r = rows[row - 1]
+        return r[col] if col < len(r) else None
+
+    try:
+        level = int(cell(40, 3) or 0)  # D40
+    except Exception:
+        level = 0
+
+    values = tuple(
+        tuple(_numeric(cell(r, 1)) for r in PERIOD_ROWS[sheet_period])  # column B
+        for sheet_period in PERIODS.values()
+    )
+    extras = (_numeric(cell(41, 3)),) + tuple(  # D41, then H39:H44
+        _numeric(cell(CTW_START_ROW + i, 7)) for i in range(6)
+    )
+    return LeaderboardEntry(sheet_name, level, values, extras)
+
+
+def build_leaderboard_snapshot(wb) -> tuple:
+    """Read every player sheet once and return a tuple of LeaderboardEntry.
+
+    Works with normal and ``read_only=True`` workbooks.
+    """
+    entries = []
+    for sheet_name in wb.sheetnames:
+        if not is_player_sheet(sheet_name):
+            continue
+        entry = read_entry(wb[sheet_name], sheet_name)
+        if entry is not None:
+            entries.append(entry)
+    return tuple(entries)
+
+
+def load_player_entry(path, names):
+    """LeaderboardEntry for the first of `names` with a sheet, reading only that sheet (None if none has one)."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        for name in names:
+            ws = find_sheet(wb, name)
+            if ws is not None and is_player_sheet(ws.title):
+                return read_entry(ws, ws.title)
+        return None
+    finally:
+        wb.close()
+
+
+def metric_value(entry, period: str, metric: str):
+    """The entry's value for (period, metric); None if missing (or a lifetime-only metric of another period)."""
+    if metric in LIFETIME_METRICS:
+        extra_idx = LIFETIME_METRICS[metric]
+        if period != "lifetime" or len(entry.extras) <= extra_idx:
+            return None
+        return entry.extras[extra_idx]
+    return entry.values[_PERIOD_INDEX[period]][METRICS[metric]]
+
+
+def ranked(snapshot, period: str, metric: str) -> list:
+    """Return [(player, value, level), ...] sorted by value descending, ties by name.
+
+    Lifetime-only metrics return an empty list for the other periods.
+    """
+    rows = []
+    for entry in snapshot:
+        value = metric_value(entry, period, metric)
+        if value is not None:
+            rows.append((entry.player, value, entry.level))
+    rows.sort(key=lambda x: (-x[1], x[0].casefold()))
+    return rows
+
+
+class RankIndex:
+    """One (period, metric) ranking, best value first.
+
+    Tied players share a rank (1, 2, 2, 4). ``keys`` holds (negated value,
+    casefolded name) in ascending order, so bisect finds both a value's
+    rank and a player's position, and updated() can move one player
+    without re-sorting.
+    """
+
+    def __init__(self, snapshot, period: str, metric: str):
+        self.period = period
+        self.metric = metric
+        self.rows = ranked(snapshot, period, metric)
+        self.keys = [(-value, player.casefold()) for player, value, _level in self.rows]
+        self.values = {player.casefold(): value for player, value, _level in self.rows}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def rank_of_value(self, value) -> int:
+        """1-based rank a player with `value` would have."""
+        return bisect_left(self.keys, (-value,)) + 1
+
+    def position(self, player: str):
+        """Index of `player` in rows (None if they have no value for this metric)."""
+        key = player.casefold()
+        value = self.values.get(key)
+        if value is None:
+            return None
+        return bisect_left(self.keys, (-value, key))
+
+    def lookup(self, player: str):
+        """(rank, value, percentile) for `player`, or None if they are not ranked.
+
+        percentile is the share of ranked players with a strictly lower value.
+        """
+        i = self.position(player)
+        if i is None:
+            return None
+        value = self.rows[i][1]
+        below = len(self.keys) - bisect_left(self.keys, (-value, _AFTER_NAMES))
+        return self.rank_of_value(value), value, 100.0 * below / len(self.rows)
+
+    def updated(self, names, entries):
+        """A copy without the players in `names` (casefolded) and with `entries` (re)inserted.
+
+        Costs two list copies and a bisect per player, not a re-sort; the
+        original is left alone for commands still reading it.
+        """
+        index = copy.copy(self)
+        index.rows, index.keys, index.values = list(self.rows), list(self.keys), dict(self.values)
+        for name in names:
+            value = index.values.pop(name, None)
+            if value is not None:
+                i = bisect_left(index.keys, (-value, name))
+                del index.keys[i], index.rows[i]
+        for entry in entries:
+            value = metric_value(entry, self.period, self.metric)
+            if value is None:
+                continue
+            key = (-value, entry.player.casefold())
+            i = bisect_left(index.keys, key)
+            index.keys.insert(i, key)
+            index.rows.insert(i, (entry.player, value, entry.level))
+            index.values[key[1]] = value
+        return index
+
+    def neighbours(self, player: str, around: int = 2) -> list:
+        """[(rank, player, value, level), ...] from `around` above to `around` below `player`."""
+        i = self.position(player)
+        if i is None:
+            return []
+        return self.slice(max(0, i - around), i + around + 1)
+
+    def slice(self, start: int, stop: int) -> list:
+        return [(self.rank_of_value(value), player, value, level)
+                for player, value, level in self.rows[start:stop]]
+
+    def page(self, page: int, size: int = 10) -> list:
+        return self.slice(page * size, (page + 1) * size)
+
+    def pages(self, size: int = 10) -> int:
+        return max(1, -(-len(self.rows) // size))
+
+
+class Leaderboards:
+    """A snapshot plus its rankings, each built on first use."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self._indexes = {}
+        self._players = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.snapshot)
+
+    def index(self, period: str, metric: str) -> RankIndex:
+        key = (period, metric)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None:
+                index = self._indexes[key] = RankIndex(self.snapshot, period, metric)
+            return index
+
+    def players(self) -> dict:
+        """{casefolded player: LeaderboardEntry}"""
+        with self._lock:
+            if self._players is None:
+                self._players = {}
+                for entry in self.snapshot:
+                    self._players.setdefault(entry.player.casefold(), entry)
+            return self._players
+
+    def entry(self, names):
+        """LeaderboardEntry for the first of `names` with a sheet, or None."""
+        players = self.players()
+        for name in names:
+            entry = players.get(name.casefold())
+            if entry is not None:
+                return entry
+        return None
+
+    def updated(self, entries: dict, removed: set):
+        """New Leaderboards with `entries` ({casefolded player: entry}) replaced or added and `removed` dropped.
+
+        Rankings already built are carried over with only those players moved.
+        """
+        players = dict(self.players())
+        for name in removed:
+            players.pop(name, None)
+        players.update(entries)
+        boards = Leaderboards(tuple(players.values()))
+        boards._players = players
+        changed = set(removed) | set(entries)
+        with self._lock:
+            indexes = dict(self._indexes)
+        boards._indexes = {key: index.updated(changed, entries.values()) for key, index in indexes.items()}
+        return boards
+
+
+# -------------------
+# Change log
+# -------------------
+def changes_path(path) -> str:
+    return f"{path}.changes.jsonl"
+
+
+class ChangeLog:
+    """The players one workbook transaction changed, published for LeaderboardStore.
+
+    Create it with the workbook lock held and before loading, so `before`
+    is the file this transaction read. Record each player sheet with
+    changed() after its last write, and call publish() after the save,
+    still under the lock.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.before = _mtime(self.path)
+        self.entries = {}
+        self.removed = set()
+
+    def changed(self, ws, former=None):
+        """Record sheet `ws` as it is now; `former` is a title it had before this transaction."""
+        key = ws.title.casefold()
+        if former and former.casefold() != key:
+            self.remove(former)
+        entry = read_entry(ws, ws.title)
+        if entry is None:
+            self.remove(ws.title)
+            return
+        self.entries[key] = entry
+        self.removed.discard(key)
+
+    def remove(self, name):
+        self.entries.pop(name.casefold(), None)
+        self.removed.add(name.casefold())
+
+    def publish(self):
+        """Append this transaction to the change log. Never raises: a missing line only costs a full re-read."""
+        after = _mtime(self.path)
+        if after is None or after == self.before:
+            return
+        line = json.dumps({
+            "before": self.before,
+            "after": after,
+            "removed": sorted(self.removed),
+            "entries": [[e.player, e.level, e.values, e.extras] for e in self.entries.values()],
+        }, separators=(",", ":")) + "\n"
+        log = changes_path(self.path)
+        try:
+            if os.path.exists(log) and os.path.getsize(log) > CHANGES_MAX_BYTES:
+                # A new file (new inode) tells readers to start from the top
+                _atomic_write(log, line)
+            else:
+                with open(log, "a", encoding="utf-8") as f:
+                    f.write(line)
+        except OSError as e:
+            print(f"[WARNING] Could not write {log}: {e}")
+
+
+def _decode_entry(raw) -> LeaderboardEntry:
+    player, level, values, extras = raw
+    return LeaderboardEntry(player, level, tuple(tuple(v) for v in values), tuple(extras))
+
+
+class LeaderboardStore:
+    """The current Leaderboards for a workbook, rebuilt when the file changes."""
+
+    def __init__(self, path, check_interval: float = 5.0):
+        self.path = str(path)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._boards = None
+        self._mtime = None
+        self._last_check = 0.0
+        # (inode, offset) read up to in the change log
+        self._log_pos = (None, 0)
+
+    def get(self) -> Leaderboards:
+        """Raises FileNotFoundError if the workbook doesn't exist."""
+        with self._lock:
+            now = time.monotonic()
+            if self._boards is not None and now - self._last_check < self.check_interval:
+                return self._boards
+            self._last_check = now
+            mtime = _mtime(self.path)
+            if mtime is None:
+                raise FileNotFoundError(self.path)
+            if self._boards is None or mtime != self._mtime:
+                if not self._replay(mtime):
+                    self._rebuild()
+            return self._boards
+
+    def _rebuild(self):
+        from openpyxl import load_workbook
+
+        # Log position before mtime before contents: lines this read might miss are replayed later
+        self._log_pos = self._log_end()
+        self._mtime = _mtime(self.path)
+        if self._mtime is None:
+            raise FileNotFoundError(self.path)
+        wb = load_workbook(self.path, read_only=True, data_only=True)
+        try:
+            self._boards = Leaderboards(build_leaderboard_snapshot(wb))
+        finally:
+            wb.close()
+
+    def _log_end(self):
+        try:
+            st = os.stat(changes_path(self.path))
+        except OSError:
+            return (None, 0)
+        return (st.st_ino, st.st_size)
+
+    def _replay(self, mtime) -> bool:
+        """Bring the current boards up to `mtime` from the change log; False if the log doesn't get there."""
+        if self._boards is None:
+            return False
+        inode, offset = self._log_pos
+        try:
+            with open(changes_path(self.path), "rb") as f:
+                st = os.fstat(f.fileno())
+                if st.st_ino != inode or st.st_size < offset:
+                    offset = 0  # started over
+                f.seek(offset)
+                data = f.read()
+        except OSError:
+            return False
+        # A line still being written has no newline yet; leave it for next time
+        data = data[:data.rfind(b"\n") + 1]
+
+        current, entries, removed = self._mtime, {}, set()
+        for raw in data.splitlines():
+            try:
+                change = json.loads(raw)
+            except ValueError:
+                continue
+            if change.get("before") != current:
+                continue  # before our snapshot, or from a chain we missed
+            for name in change["removed"]:
+                entries.pop(name, None)
+                removed.add(name)
+            for item in change["entries"]:
+                entry = _decode_entry(item)
+                entries[entry.player.casefold()] = entry
+                removed.discard(entry.player.casefold())
+            current = change["after"]
+        if current != mtime:
+            return False
+        self._boards = self._boards.updated(entries, removed)
+        self._mtime = mtime
+        self._log_pos = (st.st_ino, offset + len(data))
+        return True
+
+    def player(self, names):
+        """One player's LeaderboardEntry, or None if none of `names` has a sheet.
+
+        Answered from the snapshot while it matches the file; otherwise only
+        that player's sheet is read and the snapshot is left for the next
+        leaderboard to rebuild. Raises FileNotFoundError like get().
+        """
+        mtime = _mtime(self.path)
+        if mtime is None:
+            raise FileNotFoundError(self.path)
+        with self._lock:
+            if self._boards is not None and mtime != self._mtime:
+                self._replay(mtime)
+            boards = self._boards if mtime == self._mtime else None
+        if boards is not None:
+            return boards.entry(names)
+        return load_player_entry(self.path, names)
@@ -0,0 +1,408 @@
+"""Load test: simulated Discord traffic against a local plancke.io stand-in.
+
+Sets up a scratch copy of the bot (scripts, a synthetic workbook and
+tracked users/links for -players players) under loadtest/.work, starts
+fake_hypixel.py (plancke pages, Mojang lookups and the Hypixel API),
+points get.py at it with PLANCKE_BASE_URL and calls the
+bot's slash command handlers with synthetic interactions at -rate
+commands per second (Poisson arrivals). The staggered background
+refresher can run alongside with -staggered-minutes.
+
+Nothing talks to Discord or plancke.io, and the real workbook is never
+touched.
+
+Usage:
+    python loadtest/driver.py -players 200 -rate 2 -duration 120
+    python loadtest/driver.py -mix sheepwars=1 -concurrency 16 -rate-429 0.05 -drip-rate 0.1
+    python loadtest/driver.py -players 1000 -mix leaderboard=1 -staggered-minutes 2
+    python loadtest/driver.py -source hypixel -api-limit 120   # Hypixel API source via fake_hypixel.py
+
+Reports throughput, p50/p95/p99 latency and error counts per command and
+per script run, event loop lag, and what the fake upstream served.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from collections import Counter, defaultdict
+from datetime import datetime
+from pathlib import Path
+
+LOADTEST_DIR = Path(__file__).parent.absolute()
+REPO_DIR = LOADTEST_DIR.parent
+WORK_ROOT = LOADTEST_DIR / ".work"
+RESULTS_DIR = LOADTEST_DIR / "results"
+sys.path.insert(0, str(REPO_DIR / "benchmarks"))
+
+import synthetic  # noqa: E402  (benchmarks/synthetic.py)
+
+FAKE_API_KEY = "loadtest-key"
+METRIC_CHOICES = ["kills", "deaths", "kdr", "wins", "losses", "wlr"]
+SCENARIOS = ("sheepwars", "leaderboard", "create", "refresh")
+
+
+# -------------------
+# Scratch bot directory
+# -------------------
+def prepare_workdir(players: int, history: int) -> Path:
+    """Copy the bot scripts next to a synthetic workbook and registry."""
+    work = WORK_ROOT / datetime.now().strftime("run-%Y%m%d-%H%M%S")
+    work.mkdir(parents=True)
+    for script in REPO_DIR.glob("*.py"):
+        shutil.copy2(script, work / script.name)
+    shutil.copy2(synthetic.workbook_fixture(players, history), work / "sheep_wars_stats.xlsx")
+    tracked, links = synthetic.registry_fixture(players)
+    shutil.copy2(tracked, work / "tracked_users.txt")
+    shutil.copy2(links, work / "user_links.json")
+    return work
+
+
+def start_fake_upstream(args) -> subprocess.Popen:
+    # fake_hypixel.py serves the plancke pages too, plus the Mojang lookups get.py makes
+    server = "fake_hypixel.py"
+    cmd = [
+        sys.executable, str(LOADTEST_DIR / server),
+        "-port", str(args.port),
+        "-latency-ms", str(args.latency_ms),
+        "-jitter-ms", str(args.jitter_ms),
+        "-error-rate", str(args.error_rate),
+        "-rate-429", str(args.rate_429),
+        "-drip-rate", str(args.drip_rate),
+        "-drip-ms", str(args.drip_ms),
+        "-key", FAKE_API_KEY,
+        "-limit", str(args.api_limit),
+        "-window", str(args.api_window),
+    ]
+    proc = subprocess.Popen(cmd)
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            upstream_stats(args.port)
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError(f"{server} did not start")
+
+
+def upstream_stats(port: int) -> dict:
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stats", timeout=2) as r:
+        return json.loads(r.read().decode("utf-8"))
+
+
+# -------------------
+# Synthetic interactions
+# -------------------
+class FakeUser:
+    def __init__(self, user_id: int, name: str):
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.messages = []
+
+    async def send(self, content=None, **kwargs):
+        self.messages.append(content)
+
+
+class FakeResponse:
+    def __init__(self, interaction):
+        self.interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def defer(self, **kwargs):
+        self._done = True
+
+    async def send_message(self, content=None, **kwargs):
+        self._done = True
+        self.interaction.record(content, kwargs)
+
+    async def edit_message(self, content=None, **kwargs):
+        self.interaction.record(content, kwargs)
+
+
+class FakeFollowup:
+    def __init__(self, interaction):
+        self.interaction = interaction
+
+    async def send(self, content=None, **kwargs):
+        self.interaction.record(content, kwargs)
+
+
+class FakeInteraction:
+    """Just enough of discord.Interaction for the slash command handlers."""
+
+    def __init__(self, user: FakeUser):
+        self.user = user
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.messages = []
+
+    def record(self, content, kwargs):
+        self.messages.append(content if content is not None else kwargs.get("embed"))
+
+    @property
+    def failed(self) -> bool:
+        return any(isinstance(m, str) and m.startswith("[ERROR]") for m in self.messages)
+
+
+# -------------------
+# Measurements
+# -------------------
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    k = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[k]
+
+
+def summarize(samples, elapsed):
+    """samples: list of (seconds, ok) -> report dict."""
+    latencies = sorted(s for s, _ok in samples)
+    errors = sum(1 for _s, ok in samples if not ok)
+    return {
+        "count": len(samples),
+        "errors": errors,
+        "throughput_per_s": round(len(samples) / elapsed, 3) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+        "max_ms": round(latencies[-1] * 1000, 1) if latencies else None,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 1) if latencies else None,
+    }
+
+
+class LoadTest:
+    def __init__(self, bot_module, args, players):
+        self.bot = bot_module
+        self.args = args
+        self.players = players
+        self.rng = random.Random(args.seed)
+        self.commands = defaultdict(list)
+        self.scripts = defaultdict(list)
+        self.failures = Counter()
+        self.loop_lag = []
+        self.offered = 0
+        self._wrap_run_script()
+
+    def _wrap_run_script(self):
+        # Every get.py/create_session.py subprocess goes through bot.run_script
+        original = self.bot.run_script
+
+        def measured_run_script(script_name, script_args):
+            start = time.perf_counter()
+            try:
+                result = original(script_name, script_args)
+            except Exception as e:
+                self.scripts[script_name].append((time.perf_counter() - start, False))
+                self.failures[f"{script_name}: {type(e).__name__}"] += 1
+                raise
+            self.scripts[script_name].append((time.perf_counter() - start, result.returncode == 0))
+            if result.returncode != 0:
+                lines = (result.stderr or result.stdout or "").strip().splitlines()
+                self.failures[f"{script_name}: {lines[-1][:120] if lines else 'no output'}"] += 1
+            return result
+
+        self.bot.run_script = measured_run_script
+
+    def pick_player(self):
+        i = self.rng.randrange(self.players)
+        return i, synthetic.player_name(i)
+
+    def invocation(self, scenario):
+        import discord
+
+        i, ign = self.pick_player()
+        # user ids match the synthetic user_links.json, so /create is authorized
+        interaction = FakeInteraction(FakeUser(10 ** 17 + i, f"user{i}"))
+        if scenario == "sheepwars":
+            return interaction, self.bot.sheepwars.callback(interaction, ign)
+        if scenario == "leaderboard":
+            metric = self.rng.choice(METRIC_CHOICES)
+            return interaction, self.bot.leaderboard.callback(interaction, discord.app_commands.Choice(name=metric, value=metric))
+        if scenario == "create":
+            return interaction, self.bot.create_session.callback(interaction, ign)
+        if scenario == "refresh":
+            return interaction, self.bot.refresh.callback(interaction, discord.app_commands.Choice(name="stats", value="-refresh"))
+        raise ValueError(f"Unknown scenario {scenario}")
+
+    async def run_one(self, scenario, semaphore):
+        arrival = time.perf_counter()
+        async with semaphore:
+            interaction, coro = self.invocation(scenario)
+            ok = True
+            try:
+                await coro
+                ok = not interaction.failed
+            except Exception as e:
+                ok = False
+                print(f"[ERROR] {scenario} raised: {e}")
+        # latency includes time queued behind the concurrency limit
+        self.commands[scenario].append((time.perf_counter() - arrival, ok))
+
+    async def probe_loop_lag(self, interval=0.1):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(interval)
+            self.loop_lag.append(max(0.0, loop.time() - start - interval))
+
+    async def run(self, mix):
+        names = list(mix)
+        weights = [mix[n] for n in names]
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+        background = [asyncio.create_task(self.probe_loop_lag())]
+        if self.args.staggered_minutes > 0:
+            background.append(asyncio.create_task(self.bot.staggered_stats_refresher(self.args.staggered_minutes)))
+
+        loop = asyncio.get_running_loop()
+        tasks = []
+        start = loop.time()
+        while loop.time() - start < self.args.duration:
+            if self.args.rate > 0 and names:
+                scenario = self.rng.choices(names, weights)[0]
+                tasks.append(asyncio.create_task(self.run_one(scenario, semaphore)))
+                self.offered += 1
+                await asyncio.sleep(self.rng.expovariate(self.args.rate))
+            else:
+                await asyncio.sleep(1)
+        print(f"[INFO] Arrivals stopped after {self.offered} commands; waiting for in-flight work...")
+        await asyncio.gather(*tasks)
+        for task in background:
+            task.cancel()
+        # staggered refreshes already scheduled are abandoned, as on bot shutdown
+        pending = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        return loop.time() - start
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"[ERROR] Unknown scenario '{name}' (choose from {', '.join(SCENARIOS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def _fmt(value):
+    return f"{value:,.1f}" if value is not None else "-"
+
+
+def print_table(title, rows):
+    print(f"\n{title}")
+    print(f"  {'name':<20}{'count':>7}{'errors':>8}{'per s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, r in rows.items():
+        print(f"  {name:<20}{r['count']:>7}{r['errors']:>8}{_fmt(r['throughput_per_s']):>9}"
+              f"{_fmt(r['p50_ms']):>10}{_fmt(r['p95_ms']):>10}{_fmt(r['p99_ms']):>10}{_fmt(r['max_ms']):>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the bot against a fake plancke.io")
+    parser.add_argument("-players", type=int, default=50, help="Tracked players in the synthetic workbook")
+    parser.add_argument("-history", type=int, default=5, help="History rows per player")
+    parser.add_argument("-duration", type=float, default=60.0, help="Seconds of arrivals")
+    parser.add_argument("-rate", type=float, default=1.0, help="Command arrivals per second")
+    parser.add_argument("-mix", default="sheepwars=6,leaderboard=3,create=1",
+                        help=f"Weighted scenarios from: {', '.join(SCENARIOS)}")
+    parser.add_argument("-concurrency", type=int, default=8, help="Commands handled at once")
+    parser.add_argument("-staggered-minutes", type=float, default=0.0,
+                        help="Also run the staggered refresher with this interval (0 = off)")
+    parser.add_argument("-port", type=int, default=8765, help="Fake plancke.io port")
+    parser.add_argument("-latency-ms", type=float, default=200.0)
+    parser.add_argument("-jitter-ms", type=float, default=100.0)
+    parser.add_argument("-error-rate", type=float, default=0.0)
+    parser.add_argument("-rate-429", type=float, default=0.0)
+    parser.add_argument("-drip-rate", type=float, default=0.0)
+    parser.add_argument("-drip-ms", type=float, default=2000.0)
+    parser.add_argument("-seed", type=int, default=None)
+    parser.add_argument("-source", choices=("plancke", "hypixel"), default="plancke",
+                        help="Stats source get.py uses")
+    parser.add_argument("-api-limit", type=int, default=300, help="Fake API requests per key per window")
+    parser.add_argument("-api-window", type=float, default=300.0, help="Fake API rate limit window (s)")
+    parser.add_argument("-keep", action="store_true", help="Keep the scratch directory")
+    parser.add_argument("-o", "--output", help="Results file (default: loadtest/results/load-<timestamp>.json)")
+    args = parser.parse_args(argv)
+    mix = parse_mix(args.mix)
+
+    work = prepare_workdir(args.players, args.history)
+    print(f"[INFO] Scratch bot directory: {work}")
+    upstream = start_fake_upstream(args)
+    cwd = os.getcwd()
+    try:
+        os.environ["PLANCKE_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+        os.environ["MOJANG_API_BASE_URL"] = f"http://127.0.0.1:{args.port}"
+        if args.source == "hypixel":
+            os.environ.update(SHEEPWARS_STATS_SOURCE="hypixel", HYPIXEL_API_KEY=FAKE_API_KEY,
+                              HYPIXEL_API_BASE_URL=f"http://127.0.0.1:{args.port}")
+        os.chdir(work)
+        sys.path.insert(0, str(work))
+        import bot as bot_module
+
+        test = LoadTest(bot_module, args, args.players)
+        elapsed = asyncio.run(test.run(mix))
+
+        commands = {name: summarize(samples, elapsed) for name, samples in sorted(test.commands.items())}
+        scripts = {name: summarize(samples, elapsed) for name, samples in sorted(test.scripts.items())}
+        lag = sorted(test.loop_lag)
+        served = upstream_stats(args.port)
+    finally:
+        os.chdir(cwd)
+        upstream.terminate()
+        upstream.wait(timeout=10)
+        if not args.keep:
+            shutil.rmtree(work, ignore_errors=True)
+
+    print_table("[DATA] Slash commands (latency includes queueing)", commands)
+    print_table("[DATA] Script runs (bot.run_script)", scripts)
+    lag_report = {
+        "p50_ms": round(percentile(lag, 50) * 1000, 1) if lag else None,
+        "p99_ms": round(percentile(lag, 99) * 1000, 1) if lag else None,
+        "max_ms": round(lag[-1] * 1000, 1) if lag else None,
+    }
+    if test.failures:
+        print("\n[DATA] Most common script failures")
+        for reason, count in test.failures.most_common(5):
+            print(f"  {count:>5}  {reason}")
+    print(f"\n[DATA] Event loop lag: p50 {lag_report['p50_ms']} ms, p99 {lag_report['p99_ms']} ms, max {lag_report['max_ms']} ms")
+    print(f"[DATA] Offered {test.offered} commands in {elapsed:.1f}s ({test.offered / elapsed:.2f}/s); upstream served {served}")
+
+    payload = {
+        "meta": {
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "args": vars(args),
+            "elapsed_s": round(elapsed, 2),
+            "offered": test.offered,
+        },
+        "commands": commands,
+        "scripts": scripts,
+        "event_loop_lag": lag_report,
+        "failures": dict(test.failures),
+        "upstream": served,
+    }
+    if args.output:
+        out = Path(args.output)
+    else:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        out = RESULTS_DIR / f"load-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    out.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    print(f"[DATA] Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
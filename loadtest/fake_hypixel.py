@@ -0,0 +1,197 @@
+"""Local stand-in for the Hypixel API (and Mojang's name -> UUID lookups).
+
+Serves the same per-player numbers as fake_plancke.py, as /v2/player JSON,
+so both stats sources can be run against one server and compared. The
+plancke page route is served too (by name or UUID). Each API key gets a
+fixed-window rate limit reported in RateLimit-* headers; going over it
+returns 429. POST /_rename {"old": ..., "new": ...} simulates a name
+change: the old name stops resolving, the UUID and stats stay.
+
+Usage:
+    python loadtest/fake_hypixel.py -port 8766 -key test-key -limit 120 -window 60
+    SHEEPWARS_STATS_SOURCE=hypixel HYPIXEL_API_KEY=test-key \\
+    HYPIXEL_API_BASE_URL=http://127.0.0.1:8766 MOJANG_API_BASE_URL=http://127.0.0.1:8766 \\
+        python get.py -ign Someone -refresh
+
+GET /_stats returns the request counters as JSON.
+"""
+import time
+import uuid
+
+from aiohttp import web
+
+from fake_plancke import FakePlancke, build_parser as plancke_parser, player_numbers
+
+
+def player_uuid(ign: str) -> str:
+    return uuid.uuid3(uuid.NAMESPACE_DNS, ign.casefold()).hex
+
+
+def player_json(ign: str, hits: int) -> dict:
+    """The parts of a /v2/player `player` object the stats source reads."""
+    n = player_numbers(ign, hits)
+    return {
+        "uuid": player_uuid(ign),
+        "displayname": ign,
+        "stats": {
+            "WoolGames": {
+                "coins": n["wool"],
+                "progression": {"experience": n["experience"], "available_layers": 3},
+                "sheep_wars": {"stats": {
+                    "wins": n["wins"], "losses": n["losses"], "kills": n["kills"],
+                    "deaths": n["deaths"], "damage_dealt": n["damage"],
+                }},
+                "capture_the_wool": {"stats": {
+                    "participated_wins": n["ctw_wins"], "participated_losses": n["ctw_losses"],
+                    "kills": n["ctw_kills"], "deaths": n["ctw_deaths"],
+                }},
+            },
+        },
+    }
+
+
+class FakeHypixel(FakePlancke):
+    def __init__(self, key="test-key", limit=300, window=300.0, **kwargs):
+        super().__init__(**kwargs)
+        self.key = key
+        self.limit = limit
+        self.window = window
+        self.windows = {}  # key -> (window start, requests in it)
+        self.names = {}    # uuid -> current ign, filled by the lookups
+        self.seeds = {}    # uuid -> ign the numbers are generated from
+        self.retired = set()  # casefolded names given up by a rename
+
+    def _lookup(self, name: str):
+        key = name.casefold()
+        for uuid, current in self.names.items():
+            if current.casefold() == key:
+                return {"id": uuid, "name": current}
+        if key in self.retired:
+            return None
+        uuid = player_uuid(name)
+        self.names[uuid] = name
+        self.seeds.setdefault(uuid, name)
+        return {"id": uuid, "name": name}
+
+    def page(self, ign: str):
+        uuid = ign.replace("-", "").lower()
+        if uuid in self.seeds:
+            ign = self.seeds[uuid]
+        else:
+            profile = self._lookup(ign)
+            if profile is None:
+                return None
+            ign = self.seeds[profile["id"]]
+        return super().page(ign)
+
+    async def handle_lookup(self, request):
+        self.stats["lookup"] += 1
+        await self.delay()
+        profile = self._lookup(request.match_info["name"])
+        if profile is None:
+            return web.json_response({"errorMessage": "Couldn't find any profile with that name"}, status=404)
+        return web.json_response(profile)
+
+    async def handle_uuid_lookup(self, request):
+        self.stats["uuid_lookup"] += 1
+        await self.delay()
+        uuid = request.match_info["uuid"].replace("-", "")
+        if uuid not in self.names:
+            return web.Response(status=204)
+        return web.json_response({"id": uuid, "name": self.names[uuid]})
+
+    async def handle_rename(self, request):
+        body = await request.json()
+        profile = self._lookup(body["old"])
+        if profile is None:
+            return web.json_response({"error": "unknown player"}, status=404)
+        self.names[profile["id"]] = body["new"]
+        self.retired.add(body["old"].casefold())
+        self.retired.discard(body["new"].casefold())
+        return web.json_response({"id": profile["id"], "name": body["new"]})
+
+    async def handle_bulk_lookup(self, request):
+        self.stats["bulk_lookup"] += 1
+        names = await request.json()
+        if not isinstance(names, list) or len(names) > 10:
+            return web.json_response({"error": "at most 10 names"}, status=400)
+        await self.delay()
+        profiles = [self._lookup(name) for name in names]
+        return web.json_response([p for p in profiles if p is not None])
+
+    def _rate_headers(self, key: str):
+        """Count one request against `key`; returns (allowed, headers)."""
+        now = time.monotonic()
+        start, used = self.windows.get(key, (now, 0))
+        if now - start >= self.window:
+            start, used = now, 0
+        used += 1
+        self.windows[key] = (start, used)
+        reset = max(1, int(self.window - (now - start)))
+        headers = {
+            "RateLimit-Limit": str(self.limit),
+            "RateLimit-Remaining": str(max(0, self.limit - used)),
+            "RateLimit-Reset": str(reset),
+        }
+        if used > self.limit:
+            headers["Retry-After"] = str(reset)
+            return False, headers
+        return True, headers
+
+    async def handle_api_player(self, request):
+        self.stats["api_requests"] += 1
+        key = request.headers.get("API-Key")
+        if key != self.key:
+            self.stats["403"] += 1
+            return web.json_response({"success": False, "cause": "Invalid API key"}, status=403)
+        allowed, headers = self._rate_headers(key)
+        if not allowed:
+            self.stats["429"] += 1
+            return web.json_response({"success": False, "cause": "Key throttle"}, status=429, headers=headers)
+        await self.delay()
+
+        if self.rng.random() < self.error_rate:
+            self.stats["500"] += 1
+            return web.json_response({"success": False, "cause": "Internal error"}, status=500, headers=headers)
+
+        uuid = request.query.get("uuid", "").replace("-", "")
+        player = None
+        if uuid in self.names:
+            seed = self.seeds[uuid]
+            self.hits[seed.casefold()] += 1
+            player = player_json(seed, self.hits[seed.casefold()])
+            player["displayname"] = self.names[uuid]
+        self.stats["200"] += 1
+        return web.json_response({"success": True, "player": player}, headers=headers)
+
+    def app(self) -> web.Application:
+        app = super().app()
+        app.router.add_get("/minecraft/profile/lookup/name/{name}", self.handle_lookup)
+        app.router.add_post("/minecraft/profile/lookup/bulk/byname", self.handle_bulk_lookup)
+        app.router.add_get("/minecraft/profile/lookup/{uuid}", self.handle_uuid_lookup)
+        app.router.add_post("/_rename", self.handle_rename)
+        app.router.add_get("/v2/player", self.handle_api_player)
+        return app
+
+
+def build_parser():
+    parser = plancke_parser()
+    parser.description = "Local Hypixel API + plancke.io stand-in for load tests"
+    parser.set_defaults(port=8766)
+    parser.add_argument("-key", default="test-key", help="The only API key accepted")
+    parser.add_argument("-limit", type=int, default=300, help="Requests per key per window")
+    parser.add_argument("-window", type=float, default=300.0, help="Rate limit window in seconds")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    server = FakeHypixel(args.key, args.limit, args.window, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                         error_rate=args.error_rate, rate_429=args.rate_429, drip_rate=args.drip_rate,
+                         drip_ms=args.drip_ms, seed=args.seed)
+    print(f"[OK] Fake Hypixel API on http://{args.host}:{args.port} (key {args.key}, {args.limit}/{args.window:g}s)")
+    web.run_app(server.app(), host=args.host, port=args.port, access_log=None, print=None)
+
+
+if __name__ == "__main__":
+    main()
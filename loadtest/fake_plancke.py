@@ -0,0 +1,165 @@
+"""Local stand-in for plancke.io player pages, for load testing.
+
+Serves raw_page.html for any IGN with the Wool Games block rewritten to
+per-player numbers (deterministic per IGN, growing a little on every
+request so deltas move). Latency, errors, 429s and slow-drip bodies are
+configurable.
+
+Usage:
+    python loadtest/fake_plancke.py -port 8765 -latency-ms 300 -rate-429 0.05
+    PLANCKE_BASE_URL=http://127.0.0.1:8765 python get.py -ign Someone -refresh
+
+GET /_stats returns the request counters as JSON.
+"""
+import argparse
+import asyncio
+import random
+import re
+import sys
+import zlib
+from collections import Counter
+from pathlib import Path
+
+from aiohttp import web
+
+REPO_DIR = Path(__file__).parent.parent.absolute()
+RAW_PAGE = REPO_DIR / "raw_page.html"
+sys.path.insert(0, str(REPO_DIR))
+
+from stats_parser import wool_games_level  # noqa: E402
+
+# Wool/Level, Sheep Wars and Capture the Wool stats as they appear on the page
+WOOL_GAMES_BLOCK = re.compile(r"<b>Wool:</b>.*?Capture the Wool</h4>.*?K/D:</b>\s*[\d.]+<br />", re.S)
+
+
+def _ratio(a, b):
+    return round(a / b, 2) if b else float(a)
+
+
+def player_numbers(ign: str, hits: int) -> dict:
+    """Wool Games numbers for `ign` (deterministic); `hits` adds a few games per request."""
+    rng = random.Random(zlib.crc32(ign.casefold().encode("utf-8")))
+    n = {
+        "wins": rng.randint(0, 20000) + hits * rng.randint(0, 3),
+        "losses": rng.randint(1, 4000) + hits * rng.randint(0, 2),
+        "kills": rng.randint(0, 40000) + hits * rng.randint(0, 6),
+        "deaths": rng.randint(1, 8000) + hits * rng.randint(0, 3),
+        "ctw_wins": rng.randint(0, 500),
+        "ctw_losses": rng.randint(1, 500),
+        "ctw_kills": rng.randint(0, 3000),
+        "ctw_deaths": rng.randint(1, 3000),
+        "wool": rng.randint(0, 200000),
+        "experience": rng.randint(0, 15 * 490000),
+    }
+    n["damage"] = n["kills"] * rng.randint(15, 30)
+    return n
+
+
+def render_wool_games(ign: str, hits: int) -> str:
+    """Wool Games markup for `ign`, as plancke.io shows it."""
+    n = player_numbers(ign, hits)
+    return (
+        f"<b>Wool:</b> {n['wool']:,}<br /><b>Level:</b> {wool_games_level(n['experience'])}<br /><hr>"
+        f"<h4>Sheep Wars</h4><b>Wins:</b> {n['wins']:,}<br /><b>Losses:</b> {n['losses']:,}<br />"
+        f"<b>W/L:</b> {_ratio(n['wins'], n['losses'])}<br /><b>Kills:</b> {n['kills']:,}<br />"
+        f"<b>Deaths:</b> {n['deaths']:,}<br /><b>K/D:</b> {_ratio(n['kills'], n['deaths'])}<br />"
+        f"<b>Damage Dealt:</b> {n['damage']:,}<hr>"
+        f"<h4>Capture the Wool</h4><b>Wins:</b> {n['ctw_wins']}<br /><b>Losses:</b> {n['ctw_losses']}<br />"
+        f"<b>W/L:</b> {_ratio(n['ctw_wins'], n['ctw_losses'])}<br /><b>Kills:</b> {n['ctw_kills']}<br />"
+        f"<b>Deaths:</b> {n['ctw_deaths']}<br /><b>K/D:</b> {_ratio(n['ctw_kills'], n['ctw_deaths'])}<br />"
+    )
+
+
+class FakePlancke:
+    def __init__(self, latency_ms=200.0, jitter_ms=100.0, error_rate=0.0, rate_429=0.0,
+                 drip_rate=0.0, drip_ms=2000.0, seed=None):
+        self.latency = latency_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.drip_rate = drip_rate
+        self.drip = drip_ms / 1000.0
+        self.rng = random.Random(seed)
+        self.template = RAW_PAGE.read_text(encoding="utf-8")
+        self.hits = Counter()
+        self.stats = Counter()
+
+    def page(self, ign: str):
+        """Page bytes for `ign`, or None for a player that doesn't exist."""
+        key = ign.casefold()
+        self.hits[key] += 1
+        block = render_wool_games(ign, self.hits[key])
+        return WOOL_GAMES_BLOCK.sub(lambda _m: block, self.template, count=1).encode("utf-8")
+
+    async def delay(self):
+        await asyncio.sleep(max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter)))
+
+    async def handle_player(self, request):
+        ign = request.match_info["ign"]
+        self.stats["requests"] += 1
+        await self.delay()
+
+        roll = self.rng.random()
+        if roll < self.rate_429:
+            self.stats["429"] += 1
+            return web.Response(status=429, text="Too Many Requests", headers={"Retry-After": "5"})
+        if roll < self.rate_429 + self.error_rate:
+            self.stats["500"] += 1
+            return web.Response(status=500, text="Internal Server Error")
+
+        body = self.page(ign)
+        if body is None:
+            self.stats["404"] += 1
+            return web.Response(status=404, text="Player not found")
+        if self.rng.random() < self.drip_rate:
+            # Headers now, body in small chunks spread over drip_ms
+            self.stats["drip"] += 1
+            response = web.StreamResponse(headers={"Content-Type": "text/html; charset=utf-8"})
+            response.content_length = len(body)
+            await response.prepare(request)
+            chunks = 20
+            size = len(body) // chunks + 1
+            for i in range(0, len(body), size):
+                await response.write(body[i:i + size])
+                await asyncio.sleep(self.drip / chunks)
+            await response.write_eof()
+            self.stats["200"] += 1
+            return response
+
+        self.stats["200"] += 1
+        return web.Response(body=body, content_type="text/html", charset="utf-8")
+
+    async def handle_stats(self, request):
+        return web.json_response({**self.stats, "players": len(self.hits)})
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/hypixel/player/stats/{ign}", self.handle_player)
+        app.router.add_get("/_stats", self.handle_stats)
+        return app
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Local plancke.io stand-in for load tests")
+    parser.add_argument("-host", default="127.0.0.1")
+    parser.add_argument("-port", type=int, default=8765)
+    parser.add_argument("-latency-ms", type=float, default=200.0, help="Mean response delay")
+    parser.add_argument("-jitter-ms", type=float, default=100.0, help="Uniform +/- spread around the delay")
+    parser.add_argument("-error-rate", type=float, default=0.0, help="Fraction of HTTP 500 responses")
+    parser.add_argument("-rate-429", type=float, default=0.0, help="Fraction of HTTP 429 responses")
+    parser.add_argument("-drip-rate", type=float, default=0.0, help="Fraction of bodies sent slowly in chunks")
+    parser.add_argument("-drip-ms", type=float, default=2000.0, help="Time to send a slow-drip body")
+    parser.add_argument("-seed", type=int, default=None)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    server = FakePlancke(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_429,
+                         args.drip_rate, args.drip_ms, args.seed)
+    print(f"[OK] Fake plancke.io on http://{args.host}:{args.port}")
+    web.run_app(server.app(), host=args.host, port=args.port, access_log=None, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""Prometheus text-format metrics served locally by the bot.
+
+No client library or outside service is needed: the few metric types we
+use are implemented here and served with aiohttp (already installed as a
+discord.py dependency) on http://127.0.0.1:9108/metrics by default.
+
+Refreshes run in get.py subprocesses, so numbers only they know (proxy
+pool, proxy attempts, workbook save latency) are picked up from the span
+file they write (see tracing.py) each time /metrics is scraped.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from functools import wraps
+
+import tracing
+
+METRICS_HOST = os.environ.get("SHEEPWARS_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("SHEEPWARS_METRICS_PORT", 9108))
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+_REGISTRY = []
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    inner = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + inner + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        _REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, None, value) for key, value in self._values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for name, key, extra, value in self.samples():
+            lines.append(f"{name}{_format_labels(self.labelnames, key, extra)} {value}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount=1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = state[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def samples(self):
+        out = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                for bound, c in zip(self.buckets, counts):
+                    out.append((f"{self.name}_bucket", key, ("le", bound), c))
+                out.append((f"{self.name}_bucket", key, ("le", "+Inf"), count))
+                out.append((f"{self.name}_sum", key, None, round(total, 6)))
+                out.append((f"{self.name}_count", key, None, count))
+        return out
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+# -------------------
+# Bot metrics
+# -------------------
+REFRESH_SECONDS = Histogram("sheepwars_refresh_seconds", "Wall time of one get.py refresh as seen by the bot", ["kind"])
+COMMAND_SECONDS = Histogram("sheepwars_command_seconds", "Slash command handling time", ["command"])
+COMMAND_ERRORS = Counter("sheepwars_command_errors_total", "Slash commands that raised", ["command"])
+QUEUE_DEPTH = Gauge("sheepwars_refresh_queue_depth", "Refreshes scheduled but not started yet")
+FETCHES_IN_FLIGHT = Gauge("sheepwars_fetches_in_flight", "get.py refreshes currently running")
+FETCH_WORKERS = Gauge("sheepwars_fetch_workers", "Fetch worker processes connected (see fetch_worker.py)")
+CACHE_REQUESTS = Counter("sheepwars_cache_requests_total", "Response cache lookups", ["cache", "result"])
+CACHE_HIT_RATIO = Gauge("sheepwars_cache_hit_ratio", "Hit ratio of response caches since start", ["cache"])
+PROXY_POOL_SIZE = Gauge("sheepwars_proxy_pool_size", "Working proxies found by the last proxy pool build")
+PROXY_ATTEMPTS = Counter("sheepwars_proxy_attempts_total", "Fetch attempts by route and outcome", ["route", "outcome"])
+PROXY_SUCCESS_RATIO = Gauge("sheepwars_proxy_success_ratio", "Share of proxied fetch attempts that succeeded")
+STORE_COMMIT_SECONDS = Histogram("sheepwars_store_commit_seconds", "Workbook save latency in get.py")
+STAGE_SECONDS = Histogram("sheepwars_stage_seconds", "get.py stage latency from timing spans", ["stage"])
+SCHEDULER_LAG = Gauge("sheepwars_scheduler_lag_seconds", "How late the last scheduled snapshot started compared to 9:30", ["job"])
+EVENT_LOOP_LAG = Gauge("sheepwars_event_loop_lag_seconds", "Latest event loop scheduling delay")
+EVENT_LOOP_LAG_HIST = Histogram("sheepwars_event_loop_lag_hist_seconds", "Event loop scheduling delay",
+                                buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5))
+
+
+def cache_lookup(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def timed_command(name):
+    """Decorator for slash command callbacks: records latency and errors."""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                COMMAND_ERRORS.inc(command=name)
+                raise
+            finally:
+                COMMAND_SECONDS.observe(time.perf_counter() - start, command=name)
+        return wrapper
+    return decorator
+
+
+# -------------------
+# Span file follower
+# -------------------
+class SpanFollower:
+    """Incrementally reads new records from the tracing JSON-lines file."""
+
+    def __init__(self, path=None):
+        self.path = path or tracing.TRACE_FILE
+        self.offset = None
+        self.inode = None
+
+    def poll(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return
+        if self.offset is None:
+            # Only count spans written after the bot started
+            self.offset, self.inode = st.st_size, st.st_ino
+            return
+        if st.st_ino != self.inode or st.st_size < self.offset:
+            # rotated
+            self.offset, self.inode = 0, st.st_ino
+        if st.st_size == self.offset:
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            f.seek(self.offset)
+            data = f.read()
+        # Keep a trailing partial line for the next poll
+        end = data.rfind("\n") + 1
+        self.offset += len(data[:end].encode("utf-8"))
+        for line in data[:end].splitlines():
+            try:
+                self.ingest(json.loads(line))
+            except Exception:
+                continue
+
+    def ingest(self, record):
+        name = record.get("span")
+        seconds = (record.get("ms") or 0) / 1000.0
+        if name == "proxy.pool" and "pool_size" in record:
+            PROXY_POOL_SIZE.set(record["pool_size"])
+        elif name == "fetch.attempt":
+            route = "direct" if record.get("proxy", "direct") == "direct" else "proxy"
+            outcome = "ok" if record.get("status") == "ok" else "error"
+            PROXY_ATTEMPTS.inc(route=route, outcome=outcome)
+        elif name == "workbook.save":
+            STORE_COMMIT_SECONDS.observe(seconds)
+        if name and record.get("parent"):
+            STAGE_SECONDS.observe(seconds, stage=name)
+
+
+_follower = SpanFollower()
+
+
+def _update_derived():
+    for cache in {key[0] for key in list(CACHE_REQUESTS._values)}:
+        hits = CACHE_REQUESTS.value(cache=cache, result="hit")
+        misses = CACHE_REQUESTS.value(cache=cache, result="miss")
+        if hits + misses:
+            CACHE_HIT_RATIO.set(round(hits / (hits + misses), 4), cache=cache)
+    ok = PROXY_ATTEMPTS.value(route="proxy", outcome="ok")
+    failed = PROXY_ATTEMPTS.value(route="proxy", outcome="error")
+    if ok + failed:
+        PROXY_SUCCESS_RATIO.set(round(ok / (ok + failed), 4))
+
+
+def render() -> str:
+    _follower.poll()
+    _update_derived()
+    return "\n".join(m.render() for m in _REGISTRY) + "\n"
+
+
+# -------------------
+# Background tasks
+# -------------------
+async def monitor_event_loop_lag(interval: float = 1.0):
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        lag = max(0.0, loop.time() - start - interval)
+        EVENT_LOOP_LAG.set(round(lag, 6))
+        EVENT_LOOP_LAG_HIST.observe(lag)
+
+
+async def start_metrics_server(host: str = METRICS_HOST, port: int = METRICS_PORT):
+    """Serve /metrics from the running event loop. Returns the aiohttp runner."""
+    from aiohttp import web
+
+    async def handle_metrics(request):
+        # Reading the span file is small but still disk I/O; keep it off the loop
+        body = await asyncio.to_thread(render)
+        return web.Response(body=body.encode("utf-8"),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    print(f"[OK] Metrics served on http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,255 @@
+"""Archive of fetched plancke.io pages, for re-extraction without the network.
+
+Every page PlanckeSource fetches is kept here, whether or not extraction
+worked:
+
+    page_archive/blobs/ab/ab12...ef.html.gz   one gzip file per distinct page (sha256 of the body)
+    page_archive/players/<key>.jsonl          {"t": fetched at, "name": IGN, "sha": ..., "size": raw bytes}
+
+<key> is refresh_state.player_key() (UUID, or the casefolded IGN). A page
+identical to one already stored only touches the blob's mtime, and a
+player's log only grows when their page changed, so unchanged refreshes
+cost a hash and a stat(). A ~70 KB page is ~12 KB gzipped.
+
+The blobs are capped at SHEEPWARS_PAGE_ARCHIVE_MB (default 200 MB): at most
+every PRUNE_INTERVAL seconds a writer deletes the least recently seen
+blobs down to 90% of the cap and drops their log lines. Set
+SHEEPWARS_PAGE_ARCHIVE=0 to stop archiving.
+
+Re-extraction reads the archive only:
+
+    python page_archive.py -ign Chuckegg          latest page -> extracted stats
+    python page_archive.py -ign Chuckegg -all     every archived page of the player
+    python page_archive.py -players               latest page of every player; counts failures
+    python page_archive.py -show <sha>            the raw HTML, for debugging an extraction
+    python get.py -source archive --from-file tracked_users.txt -refresh
+                                                  store stats from each player's latest page
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+from user_registry import _atomic_write
+from workbook_lock import WorkbookLock
+
+SCRIPT_DIR = Path(__file__).parent.absolute()
+ARCHIVE_DIR = os.environ.get("SHEEPWARS_PAGE_ARCHIVE_DIR") or str(SCRIPT_DIR / "page_archive")
+ENABLED = os.environ.get("SHEEPWARS_PAGE_ARCHIVE", "1").strip().lower() not in ("0", "false", "no", "off")
+MAX_BYTES = int(float(os.environ.get("SHEEPWARS_PAGE_ARCHIVE_MB", 200)) * 1024 * 1024)
+PRUNE_INTERVAL = 600
+
+
+class PageArchive:
+    def __init__(self, root=ARCHIVE_DIR, max_bytes=MAX_BYTES):
+        self.root = Path(root)
+        self.blobs = self.root / "blobs"
+        self.players = self.root / "players"
+        self.max_bytes = max_bytes
+        # Serialises log appends with pruning, across processes
+        self._lock = WorkbookLock(self.root / "archive")
+
+    def blob_path(self, sha: str) -> Path:
+        return self.blobs / sha[:2] / f"{sha}.html.gz"
+
+    def _log_path(self, key: str) -> Path:
+        # UUIDs and IGNs are filename-safe; anything else is hashed
+        safe = key if key.replace("-", "").replace("_", "").isalnum() else hashlib.sha256(key.encode()).hexdigest()
+        return self.players / f"{safe}.jsonl"
+
+    # -------------------
+    # Writing
+    # -------------------
+    def store(self, key: str, name: str, body: bytes, fetched=None) -> str:
+        """Archive one fetched page for player `key`; returns its sha256."""
+        sha = hashlib.sha256(body).hexdigest()
+        path = self.blob_path(sha)
+        if path.exists():
+            os.utime(path)  # recently seen pages are pruned last
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_bytes(gzip.compress(body, compresslevel=6, mtime=0))
+            os.replace(tmp, path)
+
+        self.players.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            log = self._log_path(key)
+            last = self._last_line(log)
+            if last is None or last.get("sha") != sha or last.get("name") != name:
+                line = {"t": fetched or time.time(), "name": name, "sha": sha, "size": len(body)}
+                with open(log, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(line, separators=(",", ":")) + "\n")
+            self._maybe_prune()
+        return sha
+
+    @staticmethod
+    def _last_line(log: Path):
+        try:
+            with open(log, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - 4096))
+                tail = f.read().splitlines()
+            return json.loads(tail[-1]) if tail else None
+        except (OSError, ValueError):
+            return None
+
+    def _maybe_prune(self):
+        marker = self.root / ".pruned"
+        try:
+            if time.time() - marker.stat().st_mtime < PRUNE_INTERVAL:
+                return
+        except OSError:
+            pass
+        marker.touch()
+        self.prune()
+
+    def prune(self) -> int:
+        """Delete least recently seen blobs until under 90% of the cap; returns how many went.
+
+        Call with the archive lock held (store() does).
+        """
+        blobs = []
+        for sub in self.blobs.glob("*"):
+            for entry in os.scandir(sub):
+                if entry.name.endswith(".html.gz"):
+                    st = entry.stat()
+                    blobs.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _t, size, _p in blobs)
+        if total <= self.max_bytes:
+            return 0
+        deleted = set()
+        for _mtime, size, path in sorted(blobs):
+            if total <= self.max_bytes * 0.9:
+                break
+            os.remove(path)
+            total -= size
+            deleted.add(os.path.basename(path).split(".")[0])
+        for log in self.players.glob("*.jsonl"):
+            lines = self._read_log(log)
+            kept = [line for line in lines if line["sha"] not in deleted]
+            if len(kept) == len(lines):
+                continue
+            if kept:
+                _atomic_write(str(log), "".join(json.dumps(line, separators=(",", ":")) + "\n" for line in kept))
+            else:
+                os.remove(log)
+        print(f"[INFO] Page archive over {self.max_bytes / (1024 * 1024):g} MB: dropped {len(deleted)} old page(s)")
+        return len(deleted)
+
+    # -------------------
+    # Reading
+    # -------------------
+    @staticmethod
+    def _read_log(log: Path) -> list:
+        lines = []
+        try:
+            with open(log, "r", encoding="utf-8") as f:
+                for raw in f:
+                    try:
+                        lines.append(json.loads(raw))
+                    except ValueError:
+                        continue  # a line cut short by a crash
+        except OSError:
+            pass
+        return lines
+
+    def history(self, key: str) -> list:
+        """Archived pages of a player, oldest first: [{"t", "name", "sha", "size"}, ...]."""
+        return self._read_log(self._log_path(key))
+
+    def latest(self, key: str):
+        pages = self.history(key)
+        return pages[-1] if pages else None
+
+    def keys(self) -> list:
+        return sorted(log.stem for log in self.players.glob("*.jsonl"))
+
+    def load(self, sha: str) -> str:
+        """The archived page as text (raises FileNotFoundError once pruned)."""
+        return gzip.decompress(self.blob_path(sha).read_bytes()).decode("utf-8", errors="replace")
+
+
+def archive_page(username, body: bytes, identities=None):
+    """Store a fetched page if archiving is on; returns its sha256, or None. Never raises."""
+    if not ENABLED:
+        return None
+    from refresh_state import player_key
+
+    try:
+        return PageArchive().store(player_key(username, identities), username, body)
+    except Exception as e:
+        print(f"[WARNING] Could not archive the page of {username}: {e}")
+        return None
+
+
+# -------------------
+# Re-extraction
+# -------------------
+def extract(html: str):
+    """extract_stats() dict for an archived page, or None if the page has no Sheep Wars stats."""
+    from stats_parser import page_text, extract_stats
+
+    return extract_stats(page_text(html))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Re-extract Sheep Wars stats from archived pages (no network)")
+    parser.add_argument("-ign", "--username", help="Player to re-extract (UUID or IGN)")
+    parser.add_argument("-all", action="store_true", help="Every archived page of the player, not just the latest")
+    parser.add_argument("-players", action="store_true", help="Latest page of every archived player")
+    parser.add_argument("-show", metavar="SHA", help="Print one archived page's HTML")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    archive = PageArchive()
+    if args.show:
+        try:
+            sys.stdout.write(archive.load(args.show))
+        except FileNotFoundError:
+            print(f"[ERROR] No archived page {args.show}", file=sys.stderr)
+            sys.exit(1)
+        return
+
+    if args.username:
+        from identity import IdentityCache
+        from refresh_state import player_key
+
+        key = player_key(args.username, IdentityCache())
+        pages = archive.history(key)
+        if not pages:
+            print(f"[ERROR] No archived pages for {args.username}", file=sys.stderr)
+            sys.exit(1)
+        jobs = [(key, page) for page in (pages if args.all else pages[-1:])]
+    elif args.players:
+        jobs = [(key, archive.latest(key)) for key in archive.keys()]
+        jobs = [(key, page) for key, page in jobs if page]
+    else:
+        build_parser().error("give -ign, -players or -show")
+
+    failed = 0
+    for key, page in jobs:
+        fetched = time.strftime("%Y-%m-%d %H:%M", time.localtime(page["t"]))
+        try:
+            stats = extract(archive.load(page["sha"]))
+        except FileNotFoundError:
+            stats = None
+        if stats is None:
+            failed += 1
+            print(f"[ERROR] {page['name']} ({fetched}, {page['sha'][:12]}): no Sheep Wars stats extracted")
+            continue
+        print(f"[OK] {page['name']} ({fetched}): {stats['wins']} W / {stats['losses']} L, "
+              f"{stats['kills']} K / {stats['deaths']} D, level {stats['level']}")
+    print(f"[INFO] Re-extracted {len(jobs) - failed}/{len(jobs)} page(s) from {archive.root}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
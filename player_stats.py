@@ -2,52 +2,41 @@ import os
 import argparse
 import sys
 from pathlib import Path
-from openpyxl import Workbook, load_workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
+import refresh_state
+from workbook_lock import WorkbookLock
 
 # Get script directory for file operations
 SCRIPT_DIR = Path(__file__).parent.absolute()
+EXCEL_FILE = str(SCRIPT_DIR / "sheep_wars_stats.xlsx")
 
 # -------------------
 # CLI arguments
 # -------------------
-parser = argparse.ArgumentParser(description="Create player stats sheet template in Excel")
-parser.add_argument("-ign", "--username", required=True, help="Minecraft IGN")
-args = parser.parse_args()
+def build_parser():
+    parser = argparse.ArgumentParser(description="Create player stats sheet template in Excel")
+    parser.add_argument("-ign", "--username", required=True, help="Minecraft IGN")
+    parser.add_argument("-keep", action="store_true", help="Leave an existing sheet as it is instead of replacing it")
+    return parser
 
-USERNAME = args.username
-EXCEL_FILE = str(SCRIPT_DIR / "sheep_wars_stats.xlsx")
 
-try:
-    print(f"[INFO] Creating sheet template for {USERNAME}...")
-
-    # -------------------
-    # Create or load workbook
-    # -------------------
-    if os.path.exists(EXCEL_FILE):
-        wb = load_workbook(EXCEL_FILE)
-    else:
-        wb = Workbook()
-        # Remove default sheet if present
-        if "Sheet" in wb.sheetnames:
-            wb.remove(wb["Sheet"])
+def create_template(wb, username):
+    """Add an empty stats sheet for username to wb (replacing an existing one) and return it."""
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+    from sheet_index import find_sheet_name, create_sheet, remove_sheet
 
     # -------------------
     # Create new sheet with player name
     # -------------------
-    sheet_name = USERNAME
+    sheet_name = username
     # create sheet, but respect existing sheet name casing (case-insensitive match)
-    existing = None
-    for s in wb.sheetnames:
-        if s.casefold() == sheet_name.casefold():
-            existing = s
-            break
+    existing = find_sheet_name(wb, sheet_name)
 
     if existing:
         print(f"[WARNING] Sheet '{existing}' already exists. Removing old data...")
-        wb.remove(wb[existing])
+        remove_sheet(wb, existing)
 
-    ws = wb.create_sheet(USERNAME)
+    ws = create_sheet(wb, username)
 
     # -------------------
     # Styling
@@ -114,13 +103,59 @@ try:
     # -------------------
     ws.column_dimensions["A"].width = 15
     ws.column_dimensions["B"].width = 15
-
-    # -------------------
-    # Save workbook
-    # -------------------
-    wb.save(EXCEL_FILE)
-    print(f"[OK] Sheet '{sheet_name}' template created in {EXCEL_FILE}")
-
-except Exception as e:
-    print(f"[ERROR] {str(e)}", file=sys.stderr)
-    sys.exit(1)
+    return ws
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    username = args.username
+
+    try:
+        from openpyxl import Workbook, load_workbook
+        from leaderboard import ChangeLog
+        from sheet_index import find_sheet_name
+
+        print(f"[INFO] Creating sheet template for {username}...")
+
+        # -------------------
+        # Create or load workbook
+        # -------------------
+        # Held until the save; on errors we exit and the OS drops it
+        lock = WorkbookLock(EXCEL_FILE)
+        lock.acquire()
+        changes = ChangeLog(EXCEL_FILE)
+        if os.path.exists(EXCEL_FILE):
+            wb = load_workbook(EXCEL_FILE)
+            if args.keep:
+                existing = find_sheet_name(wb, username)
+                if existing:
+                    lock.release()
+                    print(f"[OK] Sheet '{existing}' already exists, left as it is")
+                    return
+        else:
+            wb = Workbook()
+            # Remove default sheet if present
+            if "Sheet" in wb.sheetnames:
+                wb.remove(wb["Sheet"])
+
+        existing = find_sheet_name(wb, username)
+        ws = create_template(wb, username)
+        sheet_name = ws.title
+        changes.changed(ws, existing)
+
+        # -------------------
+        # Save workbook
+        # -------------------
+        wb.save(EXCEL_FILE)
+        changes.publish()
+        lock.release()
+        refresh_state.forget(username)
+        print(f"[OK] Sheet '{sheet_name}' template created in {EXCEL_FILE}")
+
+    except Exception as e:
+        print(f"[ERROR] {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
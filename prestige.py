@@ -0,0 +1,179 @@
+"""Prestige icons, embed colours and ANSI tags, precomputed per level.
+
+Every leaderboard row and stats embed shows a "[level icon]" tag in the
+player's prestige colour. STYLES is built once at import for levels
+0..TABLE_LEVELS, so rendering one is an index:
+
+    style(1345).tag    -> "\\u001b[1;33m[1345♫]\\u001b[0;0m"
+    style(1345).color  -> (255, 170, 0) for discord.Color.from_rgb
+
+Rainbow prestiges get one ANSI colour per character, cycling through the
+tier's palette the way the in-game tag does. Discord's ```ansi blocks only
+know the eight basic foreground colours, so every RGB colour is mapped to
+the nearest of those once, here, instead of on every render.
+"""
+from bisect import bisect_right
+from typing import NamedTuple
+
+# Prestige icons per 100 levels (index 0 = levels 0-99)
+PRESTIGE_ICONS = [
+    "❤", "✙", "✫", "✈", "✠", "♙", "⚡", "☢", "✏", "☯",
+    "☃️", "۞", "✤", "♫", "♚", "❉", "Σ", "￡", "✖", "❁",
+    "✚", "✯", "✆", "❥", "☾⋆⁺", "⚜", "✦", "⚝", "✉", "ツ",
+    "❣", "✮", "✿", "✲", "❂", "ƒ", "$", "⋚⋚", "Φ", "✌",
+]
+
+# Minecraft chat colours used by the prestige tags
+GRAY = (119, 119, 119)
+DARK_GRAY = (170, 170, 170)
+WHITE = (255, 255, 255)
+RED = (255, 85, 85)
+GOLD = (255, 170, 0)
+YELLOW = (255, 255, 85)
+GREEN = (85, 255, 85)
+AQUA = (85, 255, 255)
+DARK_AQUA = (0, 170, 170)
+BLUE = (85, 85, 255)
+LIGHT_PURPLE = (255, 85, 255)
+DARK_PURPLE = (170, 0, 170)
+
+# Prestige colours (RGB tuples for Discord embed colours); None = rainbow, see RAINBOWS
+PRESTIGE_COLORS = {
+    0: GRAY,            # §7
+    100: WHITE,         # §f
+    200: RED,           # §c
+    300: GOLD,          # §6
+    400: YELLOW,        # §e
+    500: GREEN,         # §a
+    600: DARK_AQUA,     # §3
+    700: DARK_PURPLE,   # §5
+    800: LIGHT_PURPLE,  # §d
+    900: None,          # Rainbow
+    1000: WHITE,
+    1100: WHITE,         # WHITE brackets and numbers
+    1200: RED,           # RED brackets and numbers
+    1300: GOLD,          # GOLD/ORANGE brackets and numbers
+    1400: YELLOW,        # YELLOW brackets and numbers
+    1500: GREEN,         # GREEN brackets and numbers
+    1600: AQUA,          # CYAN brackets and numbers
+    1700: LIGHT_PURPLE,  # MAGENTA brackets and numbers
+    1800: LIGHT_PURPLE,  # PINK/MAGENTA brackets and numbers
+    1900: None,          # Rainbow
+    2000: DARK_GRAY,     # GRAY/TAN brackets and numbers
+    2100: WHITE,         # WHITE brackets with gray numbers
+    2200: RED,           # RED brackets with yellow numbers
+    2300: None,          # Rainbow brackets
+    2400: DARK_PURPLE,   # PURPLE brackets with green numbers
+    2500: WHITE,         # WHITE brackets with green numbers
+    2600: WHITE,         # WHITE brackets with cyan numbers
+    2700: WHITE,         # WHITE brackets with magenta numbers
+    2800: RED,           # RED brackets with dark red numbers
+    2900: None,          # Rainbow brackets
+    3000: WHITE,         # WHITE brackets with gray numbers
+    3100: WHITE,         # WHITE brackets and numbers
+    3200: RED,           # RED brackets and numbers
+    3300: None,          # Rainbow brackets (orange/red/yellow)
+    3400: None,          # Rainbow brackets (yellow/orange)
+    3500: GREEN,         # GREEN brackets and numbers
+    3600: AQUA,          # CYAN/BLUE brackets and numbers
+    3700: WHITE,         # WHITE/YELLOW brackets with magenta numbers
+    3800: None,          # Rainbow brackets (purple/red)
+    3900: None,          # Rainbow brackets (full spectrum)
+    4000: WHITE,         # WHITE brackets with black numbers
+}
+
+# Per-character colour cycle of each rainbow prestige (default: the full spectrum)
+FULL_RAINBOW = (RED, GOLD, YELLOW, GREEN, AQUA, LIGHT_PURPLE, DARK_PURPLE)
+RAINBOWS = {
+    3300: (GOLD, RED, YELLOW),
+    3400: (YELLOW, GOLD),
+    3800: (DARK_PURPLE, RED, LIGHT_PURPLE),
+}
+
+# The eight colours a Discord ```ansi block renders -> SGR code; each is
+# listed with the Minecraft colours that should land on it
+ANSI_COLORS = {
+    30: (GRAY, DARK_GRAY, (85, 85, 85), (0, 0, 0)),
+    31: (RED, (170, 0, 0)),
+    32: (GREEN, (0, 170, 0)),
+    33: (GOLD, YELLOW),
+    34: (BLUE, (0, 0, 170)),
+    35: (LIGHT_PURPLE, DARK_PURPLE),
+    36: (AQUA, DARK_AQUA),
+    37: (WHITE,),
+}
+RESET = "\u001b[0;0m"
+
+# Levels with a precomputed style; higher ones are built on demand
+TABLE_LEVELS = 5000
+
+
+class PrestigeStyle(NamedTuple):
+    icon: str
+    color: tuple  # RGB for the embed colour bar
+    ansi: str     # bold ANSI prefix (the first colour for rainbow tiers)
+    tag: str      # "[level icon]" rendered in the prestige colour(s), reset at the end
+
+
+def ansi_code(rgb, bold: bool = True) -> str:
+    """Bold (or plain) ANSI prefix for the basic colour nearest to `rgb`."""
+    def distance(ref):
+        return sum((a - b) ** 2 for a, b in zip(rgb, ref))
+
+    code = min(ANSI_COLORS, key=lambda c: min(distance(ref) for ref in ANSI_COLORS[c]))
+    return f"\u001b[{1 if bold else 0};{code}m"
+
+
+_TIERS = sorted(PRESTIGE_COLORS)
+
+
+def _tier_prefixes(prestige) -> tuple:
+    colors = PRESTIGE_COLORS[prestige]
+    colors = (colors,) if colors else RAINBOWS.get(prestige, FULL_RAINBOW)
+    return tuple(ansi_code(c) for c in colors)
+
+
+_PREFIXES = {prestige: _tier_prefixes(prestige) for prestige in _TIERS}
+
+
+def _build(level: int) -> PrestigeStyle:
+    prestige = _TIERS[bisect_right(_TIERS, level) - 1]
+    icon = PRESTIGE_ICONS[min(level // 100, len(PRESTIGE_ICONS) - 1)]
+    text = f"[{level}{icon}]"
+    palette = _PREFIXES[prestige]
+    if len(palette) == 1:
+        tag = f"{palette[0]}{text}{RESET}"
+    else:
+        parts, last = [], None
+        for i, ch in enumerate(text):
+            code = palette[i % len(palette)]
+            # neighbouring colours can map to the same basic ANSI colour
+            parts.append(ch if code == last else f"{code}{ch}")
+            last = code
+        tag = "".join(parts) + RESET
+    color = PRESTIGE_COLORS[prestige] or RAINBOWS.get(prestige, FULL_RAINBOW)[0]
+    return PrestigeStyle(icon, color, palette[0], tag)
+
+
+STYLES = [_build(level) for level in range(TABLE_LEVELS + 1)]
+
+
+def style(level) -> PrestigeStyle:
+    """Style for a level (anything int() can't read counts as 0)."""
+    try:
+        level = max(0, int(level))
+    except Exception:
+        level = 0
+    if level < len(STYLES):
+        return STYLES[level]
+    return _build(level)
+
+
+def get_prestige_color(level) -> tuple:
+    """RGB embed colour for a level (rainbow tiers use the first colour of their cycle)."""
+    return style(level).color
+
+
+def get_prestige_tag(level) -> str:
+    """ANSI-coloured "[level icon]" for a ```ansi code block."""
+    return style(level).tag
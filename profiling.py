@@ -0,0 +1,152 @@
+"""On-demand cProfile + tracemalloc reports for a script run.
+
+Nothing here is imported unless profiling is asked for (get.py -profile,
+or the bot's /profile command passing -profile to the next refreshes),
+so it costs nothing when off.
+
+Each profiled run writes two files to profiles/ (SHEEPWARS_PROFILE_DIR):
+    <stamp>-<label>.prof  raw cProfile data (snakeviz, pstats)
+    <stamp>-<label>.txt   hotspots by cumulative and own time, own time
+                          per package (bs4, openpyxl, ...) and the lines
+                          holding the most memory at the largest checkpoint
+
+tracemalloc cannot snapshot exactly at the peak, so scripts call
+checkpoint() after their memory-heavy stages (page parsed, workbook
+loaded, before save); the checkpoint with the most traced memory is the
+one reported.
+"""
+import atexit
+import cProfile
+import io
+import os
+import pstats
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+PROFILE_DIR = Path(os.environ.get("SHEEPWARS_PROFILE_DIR") or Path(__file__).parent.absolute() / "profiles")
+TOP_N = 30
+TRACE_FRAMES = 5
+
+_active = None
+
+
+def _package(filename: str) -> str:
+    """Group a code path under its installed package, 'stdlib' or 'repo'."""
+    path = filename.replace("\\", "/")
+    if "site-packages/" in path:
+        return path.split("site-packages/", 1)[1].split("/", 1)[0].split(".")[0]
+    if path.startswith("~") or path.startswith("<"):
+        return "builtin"
+    if str(Path(__file__).parent.absolute()).replace("\\", "/") in path:
+        return "repo"
+    return "stdlib"
+
+
+def _package_times(stats: pstats.Stats):
+    totals = {}
+    for (filename, _line, _name), (_cc, _nc, tottime, _ct, _callers) in stats.stats.items():
+        pkg = _package(filename)
+        totals[pkg] = totals.get(pkg, 0.0) + tottime
+    return sorted(totals.items(), key=lambda kv: kv[1], reverse=True)
+
+
+def _stats_text(stats: pstats.Stats, sort: str) -> str:
+    out = io.StringIO()
+    stats.stream = out
+    stats.sort_stats(sort).print_stats(TOP_N)
+    return out.getvalue()
+
+
+class Profile:
+    def __init__(self, label: str):
+        self.label = re.sub(r"[^\w.-]+", "_", label)[:60]
+        self.profiler = cProfile.Profile()
+        self.started = 0.0
+        self.largest = None  # (traced bytes, checkpoint name, snapshot)
+
+    def start(self):
+        tracemalloc.start(TRACE_FRAMES)
+        self.started = time.perf_counter()
+        self.profiler.enable()
+        return self
+
+    def checkpoint(self, name: str):
+        """Keep a memory snapshot here if more is allocated than at earlier checkpoints."""
+        current, _peak = tracemalloc.get_traced_memory()
+        if self.largest is None or current > self.largest[0]:
+            self.profiler.disable()
+            self.largest = (current, name, tracemalloc.take_snapshot())
+            self.profiler.enable()
+
+    def stop(self) -> Path:
+        self.checkpoint("exit")
+        self.profiler.disable()
+        wall = time.perf_counter() - self.started
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        traced, checkpoint_name, snapshot = self.largest
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+        ))
+
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        base = PROFILE_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self.label}"
+        self.profiler.dump_stats(str(base.with_suffix(".prof")))
+
+        stats = pstats.Stats(self.profiler)
+        lines = [
+            f"Profile of {self.label}: {wall * 1000:.1f} ms wall, peak traced memory {peak / 1024 / 1024:.2f} MiB",
+            "",
+            "== Own time by package ==",
+        ]
+        total_own = sum(t for _p, t in _package_times(stats)) or 1.0
+        for pkg, seconds in _package_times(stats):
+            lines.append(f"  {pkg:<20} {seconds * 1000:>10.1f} ms  {seconds / total_own:>6.1%}")
+        lines += ["", "== Hotspots by cumulative time ==", _stats_text(stats, "cumulative")]
+        lines += ["== Hotspots by own time ==", _stats_text(stats, "tottime")]
+
+        lines.append(f"== Memory by line at checkpoint '{checkpoint_name}' ({traced / 1024 / 1024:.2f} MiB traced) ==")
+        for stat in snapshot.statistics("lineno")[:TOP_N]:
+            frame = stat.traceback[0]
+            lines.append(f"  {stat.size / 1024:>10.1f} KiB  {stat.count:>8} blocks  {frame.filename}:{frame.lineno}")
+        lines += ["", "== Memory by package =="]
+        by_package = {}
+        for stat in snapshot.statistics("filename"):
+            pkg = _package(stat.traceback[0].filename)
+            by_package[pkg] = by_package.get(pkg, 0) + stat.size
+        for pkg, size in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True):
+            lines.append(f"  {pkg:<20} {size / 1024:>10.1f} KiB")
+
+        report = base.with_suffix(".txt")
+        report.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        return report
+
+
+def start(label: str) -> Profile:
+    """Profile the rest of this process; the report is written at exit."""
+    global _active
+    _active = Profile(label).start()
+    atexit.register(_finish)
+    return _active
+
+
+def checkpoint(name: str):
+    if _active is not None:
+        _active.checkpoint(name)
+
+
+def _finish():
+    global _active
+    if _active is None:
+        return
+    profile, _active = _active, None
+    try:
+        report = profile.stop()
+        print(f"[PROFILE] Report written to {report}")
+    except Exception as e:
+        print(f"[PROFILE] Could not write profile: {e}", file=sys.stderr)
@@ -0,0 +1,135 @@
+"""Last stored stats per player, so refreshes that change nothing skip the workbook.
+
+refresh_state.json sits next to the workbook, keyed by UUID (or the
+casefolded IGN when no UUID is known):
+
+    {"<uuid>": {"name": "Chuckegg", "record": [...WoolGamesStats...],
+                "stored": 1760000000.0, "checked": 1760000600.0}}
+
+get.py compares each fetched record with the one it last wrote. If they
+match and no snapshot is being taken, it only bumps `checked`: no history
+row, no delta recompute, no workbook load or save. Only full writes
+(-refresh without -nolifetime) update `record`, so a skipped run never
+leaves deltas behind. Scripts that edit a player's sheet some other way
+(player_stats.py, create_session.py, /delete) call forget() so the next
+refresh writes again.
+
+Several get.py runs and forget() update the file at once, so every
+read-modify-write holds an OS file lock on "refresh_state.json.lock".
+"""
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from user_registry import _atomic_write
+from workbook_lock import WorkbookLock
+
+SCRIPT_DIR = Path(__file__).parent.absolute()
+STATE_FILE = os.environ.get("SHEEPWARS_REFRESH_STATE_FILE") or str(SCRIPT_DIR / "refresh_state.json")
+
+
+def player_key(username, identities=None) -> str:
+    uuid = identities.uuid(username) if identities is not None else None
+    return uuid or username.casefold()
+
+
+class RefreshState:
+    def __init__(self, path=STATE_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file_lock = WorkbookLock(path)
+        self._entries = None
+        self._changed = {}  # key -> new entry, or None to delete
+        self._bumped = set()  # keys whose change is only a newer `checked`
+
+    def _read(self) -> dict:
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"[WARNING] Could not read {self.path}: {e}")
+            return {}
+
+    def _entry(self, key):
+        if self._entries is None:
+            self._entries = self._read()
+        if key in self._changed:
+            return self._changed[key]
+        return self._entries.get(key)
+
+    def unchanged(self, key, name, record) -> bool:
+        """True if `record` is what was last written for this player, under the same name (any case)."""
+        with self._lock:
+            entry = self._entry(key)
+            return (entry is not None and (entry.get("name") or "").casefold() == name.casefold()
+                    and entry.get("record") == list(record))
+
+    def last_stored(self, key):
+        with self._lock:
+            entry = self._entry(key)
+            return entry.get("stored") if entry else None
+
+    def as_of(self, key):
+        """When this player's stored stats were last known to be current (written or found unchanged)."""
+        with self._lock:
+            entry = self._entry(key)
+            return entry.get("checked") if entry else None
+
+    def checked(self, key):
+        with self._lock:
+            entry = self._entry(key)
+            if entry is not None:
+                if key not in self._changed:
+                    self._bumped.add(key)  # not a write of ours, just a newer `checked`
+                self._changed[key] = {**entry, "checked": time.time()}
+
+    def stored(self, key, name, record):
+        now = time.time()
+        with self._lock:
+            self._changed[key] = {"name": name, "record": list(record), "stored": now, "checked": now}
+            self._bumped.discard(key)
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                if key:
+                    self._changed[key] = None
+                    self._bumped.discard(key)
+
+    def save(self):
+        """Apply our changes to what is on disk now (other get.py runs may have saved meanwhile)."""
+        with self._lock:
+            if not self._changed:
+                return
+            with self._file_lock:
+                entries = self._read()
+                for key, entry in self._changed.items():
+                    if entry is None:
+                        entries.pop(key, None)
+                    elif key in self._bumped:
+                        # Only for the write we saw: never brings back an entry forget() dropped meanwhile
+                        on_disk = entries.get(key)
+                        if on_disk is not None and on_disk.get("stored") == entry.get("stored"):
+                            on_disk["checked"] = max(on_disk.get("checked", 0), entry["checked"])
+                    elif entry["stored"] >= entries.get(key, {}).get("stored", 0):
+                        entries[key] = entry
+                _atomic_write(self.path, json.dumps(entries, indent=1))
+                self._entries = entries
+                self._changed = {}
+                self._bumped = set()
+
+
+def forget(username):
+    """Make the next refresh of `username` write, after their sheet was changed elsewhere."""
+    from identity import IdentityCache
+
+    try:
+        state = RefreshState()
+        state.invalidate(username.casefold(), IdentityCache().uuid(username))
+        state.save()
+    except Exception as e:
+        print(f"[WARNING] Could not reset refresh state for {username}: {e}")
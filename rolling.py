@@ -0,0 +1,173 @@
+"""Rolling "last 24h / 7d / 30d" stats from each player's refresh history.
+
+Daily/weekly/monthly are calendar windows anchored to the 9:30 snapshot;
+these slide. rolling_windows/ sits next to the workbook with one file per
+player, named by their refresh_state.json key (UUID, or the casefolded
+IGN), each a ring of cumulative samples covering the longest window:
+
+    rolling_windows/<key>.json
+        {"samples": [[t, kills, deaths, kd, wins, losses, wl], ...],
+         "starts": {"24h": 5, "7d": 1, "30d": 0}, "updated": 1760000000.0}
+
+A refresh reads and rewrites only the files of the players it refreshed
+(30 days of 10-minute samples is a few hundred KB per player), so its
+cost doesn't grow with the number of tracked players.
+
+starts[w] indexes the window's baseline: the newest sample at least w old
+(the oldest sample while the player has less history than that). A sample
+is only added when the counters moved, and each update only moves the
+starts forward past samples that have aged out, so every sample is stepped
+over once per window. A window's stats are then a single subtraction,
+current - baseline (sheet_layout.compute_deltas), instead of a scan of the
+history sheet. Samples older than the longest window's baseline are
+dropped.
+
+A player without an entry is seeded once from their history sheet rows
+(get.py history_samples()).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from sheet_layout import STAT_NAMES
+from user_registry import _atomic_write
+
+SCRIPT_DIR = Path(__file__).parent.absolute()
+ROLLING_DIR = os.environ.get("SHEEPWARS_ROLLING_DIR") or str(SCRIPT_DIR / "rolling_windows")
+
+# Window name -> length in seconds, shortest first
+WINDOWS = {
+    "24h": 24 * 3600,
+    "7d": 7 * 24 * 3600,
+    "30d": 30 * 24 * 3600,
+}
+LONGEST = max(WINDOWS, key=WINDOWS.get)
+
+
+def _advance(samples, start, cutoff) -> int:
+    # Step past samples that are old enough for the next one to be the baseline
+    while start + 1 < len(samples) and samples[start + 1][0] <= cutoff:
+        start += 1
+    return start
+
+
+class RollingWindows:
+    def __init__(self, root=ROLLING_DIR):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> entry as read (None: no file)
+        self._changed = {}  # key -> new entry, or None to delete
+
+    def _path(self, key) -> Path:
+        # UUIDs and casefolded IGNs are filename-safe; anything else is hashed
+        safe = key if key.replace("-", "").replace("_", "").isalnum() else hashlib.sha256(key.encode()).hexdigest()
+        return self.root / f"{safe}.json"
+
+    def _read(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"[WARNING] Could not read {path}: {e}")
+            return None
+
+    def _entry(self, key):
+        if key in self._changed:
+            return self._changed[key]
+        if key not in self._entries:
+            self._entries[key] = self._read(key)
+        return self._entries[key]
+
+    def known(self, key) -> bool:
+        with self._lock:
+            return self._entry(key) is not None
+
+    def pending(self, key, values, now=None) -> bool:
+        """True if update() would change any window: new counters, an aged-out baseline or no entry yet."""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entry(key)
+            if entry is None:
+                return True
+            samples = entry["samples"]
+            if samples[-1][1:] != list(values):
+                return True
+            return any(_advance(samples, entry["starts"][w], now - length) != entry["starts"][w]
+                       for w, length in WINDOWS.items())
+
+    def update(self, key, values, now=None, seed=()) -> dict:
+        """Record the current [kills, deaths, kd, wins, losses, wl]; returns {window: baseline}.
+
+        Baselines are {stat name: value} dicts, the shape
+        sheet_layout.compute_deltas() takes. `seed` ([(t, values), ...],
+        oldest first) is only used when the player has no entry yet.
+        """
+        now = time.time() if now is None else now
+        values = list(values)
+        with self._lock:
+            entry = self._entry(key)
+            if entry is None:
+                samples = [[t, *v] for t, v in seed if t <= now]
+                starts = {w: 0 for w in WINDOWS}
+            else:
+                samples = [list(s) for s in entry["samples"]]
+                starts = dict(entry["starts"])
+            if not samples or samples[-1][1:] != values:
+                samples.append([now, *values])
+            for window, length in WINDOWS.items():
+                starts[window] = _advance(samples, starts.get(window, 0), now - length)
+            # Nothing before the longest window's baseline is needed again
+            drop = starts[LONGEST]
+            if drop:
+                samples = samples[drop:]
+                starts = {w: s - drop for w, s in starts.items()}
+            self._changed[key] = {"samples": samples, "starts": starts, "updated": now}
+            return {w: dict(zip(STAT_NAMES, samples[starts[w]][1:])) for w in WINDOWS}
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                if key:
+                    self._changed[key] = None
+
+    def save(self):
+        """Write the changed players' files (newest update wins per player)."""
+        with self._lock:
+            if not self._changed:
+                return
+            self.root.mkdir(parents=True, exist_ok=True)
+            for key, entry in self._changed.items():
+                path = self._path(key)
+                if entry is None:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    self._entries[key] = None
+                    continue
+                # Another run may have written this player since we read them
+                on_disk = self._read(key)
+                if on_disk is not None and on_disk.get("updated", 0) > entry["updated"]:
+                    self._entries[key] = on_disk
+                    continue
+                _atomic_write(str(path), json.dumps(entry, separators=(",", ":")))
+                self._entries[key] = entry
+            self._changed = {}
+
+
+def forget(username):
+    """Drop a player's samples (their data was deleted)."""
+    from identity import IdentityCache
+
+    try:
+        windows = RollingWindows()
+        windows.invalidate(username.casefold(), IdentityCache().uuid(username))
+        windows.save()
+    except Exception as e:
+        print(f"[WARNING] Could not drop rolling stats for {username}: {e}")
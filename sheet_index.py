@@ -0,0 +1,87 @@
+"""Case-insensitive player sheet lookup.
+
+Player sheets are named after the IGN as it was first verified, but users
+type names in any case. Rather than scanning wb.sheetnames and casefolding
+every title on each lookup, a casefold -> worksheet index is built once per
+loaded workbook and kept on the workbook object itself. create_sheet(),
+remove_sheet() and rename_sheet() keep it up to date, so a miss (a player
+without a sheet, or a former name tried by find_player_sheet) is answered
+from the index. Sheets added or removed some other way show up as a sheet
+count change and a retitled sheet as a title mismatch; both rebuild.
+
+The index isn't saved in the workbook: each process pays one pass over
+the titles when it first looks a sheet up, which is noise next to
+load_workbook() parsing every sheet of the file anyway.
+"""
+
+_INDEX_ATTR = "_casefold_sheet_index"
+
+
+def _build(wb):
+    index = {}
+    for ws in wb.worksheets:
+        # First sheet wins, matching the old linear scans
+        index.setdefault(ws.title.casefold(), ws)
+    setattr(wb, _INDEX_ATTR, (len(wb.worksheets), index))
+    return index
+
+
+def _index(wb):
+    cached = getattr(wb, _INDEX_ATTR, None)
+    if cached is None or cached[0] != len(wb.worksheets):
+        return _build(wb)
+    return cached[1]
+
+
+def find_sheet(wb, name):
+    """Return the worksheet whose title matches name case-insensitively, or None."""
+    key = name.casefold()
+    ws = _index(wb).get(key)
+    if ws is not None and ws.title.casefold() != key:
+        # Renamed behind our back (not through rename_sheet); only this rare path rebuilds
+        ws = _build(wb).get(key)
+    return ws
+
+
+def find_player_sheet(wb, name, identities=None):
+    """Like find_sheet, but also tries the player's current and former names
+    from an identity.IdentityCache, so a sheet made before a rename is found."""
+    ws = find_sheet(wb, name)
+    if ws is None and identities is not None:
+        for other in identities.names(name):
+            ws = find_sheet(wb, other)
+            if ws is not None:
+                break
+    return ws
+
+
+def find_sheet_name(wb, name):
+    """Return the canonical sheet title for name, or None."""
+    ws = find_sheet(wb, name)
+    return ws.title if ws is not None else None
+
+
+def create_sheet(wb, title):
+    ws = wb.create_sheet(title)
+    index = _index(wb)
+    index.setdefault(title.casefold(), ws)
+    setattr(wb, _INDEX_ATTR, (len(wb.worksheets), index))
+    return ws
+
+
+def rename_sheet(wb, ws, title):
+    """Retitle `ws`, keeping the index in step."""
+    ws.title = title
+    # Renames are rare (a player changed their name); rebuilding also re-exposes any sheet sharing the old title
+    _build(wb)
+
+
+def remove_sheet(wb, name) -> bool:
+    """Remove the sheet matching name case-insensitively. Returns True if one was removed."""
+    ws = find_sheet(wb, name)
+    if ws is None:
+        return False
+    wb.remove(ws)
+    # Another sheet may share the casefolded title; rebuilding is the simplest way to find it
+    _build(wb)
+    return True
@@ -0,0 +1,238 @@
+"""Cell layout of a player sheet (as created by player_stats.py).
+
+Each period table has a title row, a header row and six stat rows. Column B
+holds the values shown to users, columns D/E hold the snapshot a period's
+deltas are computed against. The All-time table also keeps Wool, Level and
+Sheep Wars Damage Dealt in D39:D41, and lifetime Capture the Wool stats sit
+next to it in G37:H44 (labels in G, values in H, same stat order).
+
+Below it get.py keeps three rolling-window tables (last 24h / 7d / 30d,
+see rolling.py) laid out like the period tables: deltas in column B, the
+window's baseline sample in D/E.
+"""
+
+HISTORICAL_SHEET = "Sheep Wars historical data"
+
+STAT_NAMES = ["Kills", "Deaths", "K/D", "Wins", "Losses", "W/L"]
+
+# First data row of each period table (kills, deaths, kd, wins, losses, wl follow)
+PERIOD_START_ROWS = {
+    "all-time": 39,
+    "session": 3,
+    "daily": 12,
+    "weekly": 21,
+    "monthly": 30,
+    # Rolling windows (see rolling.py), written by get.py on -refresh
+    "24h": 48,
+    "7d": 57,
+    "30d": 66,
+}
+ROLLING_TITLES = {
+    "24h": "Last 24h",
+    "7d": "Last 7d",
+    "30d": "Last 30d",
+}
+
+# Row mappings for column B: (kills, deaths, kdr, wins, losses, wlr)
+PERIOD_ROWS = {
+    period: tuple(start + i for i in range(len(STAT_NAMES)))
+    for period, start in PERIOD_START_ROWS.items()
+}
+
+WOOL_CELL = "D39"
+LEVEL_CELL = "D40"
+DAMAGE_CELL = "D41"
+
+# Capture the Wool (lifetime only): title row 37, headers 38, values H39:H44
+CTW_TITLE_ROW = 37
+CTW_START_ROW = 39
+CTW_LABEL_COL = "G"
+CTW_VALUE_COL = "H"
+
+# Last row/column any reader needs, so sheets can be scanned with a single iter_rows()
+LAST_ROW = 71
+LAST_COL = 8  # column H
+
+
+def is_player_sheet(sheet_name: str) -> bool:
+    return sheet_name.casefold() != HISTORICAL_SHEET.casefold()
+
+
+# -------------------
+# Wool Games extras
+# -------------------
+def _ensure_ctw_table(ws):
+    """Create the Capture the Wool title/header/label cells once per sheet."""
+    if ws[f"{CTW_LABEL_COL}{CTW_TITLE_ROW}"].value is not None:
+        return
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
+    center = Alignment(horizontal="center", vertical="center")
+    side = Side(style="thin")
+    border = Border(left=side, right=side, top=side, bottom=side)
+    ws.merge_cells(f"{CTW_LABEL_COL}{CTW_TITLE_ROW}:{CTW_VALUE_COL}{CTW_TITLE_ROW}")
+    title = ws[f"{CTW_LABEL_COL}{CTW_TITLE_ROW}"]
+    title.value = "Capture the Wool"
+    title.font = Font(color="FFFFFF", bold=True)
+    title.fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    title.alignment = center
+    for col, name in ((CTW_LABEL_COL, "Stat"), (CTW_VALUE_COL, "Value")):
+        cell = ws[f"{col}{CTW_TITLE_ROW + 1}"]
+        cell.value = name
+        cell.font = Font(bold=True)
+        cell.fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
+        cell.border = border
+        cell.alignment = center
+    for i, name in enumerate(STAT_NAMES):
+        for col in (CTW_LABEL_COL, CTW_VALUE_COL):
+            ws[f"{col}{CTW_START_ROW + i}"].border = border
+            ws[f"{col}{CTW_START_ROW + i}"].alignment = center
+        ws[f"{CTW_LABEL_COL}{CTW_START_ROW + i}"] = name
+    ws.column_dimensions[CTW_LABEL_COL].width = 15
+
+
+def write_wool_games_extras(ws, record):
+    """Store Damage Dealt and the Capture the Wool stats of a WoolGamesStats record."""
+    ws[DAMAGE_CELL] = record.damage_dealt
+    _ensure_ctw_table(ws)
+    ctw = (record.ctw_kills, record.ctw_deaths, record.ctw_kd, record.ctw_wins, record.ctw_losses, record.ctw_wl)
+    for i, value in enumerate(ctw):
+        ws[f"{CTW_VALUE_COL}{CTW_START_ROW + i}"] = value
+
+
+# -------------------
+# Delta refresh helpers
+# -------------------
+def read_snapshot(ws, start_row):
+    """Read a D/E snapshot table's values starting at start_row. None if any cell is empty."""
+    out = {}
+    for i, name in enumerate(STAT_NAMES):
+        val = ws[f"E{start_row + i}"].value
+        if val is None:
+            return None
+        out[name] = val
+    return out
+
+
+def read_all_time(ws):
+    """Current all-time values from B39:B44 (empty cells read as 0)."""
+    start_row = PERIOD_START_ROWS["all-time"]
+    return {name: ws[f"B{start_row + i}"].value or 0 for i, name in enumerate(STAT_NAMES)}
+
+
+def compute_deltas(all_time, snap):
+    """Return [kills, deaths, kd, wins, losses, wl] for the period since snap.
+
+    Ratios are computed from the deltas (not delta of ratios).
+    """
+    try:
+        kills_delta = (all_time.get("Kills", 0) or 0) - (snap.get("Kills", 0) or 0)
+        deaths_delta = (all_time.get("Deaths", 0) or 0) - (snap.get("Deaths", 0) or 0)
+        wins_delta = (all_time.get("Wins", 0) or 0) - (snap.get("Wins", 0) or 0)
+        losses_delta = (all_time.get("Losses", 0) or 0) - (snap.get("Losses", 0) or 0)
+    except Exception:
+        kills_delta = deaths_delta = wins_delta = losses_delta = 0
+
+    if deaths_delta and deaths_delta != 0:
+        kd_ratio = kills_delta / deaths_delta
+    else:
+        kd_ratio = float(kills_delta) if kills_delta else 0.0
+
+    if losses_delta and losses_delta != 0:
+        wl_ratio = wins_delta / losses_delta
+    else:
+        wl_ratio = float(wins_delta) if wins_delta else 0.0
+
+    return [kills_delta, deaths_delta, round(kd_ratio, 2), wins_delta, losses_delta, round(wl_ratio, 2)]
+
+
+def write_deltas(ws, target_row, all_time, snap):
+    """Write the period deltas into column B starting at target_row."""
+    for i, value in enumerate(compute_deltas(all_time, snap)):
+        ws[f"B{target_row + i}"] = value
+
+
+# Snapshot tables (D/E) share their start row with the B column they feed
+SNAPSHOT_PERIODS = {
+    "Session": PERIOD_START_ROWS["session"],
+    "Daily": PERIOD_START_ROWS["daily"],
+    "Weekly": PERIOD_START_ROWS["weekly"],
+    "Monthly": PERIOD_START_ROWS["monthly"],
+}
+
+
+def refresh_deltas(ws, snapshot_cache=None):
+    """Recompute every period's deltas in column B from the all-time block.
+
+    snapshot_cache maps period name -> snapshot dict captured before new
+    snapshots were written this run; those take precedence over the sheet.
+    """
+    snapshot_cache = snapshot_cache or {}
+    all_time = read_all_time(ws)
+
+    # --- Extra: ensure Daily deltas B12:B17 are updated by reading E12:E17 directly ---
+    try:
+        # Read snapshot values from E12:E17 (tolerate missing/None by treating as 0)
+        daily_row = SNAPSHOT_PERIODS["Daily"]
+        raw_snap = {name: ws[f"E{daily_row + i}"].value or 0 for i, name in enumerate(STAT_NAMES)}
+        write_deltas(ws, daily_row, all_time, raw_snap)
+    except Exception:
+        # if anything goes wrong, fall back to normal refresh loop below
+        pass
+
+    for period, row in SNAPSHOT_PERIODS.items():
+        snap = snapshot_cache.get(period)
+        if snap is None:
+            snap = read_snapshot(ws, row)
+        if snap is None:
+            continue
+        write_deltas(ws, row, all_time, snap)
+
+    # Write all-time current values
+    start_row = PERIOD_START_ROWS["all-time"]
+    for i, name in enumerate(STAT_NAMES):
+        ws[f"B{start_row + i}"] = all_time.get(name, 0)
+
+
+# -------------------
+# Rolling windows
+# -------------------
+def _ensure_rolling_table(ws, window):
+    """Title, headers and labels of one rolling-window table, created once per sheet."""
+    start = PERIOD_START_ROWS[window]
+    if ws[f"A{start - 2}"].value is not None:
+        return
+    from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
+    center = Alignment(horizontal="center", vertical="center")
+    side = Side(style="thin")
+    border = Border(left=side, right=side, top=side, bottom=side)
+    ws.merge_cells(f"A{start - 2}:F{start - 2}")
+    title = ws[f"A{start - 2}"]
+    title.value = f"{ROLLING_TITLES[window]} Stats"
+    title.font = Font(color="FFFFFF", bold=True)
+    title.fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    title.alignment = center
+    for col, name in (("A", "Stat"), ("B", "Value"), ("D", "Snapshot"), ("E", "Value")):
+        cell = ws[f"{col}{start - 1}"]
+        cell.value = name
+        cell.font = Font(bold=True)
+        cell.fill = PatternFill(start_color="D9E1F2", end_color="D9E1F2", fill_type="solid")
+        cell.border = border
+        cell.alignment = center
+    for i, name in enumerate(STAT_NAMES):
+        for col in ("A", "B", "D", "E"):
+            ws[f"{col}{start + i}"].border = border
+            ws[f"{col}{start + i}"].alignment = center
+        ws[f"A{start + i}"] = name
+        ws[f"D{start + i}"] = name
+
+
+def write_rolling_windows(ws, all_time, baselines):
+    """Write each window's deltas (column B) and baseline (E) from rolling.RollingWindows.update()."""
+    for window, snap in baselines.items():
+        _ensure_rolling_table(ws, window)
+        start = PERIOD_START_ROWS[window]
+        write_deltas(ws, start, all_time, snap)
+        for i, name in enumerate(STAT_NAMES):
+            ws[f"E{start + i}"] = snap.get(name)
@@ -0,0 +1,198 @@
+"""Extract Wool Games stats (Sheep Wars, Capture the Wool, Wool, Level) from a
+plancke.io player page or a Hypixel API player object.
+
+Both paths return the same dict of stat strings (see extract_stats), so
+callers don't care which source a refresh used (see stats_source.py).
+"""
+import re
+from typing import NamedTuple
+
+SHEEP_WARS_PATTERN = re.compile(
+    r"Sheep Wars.*?"
+    r"Wins:\s*([\d,]+).*?"
+    r"Losses:\s*([\d,]+).*?"
+    r"W/L:\s*([\d.]+).*?"
+    r"Kills:\s*([\d,]+).*?"
+    r"Deaths:\s*([\d,]+).*?"
+    r"K/D:\s*([\d.]+)",
+    re.S
+)
+
+# Wool and Level are separate from the Sheep Wars stats
+WOOL_PATTERN = re.compile(r"Wool:\s*([\d,]+)", re.S)
+LEVEL_PATTERN = re.compile(r"Level:\s*([\d,]+)", re.S)
+
+# Both follow the Sheep Wars block in the same Wool Games section
+DAMAGE_PATTERN = re.compile(r"\s*Damage Dealt:\s*([\d,]+)")
+CTW_PATTERN = re.compile(
+    r"\s*Capture the Wool\s*"
+    r"Wins:\s*([\d,]+)\s*"
+    r"Losses:\s*([\d,]+)\s*"
+    r"W/L:\s*([\d.]+)\s*"
+    r"Kills:\s*([\d,]+)\s*"
+    r"Deaths:\s*([\d,]+)\s*"
+    r"K/D:\s*([\d.]+)"
+)
+
+CTW_KEYS = ("ctw_wins", "ctw_losses", "ctw_wl", "ctw_kills", "ctw_deaths", "ctw_kd")
+
+# Wool Games levelling: each prestige is 100 levels / 490,000 XP; the first
+# four levels of a prestige cost 1k-4k XP, every later one 5k
+PRESTIGE_XP = 490000
+EARLY_LEVEL_XP = (1000, 2000, 3000, 4000)
+LEVEL_XP = 5000
+
+
+class WoolGamesStats(NamedTuple):
+    """Every Wool Games field on the page, as numbers."""
+    wool: int
+    level: int
+    wins: int
+    losses: int
+    wl: float
+    kills: int
+    deaths: int
+    kd: float
+    damage_dealt: int
+    ctw_wins: int
+    ctw_losses: int
+    ctw_wl: float
+    ctw_kills: int
+    ctw_deaths: int
+    ctw_kd: float
+
+
+def page_text(html: str) -> str:
+    """Flatten the page HTML to text, one element per line."""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    return soup.get_text("\n")
+
+
+def extract_stats(text: str):
+    """Return a dict of raw stat strings (as shown on the page), or None if
+    the Sheep Wars block is not present.
+
+    Keys: wins, losses, wl, kills, deaths, kd, wool, level, damage and the
+    Capture the Wool ctw_wins, ctw_losses, ctw_wl, ctw_kills, ctw_deaths,
+    ctw_kd. Fields missing from the page read as "0".
+    """
+    match = SHEEP_WARS_PATTERN.search(text)
+    if not match:
+        return None
+
+    wins, losses, wl, kills, deaths, kd = match.groups()
+
+    # Damage Dealt and Capture the Wool directly follow the Sheep Wars K/D
+    pos = match.end()
+    damage_match = DAMAGE_PATTERN.match(text, pos)
+    if damage_match:
+        pos = damage_match.end()
+    ctw_match = CTW_PATTERN.match(text, pos)
+
+    wool_match = WOOL_PATTERN.search(text)
+    level_match = None
+
+    if wool_match:
+        # Prefer the Level that appears immediately after the Wool stat (the Sheep Wars level)
+        level_after_wool = LEVEL_PATTERN.search(text, wool_match.end())
+        if level_after_wool:
+            level_match = level_after_wool
+
+    # Fallback to the first Level match anywhere in the page
+    if level_match is None:
+        level_match = LEVEL_PATTERN.search(text)
+
+    return {
+        "wins": wins,
+        "losses": losses,
+        "wl": wl,
+        "kills": kills,
+        "deaths": deaths,
+        "kd": kd,
+        "wool": wool_match.group(1) if wool_match else "0",
+        "level": level_match.group(1) if level_match else "0",
+        "damage": damage_match.group(1) if damage_match else "0",
+        **dict(zip(CTW_KEYS, ctw_match.groups() if ctw_match else ("0",) * len(CTW_KEYS))),
+    }
+
+
+def wool_games_level(experience) -> int:
+    """Wool Games level (as shown on plancke) from progression.experience."""
+    experience = int(experience or 0)
+    level = 1 + (experience // PRESTIGE_XP) * 100
+    remaining = experience % PRESTIGE_XP
+    for cost in EARLY_LEVEL_XP:
+        if remaining < cost:
+            return level
+        remaining -= cost
+        level += 1
+    return level + remaining // LEVEL_XP
+
+
+def _ratio(a: int, b: int) -> str:
+    return str(round(a / b, 2)) if b else str(float(a))
+
+
+def stats_from_player(player: dict) -> dict:
+    """extract_stats()-shaped dict from a Hypixel API `player` object.
+
+    Reads stats.WoolGames: coins (Wool), progression.experience (Level),
+    sheep_wars.stats and capture_the_wool.stats. Missing fields read as 0.
+    """
+    wool_games = (player.get("stats") or {}).get("WoolGames") or {}
+    sheep = (wool_games.get("sheep_wars") or {}).get("stats") or {}
+    ctw = (wool_games.get("capture_the_wool") or {}).get("stats") or {}
+
+    wins, losses = int(sheep.get("wins", 0)), int(sheep.get("losses", 0))
+    kills, deaths = int(sheep.get("kills", 0)), int(sheep.get("deaths", 0))
+    ctw_wins, ctw_losses = int(ctw.get("participated_wins", 0)), int(ctw.get("participated_losses", 0))
+    ctw_kills, ctw_deaths = int(ctw.get("kills", 0)), int(ctw.get("deaths", 0))
+
+    return {
+        "wins": f"{wins:,}",
+        "losses": f"{losses:,}",
+        "wl": _ratio(wins, losses),
+        "kills": f"{kills:,}",
+        "deaths": f"{deaths:,}",
+        "kd": _ratio(kills, deaths),
+        "wool": f"{int(wool_games.get('coins', 0)):,}",
+        "level": str(wool_games_level((wool_games.get("progression") or {}).get("experience"))),
+        "damage": f"{int(sheep.get('damage_dealt', 0)):,}",
+        "ctw_wins": str(ctw_wins),
+        "ctw_losses": str(ctw_losses),
+        "ctw_wl": _ratio(ctw_wins, ctw_losses),
+        "ctw_kills": str(ctw_kills),
+        "ctw_deaths": str(ctw_deaths),
+        "ctw_kd": _ratio(ctw_kills, ctw_deaths),
+    }
+
+
+def _int(raw: str) -> int:
+    return int(raw.replace(",", "")) if raw else 0
+
+
+def _float(raw: str) -> float:
+    return float(raw) if raw else 0.0
+
+
+def to_record(stats: dict) -> WoolGamesStats:
+    """Convert extract_stats() output to a typed WoolGamesStats."""
+    return WoolGamesStats(
+        wool=_int(stats["wool"]),
+        level=_int(stats["level"]),
+        wins=_int(stats["wins"]),
+        losses=_int(stats["losses"]),
+        wl=_float(stats["wl"]),
+        kills=_int(stats["kills"]),
+        deaths=_int(stats["deaths"]),
+        kd=_float(stats["kd"]),
+        damage_dealt=_int(stats.get("damage", "0")),
+        ctw_wins=_int(stats.get("ctw_wins", "0")),
+        ctw_losses=_int(stats.get("ctw_losses", "0")),
+        ctw_wl=_float(stats.get("ctw_wl", "0")),
+        ctw_kills=_int(stats.get("ctw_kills", "0")),
+        ctw_deaths=_int(stats.get("ctw_deaths", "0")),
+        ctw_kd=_float(stats.get("ctw_kd", "0")),
+    )
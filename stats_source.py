@@ -0,0 +1,223 @@
+"""Where a refresh gets its stats from.
+
+Every source returns the dict of stat strings stats_parser.extract_stats()
+produces, so the workbook code downstream doesn't change:
+
+    plancke  scrape the plancke.io player page (get.py PlanckeSource:
+             proxies, retries, bs4); needs no key
+    hypixel  Hypixel public API JSON (HypixelApiSource below): players are
+             looked up by UUID, one small JSON body per refresh, no HTML
+             parsing and no proxies
+    archive  the latest page page_archive.py kept for the player (get.py
+             ArchiveSource): re-extracts stored plancke pages, no network
+
+Pick one per deployment with SHEEPWARS_STATS_SOURCE=plancke|hypixel (get.py
+-source overrides it). The API key comes from HYPIXEL_API_KEY or
+API_KEY.txt. HYPIXEL_API_BASE_URL and MOJANG_API_BASE_URL point the API
+source at a stand-in (loadtest/fake_hypixel.py).
+
+Both sources take an identity.IdentityCache: players whose UUID is known
+are fetched by UUID, so a renamed player is still found under the old name.
+"""
+import os
+import threading
+import time
+from pathlib import Path
+
+from tracing import span
+
+SCRIPT_DIR = Path(__file__).parent.absolute()
+API_KEY_FILE = SCRIPT_DIR / "API_KEY.txt"
+
+SOURCES = ("plancke", "hypixel", "archive")
+DEFAULT_SOURCE = os.environ.get("SHEEPWARS_STATS_SOURCE", "plancke").strip().lower() or "plancke"
+
+HYPIXEL_API_BASE_URL = os.environ.get("HYPIXEL_API_BASE_URL", "https://api.hypixel.net").rstrip("/")
+# Requests left in the key's window that we never spend (other tools may share the key)
+RATE_LIMIT_RESERVE = int(os.environ.get("HYPIXEL_RATE_LIMIT_RESERVE", 2))
+
+
+def load_api_key():
+    """HYPIXEL_API_KEY, else the contents of API_KEY.txt (None if neither is set)."""
+    key = os.environ.get("HYPIXEL_API_KEY")
+    if not key:
+        try:
+            key = API_KEY_FILE.read_text(encoding="utf-8").strip()
+        except OSError:
+            key = None
+    return key or None
+
+
+class StatsSource:
+    """One way of turning an IGN into an extract_stats()-shaped dict."""
+    name = "base"
+
+    def prepare(self, usernames):
+        """Look up whatever can be fetched for many players in one go (batch mode)."""
+
+    def fetch(self, username) -> dict:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+# -------------------
+# Hypixel API
+# -------------------
+class RateLimiter:
+    """Key-level request accounting from the RateLimit-* response headers.
+
+    Hypixel limits requests per key per window and reports what is left
+    on every response. Calls are counted as they go out so concurrent
+    workers don't all spend the last few; once only RATE_LIMIT_RESERVE
+    remain, callers wait for the window to reset.
+    """
+
+    def __init__(self, reserve: int = RATE_LIMIT_RESERVE):
+        self.reserve = reserve
+        self.lock = threading.Lock()
+        self.limit = None
+        self.remaining = None  # unknown until the first response
+        self.reset_at = 0.0    # time.monotonic() when the window resets
+        self.window = 0.0      # longest reset interval seen, i.e. the window length
+        self.requests = 0
+        self.throttled = 0
+        self.waited = 0.0
+
+    def _roll(self, now):
+        if self.remaining is not None and now >= self.reset_at:
+            # A new window has started; the next response corrects the estimate
+            self.remaining = self.limit
+            self.reset_at = now + self.window
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self._roll(now)
+            if self.remaining is not None and self.remaining <= self.reserve:
+                wait = self.reset_at - now
+                print(f"[API] Key rate limit reached ({self.remaining}/{self.limit} left), waiting {wait:.1f}s")
+                self.throttled += 1
+                self.waited += wait
+                # held while sleeping: every other caller would have to wait anyway
+                time.sleep(wait)
+                self._roll(time.monotonic())
+            if self.remaining is not None:
+                self.remaining -= 1
+            self.requests += 1
+
+    def update(self, response):
+        headers = response.headers
+        try:
+            limit = int(headers.get("RateLimit-Limit", ""))
+            remaining = int(headers.get("RateLimit-Remaining", ""))
+            reset = float(headers.get("RateLimit-Reset", ""))
+        except ValueError:
+            limit = remaining = reset = None
+        if response.status_code == 429:
+            remaining = 0
+            try:
+                reset = float(headers.get("Retry-After") or reset or 10)
+            except ValueError:
+                reset = 10.0
+        if remaining is None:
+            return
+        with self.lock:
+            if limit is not None:
+                self.limit = limit
+            reset_at = time.monotonic() + reset
+            self.window = max(self.window, reset)
+            if self.remaining is not None and abs(reset_at - self.reset_at) < 2:
+                # Same window: requests sent after this one are already counted
+                remaining = min(remaining, self.remaining)
+            self.remaining = remaining
+            self.reset_at = reset_at
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "limit": self.limit, "remaining": self.remaining,
+                "throttled": self.throttled, "waited_s": round(self.waited, 2)}
+
+
+class HypixelApiSource(StatsSource):
+    """Stats from the Hypixel API /v2/player endpoint, keyed by UUID.
+
+    UUIDs come from the identity cache (prepare() resolves a batch of
+    unknown names ten per Mojang call). The API's displayname keeps the
+    cached name current for free. One session and one RateLimiter are
+    shared by every worker thread.
+    """
+    name = "hypixel"
+
+    def __init__(self, api_key=None, session=None, limiter=None, timeout=10, max_retries=3, identities=None):
+        import requests
+        from identity import IdentityCache
+
+        self.api_key = api_key or load_api_key()
+        if not self.api_key:
+            raise RuntimeError("No Hypixel API key: set HYPIXEL_API_KEY or put it in API_KEY.txt")
+        self.own_session = session is None
+        self.session = session if session is not None else requests.Session()
+        self.limiter = limiter or RateLimiter()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.identities = identities if identities is not None else IdentityCache(path=None)
+
+    def prepare(self, usernames):
+        self.identities.resolve_many(usernames, self.session)
+
+    def uuid(self, username) -> str:
+        uuid = self.identities.resolve(username, self.session)
+        if uuid is None:
+            raise RuntimeError(f"No Minecraft account named {username}")
+        return uuid
+
+    def player(self, uuid) -> dict:
+        """The API `player` object (None if the account never joined Hypixel)."""
+        for attempt in range(self.max_retries):
+            self.limiter.acquire()
+            with span("fetch.http", attempt=attempt + 1) as http_span:
+                response = self.session.get(f"{HYPIXEL_API_BASE_URL}/v2/player", params={"uuid": uuid},
+                                            headers={"API-Key": self.api_key}, timeout=self.timeout)
+                http_span.tag(http_status=response.status_code, bytes=len(response.content))
+            self.limiter.update(response)
+            if response.status_code == 429:
+                print(f"  Rate limited by the Hypixel API (attempt {attempt + 1}/{self.max_retries})")
+                continue
+            if response.status_code >= 500 and attempt < self.max_retries - 1:
+                print(f"  Hypixel API returned {response.status_code}, retrying...")
+                time.sleep(2 ** attempt)
+                continue
+            if response.status_code == 403:
+                raise RuntimeError("Hypixel API rejected the key (HTTP 403)")
+            response.raise_for_status()
+            data = response.json()
+            if not data.get("success"):
+                raise RuntimeError(f"Hypixel API error: {data.get('cause')}")
+            return data.get("player")
+        raise RuntimeError("Hypixel API rate limit: gave up after retries")
+
+    def fetch(self, username) -> dict:
+        from stats_parser import stats_from_player
+
+        with span("fetch", source=self.name) as fetch_span:
+            uuid = self.uuid(username)
+            fetch_span.tag(uuid=uuid)
+            player = self.player(uuid)
+        if player is None:
+            raise RuntimeError(f"{username} has never joined Hypixel")
+        if player.get("displayname"):
+            self.identities.remember(uuid, player["displayname"])
+        with span("parse.extract"):
+            return stats_from_player(player)
+
+    def close(self):
+        if self.own_session:
+            self.session.close()
@@ -0,0 +1,171 @@
+"""Per-stage timing spans written as JSON lines.
+
+Usage:
+    with span("fetch.http", proxy=proxy) as s:
+        response = session.get(...)
+        s.tag(bytes=len(response.content))
+
+Spans nest per thread. Child spans are buffered and the whole trace is
+appended to the trace file in one write when its root span closes, so
+the cost per span is a dict and a perf_counter() call. Every record
+carries the trace id and the IGN (inherited from the root span), which
+makes `grep '"ign": "Chuckegg"' timings.jsonl` show a refresh end to end.
+
+The file rotates by size (timings.jsonl -> timings.jsonl.1 ...).
+Set SHEEPWARS_TRACE=0 to disable, SHEEPWARS_TRACE_FILE to change the sink.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+TRACE_ENABLED = os.environ.get("SHEEPWARS_TRACE", "1") not in ("0", "false", "no", "")
+TRACE_FILE = os.environ.get("SHEEPWARS_TRACE_FILE") or str(Path(__file__).parent.absolute() / "timings.jsonl")
+MAX_BYTES = int(os.environ.get("SHEEPWARS_TRACE_MAX_BYTES", 5 * 1024 * 1024))
+BACKUP_COUNT = 3
+
+# Tags copied from a parent span onto its children
+INHERITED_TAGS = ("ign",)
+
+_local = threading.local()
+_write_lock = threading.Lock()
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _rotate():
+    try:
+        if os.path.getsize(TRACE_FILE) < MAX_BYTES:
+            return
+    except OSError:
+        return
+    try:
+        for i in range(BACKUP_COUNT - 1, 0, -1):
+            src = f"{TRACE_FILE}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{TRACE_FILE}.{i + 1}")
+        os.replace(TRACE_FILE, f"{TRACE_FILE}.1")
+    except OSError:
+        # another process rotated first
+        pass
+
+
+def _write(records):
+    if not records:
+        return
+    data = "".join(json.dumps(r, default=str) + "\n" for r in records)
+    with _write_lock:
+        try:
+            _rotate()
+            with open(TRACE_FILE, "a", encoding="utf-8") as f:
+                f.write(data)
+        except Exception as e:
+            print(f"[TRACE] Could not write spans: {e}", file=sys.stderr)
+
+
+class Span:
+    __slots__ = ("name", "tags", "trace_id", "parent", "start", "wall", "status", "error", "buffer")
+
+    def __init__(self, name, tags):
+        self.name = name
+        self.tags = tags
+        self.trace_id = None
+        self.parent = None
+        self.start = 0.0
+        self.wall = 0.0
+        self.status = "ok"
+        self.error = None
+        self.buffer = None
+
+    def tag(self, **tags):
+        self.tags.update(tags)
+        return self
+
+    def fail(self, error):
+        self.status = "error"
+        self.error = str(error)[:300]
+
+    def __enter__(self):
+        stack = _stack()
+        if stack:
+            self.parent = stack[-1]
+            self.trace_id = self.parent.trace_id
+            for key in INHERITED_TAGS:
+                if key not in self.tags and key in self.parent.tags:
+                    self.tags[key] = self.parent.tags[key]
+        else:
+            self.trace_id = os.urandom(6).hex()
+            self.buffer = []
+        stack.append(self)
+        self.wall = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = (time.perf_counter() - self.start) * 1000.0
+        if exc is not None and self.status == "ok":
+            self.fail(exc)
+        stack = _stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        record = {
+            "ts": round(self.wall, 3),
+            "trace": self.trace_id,
+            "span": self.name,
+            "parent": self.parent.name if self.parent else None,
+            "ms": round(duration, 3),
+            "status": self.status,
+            "pid": os.getpid(),
+        }
+        if self.error:
+            record["error"] = self.error
+        for key, value in self.tags.items():
+            record.setdefault(key, value)
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        root.buffer.append(record)
+        if root is self:
+            _write(self.buffer)
+            self.buffer = []
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def tag(self, **tags):
+        return self
+
+    def fail(self, error):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+def span(name, **tags):
+    """Context manager timing one stage. Returns a no-op when tracing is disabled."""
+    if not TRACE_ENABLED:
+        return _NOOP
+    return Span(name, tags)
+
+
+def current():
+    """The innermost open span on this thread (a no-op span if none)."""
+    stack = _stack() if TRACE_ENABLED else None
+    return stack[-1] if stack else _NOOP
+
@@ -0,0 +1,204 @@
+"""In-process registry for tracked users and Discord account links.
+
+tracked_users.txt and user_links.json are loaded once and kept in memory
+behind casefolded keys, so lookups are O(1) dict hits. Writes go to a temp
+file that is renamed over the original. The files are only re-read when
+their mtime changes underneath us (someone edited them by hand), and that
+check itself is throttled so hot paths like authorization never stat the
+disk more than once every few seconds.
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+
+def _atomic_write(path, text):
+    """Write text to a temp file in the same directory, then rename it over path."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        # mkstemp creates 0600 files; keep the permissions the original had
+        try:
+            shutil.copymode(path, tmp_path)
+        except OSError:
+            os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class UserRegistry:
+    def __init__(self, tracked_file, links_file, check_interval: float = 5.0):
+        self.tracked_file = tracked_file
+        self.links_file = links_file
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._tracked = {}  # casefold -> IGN as originally added (insertion ordered)
+        self._links = {}    # casefold IGN -> Discord user ID (str)
+        self._tracked_mtime = None
+        self._links_mtime = None
+        self._last_check = time.monotonic()
+        self._batch_depth = 0
+        self._dirty_tracked = False
+        self._dirty_links = False
+        self._load_tracked()
+        self._load_links()
+
+    # -------------------
+    # Loading
+    # -------------------
+    def _load_tracked(self):
+        tracked = {}
+        if os.path.exists(self.tracked_file):
+            with open(self.tracked_file, "r", encoding="utf-8") as f:
+                for line in f:
+                    ign = line.strip()
+                    if ign:
+                        tracked.setdefault(ign.casefold(), ign)
+        self._tracked = tracked
+        self._tracked_mtime = _mtime(self.tracked_file)
+
+    def _load_links(self):
+        links = {}
+        if os.path.exists(self.links_file):
+            try:
+                with open(self.links_file, "r", encoding="utf-8") as f:
+                    links = {k.casefold(): str(v) for k, v in json.load(f).items()}
+            except Exception:
+                links = {}
+        self._links = links
+        self._links_mtime = _mtime(self.links_file)
+
+    def _refresh(self):
+        """Reload a file only if it changed on disk since we last read or wrote it."""
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        if not self._dirty_tracked and _mtime(self.tracked_file) != self._tracked_mtime:
+            self._load_tracked()
+        if not self._dirty_links and _mtime(self.links_file) != self._links_mtime:
+            self._load_links()
+
+    # -------------------
+    # Persistence
+    # -------------------
+    def _save(self):
+        if self._batch_depth:
+            return
+        if self._dirty_tracked:
+            _atomic_write(self.tracked_file, "".join(u + "\n" for u in self._tracked.values()))
+            self._tracked_mtime = _mtime(self.tracked_file)
+            self._dirty_tracked = False
+        if self._dirty_links:
+            _atomic_write(self.links_file, json.dumps(self._links, indent=2))
+            self._links_mtime = _mtime(self.links_file)
+            self._dirty_links = False
+
+    @contextmanager
+    def batch(self):
+        """Group several changes into a single write of each file."""
+        with self._lock:
+            self._batch_depth += 1
+            try:
+                yield self
+            finally:
+                self._batch_depth -= 1
+                self._save()
+
+    # -------------------
+    # Tracked users
+    # -------------------
+    def tracked_users(self) -> list:
+        with self._lock:
+            self._refresh()
+            return list(self._tracked.values())
+
+    def add_tracked(self, ign: str) -> bool:
+        with self._lock:
+            self._refresh()
+            key = ign.casefold()
+            if key in self._tracked:
+                return False
+            self._tracked[key] = ign
+            self._dirty_tracked = True
+            self._save()
+            return True
+
+    def remove_tracked(self, ign: str) -> bool:
+        with self._lock:
+            self._refresh()
+            if self._tracked.pop(ign.casefold(), None) is None:
+                return False
+            self._dirty_tracked = True
+            self._save()
+            return True
+
+    # -------------------
+    # Discord links
+    # -------------------
+    def links(self) -> dict:
+        with self._lock:
+            self._refresh()
+            return dict(self._links)
+
+    def link(self, discord_user_id, ign: str):
+        with self._lock:
+            self._refresh()
+            key = ign.casefold()
+            value = str(discord_user_id)
+            if self._links.get(key) == value:
+                return
+            self._links[key] = value
+            self._dirty_links = True
+            self._save()
+
+    def unlink(self, ign: str) -> bool:
+        with self._lock:
+            self._refresh()
+            if self._links.pop(ign.casefold(), None) is None:
+                return False
+            self._dirty_links = True
+            self._save()
+            return True
+
+    # -------------------
+    # Name changes
+    # -------------------
+    def rename(self, old_ign: str, new_ign: str) -> bool:
+        """Move a tracked entry and its Discord link from old_ign to new_ign (same position)."""
+        with self._lock:
+            self._refresh()
+            old_key, new_key = old_ign.casefold(), new_ign.casefold()
+            changed = False
+            if old_key in self._tracked:
+                self._tracked = {(new_key if k == old_key else k): (new_ign if k == old_key else v)
+                                 for k, v in self._tracked.items() if k != new_key or old_key == new_key}
+                self._dirty_tracked = changed = True
+            if old_key in self._links:
+                self._links[new_key] = self._links.pop(old_key)
+                self._dirty_links = changed = True
+            self._save()
+            return changed
+
+    def is_authorized(self, discord_user_id, ign: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return self._links.get(ign.casefold()) == str(discord_user_id)
@@ -0,0 +1,70 @@
+"""Cross-process lock around a workbook's load -> modify -> save.
+
+openpyxl rewrites the whole file on save, so two processes updating
+sheep_wars_stats.xlsx at once either lose one's changes or read a file the
+other is halfway through writing (BadZipFile). Refreshes run in several
+processes at once (the bot's staggered refresher, fetch_worker.py workers),
+so every writer holds this lock, an OS file lock on "<workbook>.lock",
+from load to save. The OS drops it if the process dies.
+"""
+import os
+import threading
+
+
+class WorkbookLock:
+    def __init__(self, path):
+        self.path = f"{path}.lock"
+        self._file = None
+        # flock is per open file, so threads of one process must also take turns
+        self._thread_lock = threading.Lock()
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        try:
+            self._file = open(self.path, "a+")
+            if os.name == "nt":
+                import msvcrt
+
+                self._file.seek(0)
+                while True:
+                    try:
+                        # LK_LOCK gives up after ~10s; keep waiting like flock does
+                        msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        continue
+            else:
+                import fcntl
+
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+        except BaseException:
+            self._close()
+            raise
+
+    def release(self):
+        if self._file is None:
+            return
+        if os.name == "nt":
+            import msvcrt
+
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._close()
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()  # also drops the flock
+            self._file = None
+        self._thread_lock.release()
+
+    @property
+    def held(self) -> bool:
+        return self._file is not None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False